@@ -1,45 +1,107 @@
 from flask import (
     Flask,
+    Request,
+    Response,
     render_template,
     request,
     redirect,
     url_for,
     send_from_directory,
     send_file,
-    jsonify
+    jsonify,
+    abort,
+    before_render_template,
+    g,
+    stream_with_context,
+    template_rendered
 )
 
 import os
-import io
 import json
-import zipfile
 import base64
+import threading
+import time
+import uuid
 import pandas as pd
 
 # ==============================
 # SERVICE IMPORTS
 # ==============================
-from services.diagnosis_service import generate_diagnosis_report
-from services.scoring_service import calculate_data_quality_score
-from services.analytics_service import analyze_data
-from services.cleaning_service import clean_data
+from services.cleaning_service import CleaningPlan
 from services.suggestion_service import generate_cleaning_suggestions
-from services.nlp_service import process_nl_query
-from services.trend_service import detect_trends_and_insights
-from services.export_service import generate_python_cleaning_script, generate_pdf_report
-from services.comparison_service import compare_datasets
-from services.versioning_service import save_new_version, get_versions, load_version
+from services.correlation_service import CORRELATION_THRESHOLD, CORRELATION_TOP_K
+from services.report_service import REPORT_PAGE_SIZE, REPORT_SECTIONS, json_safe
+from services.nlp_service import ColumnIndex, normalize_query, process_nl_batch, process_nl_query
+from services.export_service import (
+    COMPRESSIONS,
+    available_compressions,
+    compress_stream,
+    generate_python_cleaning_script,
+    iter_file,
+    stream_zip
+)
+from services.comparison_service import diff_datasets, source_columns
+from services.versioning_service import (
+    dataset_lock,
+    get_versions,
+    load_version,
+    restore_version,
+    save_cleaned_version
+)
+from services.cache_service import (
+    cache_stats,
+    cached,
+    get_correlation,
+    get_profile,
+    get_trends,
+    invalidate,
+    load_dataframe,
+    lookup,
+    profile_ready,
+    store
+)
+from services.storage_service import columnar_enabled, convert_to_columnar, remove_columnar, save_profile
+from services.dtype_service import remove_schema, save_schema
+from services.streaming_service import is_large
+from services.job_service import JobQueue
+from services.ingest_service import MAX_UPLOAD_BYTES, UploadIngest, UploadRejected
+from services.metrics_service import (
+    DEFAULT_PROFILE_DIR,
+    PROFILING_ENABLED,
+    SamplingProfiler,
+    metrics,
+    process_gauges
+)
 
 # ==============================
 # APP SETUP
 # ==============================
-app = Flask(__name__)
-
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 RAW_FOLDER = os.path.join(BASE_DIR, "storage", "raw")
 CLEANED_FOLDER = os.path.join(BASE_DIR, "storage", "versions")
 EXPORT_FOLDER = os.path.join(BASE_DIR, "storage", "exports")
 
+
+class IngestRequest(Request):
+    """
+    CSV files posted to /upload are parsed and profiled while they are
+    being received, instead of being spooled to a temp file first.
+    """
+
+    def _get_file_stream(self, total_content_length, content_type,
+                         filename=None, content_length=None):
+        if self.endpoint == "upload" and filename and filename.endswith(".csv"):
+            ingest = UploadIngest(RAW_FOLDER, expected_bytes=total_content_length)
+            self.ingests = getattr(self, "ingests", []) + [ingest]
+            return ingest
+        return super()._get_file_stream(
+            total_content_length, content_type, filename, content_length
+        )
+
+
+app = Flask(__name__)
+app.request_class = IngestRequest
+
 os.makedirs(RAW_FOLDER, exist_ok=True)
 os.makedirs(CLEANED_FOLDER, exist_ok=True)
 os.makedirs(EXPORT_FOLDER, exist_ok=True)
@@ -47,9 +109,78 @@ os.makedirs(EXPORT_FOLDER, exist_ok=True)
 app.config.update(
     RAW_FOLDER=RAW_FOLDER,
     CLEANED_FOLDER=CLEANED_FOLDER,
-    EXPORT_FOLDER=EXPORT_FOLDER
+    EXPORT_FOLDER=EXPORT_FOLDER,
+    # Multipart overhead on top of the largest accepted CSV
+    MAX_CONTENT_LENGTH=MAX_UPLOAD_BYTES + 1024 * 1024
+)
+
+
+@app.teardown_request
+def discard_unfinished_uploads(exc):
+    for ingest in getattr(request, "ingests", []):
+        if not ingest.finished:
+            ingest.abort()
+
+# ==============================
+# INSTRUMENTATION
+# ==============================
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+
+    # ?profile=1 samples this request's stack (only with MDD_PROFILING=1)
+    if PROFILING_ENABLED and (request.args.get("profile") == "1" or request.headers.get("X-Profile")):
+        g.profiler = SamplingProfiler(threading.get_ident()).start()
+
+
+@app.after_request
+def record_request(response):
+    endpoint = request.endpoint or "unmatched"
+    metrics.observe("mdd_request_seconds", time.perf_counter() - g.request_start, endpoint=endpoint)
+    metrics.inc("mdd_requests_total", endpoint=endpoint, status=response.status_code)
+
+    profiler = g.pop("profiler", None)
+    if profiler is not None:
+        name = f"{time.strftime('%Y%m%d_%H%M%S')}_{endpoint}_{uuid.uuid4().hex[:8]}"
+        trace = profiler.stop().save(name)
+        response.headers["X-Profile-Trace"] = url_for("profile_trace", name=trace)
+    return response
+
+
+def _render_started(sender, template, context, **extra):
+    g.setdefault("render_starts", []).append(time.perf_counter())
+
+
+def _render_finished(sender, template, context, **extra):
+    starts = g.get("render_starts")
+    if starts:
+        metrics.observe("mdd_span_seconds", time.perf_counter() - starts.pop(), span="render")
+
+
+before_render_template.connect(_render_started, app)
+template_rendered.connect(_render_finished, app)
+
+# Heavy cleaning and export work runs outside the web worker
+jobs = JobQueue(
+    os.path.join(BASE_DIR, "storage", "jobs.db"),
+    folders={
+        "raw": RAW_FOLDER,
+        "cleaned": CLEANED_FOLDER,
+        "jobs": os.path.join(EXPORT_FOLDER, "jobs")
+    }
 )
 
+
+def current_path(filename):
+    """
+    Latest cleaned version if one exists, otherwise the raw upload.
+    """
+    cleaned_path = os.path.join(CLEANED_FOLDER, filename)
+    if os.path.exists(cleaned_path):
+        return cleaned_path
+    return os.path.join(RAW_FOLDER, filename)
+
+
 # ==============================
 # ROUTES
 # ==============================
@@ -62,7 +193,10 @@ def index():
 @app.route("/upload", methods=["GET", "POST"])
 def upload():
     if request.method == "POST":
-        file = request.files.get("file")
+        try:
+            file = request.files.get("file")
+        except UploadRejected as e:
+            return f"Upload rejected: {e}", 400
 
         if not file or not file.filename.endswith(".csv"):
             return "Invalid file format", 400
@@ -71,12 +205,38 @@ def upload():
         raw_path = os.path.join(app.config["RAW_FOLDER"], filename)
         cleaned_path = os.path.join(app.config["CLEANED_FOLDER"], filename)
 
+        ingest = file.stream
+        try:
+            df, profile = ingest.finish()
+        except UploadRejected as e:
+            return f"Upload rejected: {e}", 400
+
         # 🔥 IMPORTANT FIX
         # If same file is uploaded again, RESET previous cleaned version
         if os.path.exists(cleaned_path):
             os.remove(cleaned_path)
-
-        file.save(raw_path)
+        remove_columnar(cleaned_path)
+        remove_schema(cleaned_path)
+        invalidate(cleaned_path)
+
+        ingest.commit(raw_path)
+        invalidate(raw_path)
+
+        # Parsed and profiled during the upload: seed the cache so the
+        # report never reads the file back
+        if df is not None:
+            if columnar_enabled():
+                convert_to_columnar(raw_path, df)
+            else:
+                save_schema(raw_path, {col: str(dtype) for col, dtype in df.dtypes.items()})
+            store(raw_path, "dataframe", df)
+            store(raw_path, "profile", profile)
+            if is_large(raw_path):
+                save_profile(raw_path, profile)
+        else:
+            # Streamed uploads only estimate outliers; the report still
+            # queues the exact profile, which starts from this one
+            save_profile(raw_path, profile, exact=False)
 
         return redirect(url_for("report", filename=filename))
 
@@ -92,64 +252,88 @@ def report(filename):
     if not os.path.exists(raw_path):
         return "File not found", 404
 
-    raw_df = pd.read_csv(raw_path)
-
     if os.path.exists(cleaned_path):
-        df = pd.read_csv(cleaned_path)
+        path = cleaned_path
         data_source = "cleaned"
     else:
-        df = raw_df
+        path = raw_path
         data_source = "original"
 
+    # Until a large file's exact profile exists, sections are estimated
+    # from a sample and the exact profile is computed in the background
+    profile_job_url = None
+    if not (profile_ready(raw_path) and profile_ready(path)):
+        job_id = jobs.active("profile", filename) or jobs.submit("profile", filename)
+        profile_job_url = url_for("job_status", job_id=job_id)
+
+    # The page is a shell; every section is fetched from report_section
     return render_template(
         "report.html",
         filename=filename,
         data_source=data_source,
-        diagnosis=generate_diagnosis_report(df),
-        analytics=analyze_data(df),
-        suggestions=generate_cleaning_suggestions(df),
-        trends=detect_trends_and_insights(df),
-        before_score=calculate_data_quality_score(raw_df),
-        after_score=calculate_data_quality_score(df)
+        approximate=is_large(path),
+        profile_job_url=profile_job_url,
+        page_size=REPORT_PAGE_SIZE,
+        correlation_top_k=CORRELATION_TOP_K,
+        compressions=available_compressions()
     )
 
 
+@app.route("/api/report/<filename>/<section>")
+def report_section(filename, section):
+    """
+    One report section as JSON, paginated over columns (or suggestions,
+    correlation pairs, insights): ?page=N&per_page=M, or ?column=NAME.
+    """
+    raw_path = os.path.join(RAW_FOLDER, filename)
+    if not os.path.exists(raw_path):
+        return jsonify({"error": "File not found"}), 404
+
+    build = REPORT_SECTIONS.get(section)
+    if build is None:
+        return jsonify({"error": f"Unknown report section: {section}"}), 404
+
+    options = {
+        "page": request.args.get("page", 1, type=int),
+        "per_page": request.args.get("per_page", REPORT_PAGE_SIZE, type=int),
+        "column": request.args.get("column") or None
+    }
+    if section == "correlations" and "threshold" in request.args:
+        options["threshold"] = request.args.get("threshold", CORRELATION_THRESHOLD, type=float)
+
+    return jsonify(json_safe(build(raw_path, current_path(filename), **options)))
+
+
 @app.route("/clean/<filename>")
 def clean(filename):
     raw_path = os.path.join(RAW_FOLDER, filename)
-    df = pd.read_csv(raw_path)
+    df = load_dataframe(raw_path)
 
     missing = request.args.get("missing")
     outliers = request.args.get("outliers")
     duplicates = request.args.get("duplicates")
 
+    plan = CleaningPlan()
+    numeric_cols = df.select_dtypes(include="number").columns
+
     # Missing values
-    for col in df.select_dtypes(include="number"):
-        if missing == "mean":
-            df[col].fillna(df[col].mean(), inplace=True)
-        elif missing == "median":
-            df[col].fillna(df[col].median(), inplace=True)
-        elif missing == "mode":
-            df[col].fillna(df[col].mode()[0], inplace=True)
+    if missing in ("mean", "median", "mode"):
+        for col in numeric_cols:
+            plan.fill(col, missing)
 
     # Outliers
-    if outliers == "cap":
-        for col in df.select_dtypes(include="number"):
-            q1, q3 = df[col].quantile([0.25, 0.75])
-            iqr = q3 - q1
-            df[col] = df[col].clip(q1 - 1.5*iqr, q3 + 1.5*iqr)
-
-    elif outliers == "remove":
-        for col in df.select_dtypes(include="number"):
-            q1, q3 = df[col].quantile([0.25, 0.75])
-            iqr = q3 - q1
-            df = df[(df[col] >= q1 - 1.5*iqr) & (df[col] <= q3 + 1.5*iqr)]
+    for col in numeric_cols:
+        if outliers == "cap":
+            plan.clip_outliers(col)
+        elif outliers == "remove":
+            plan.remove_outliers(col)
 
     # Duplicates
     if duplicates == "remove":
-        df.drop_duplicates(inplace=True)
+        plan.drop_duplicates()
 
-    save_new_version(df, filename, "Custom cleaning applied", CLEANED_FOLDER)
+    cleaned, changes = plan.run(df)
+    save_cleaned_version(cleaned, filename, "Custom cleaning applied", CLEANED_FOLDER, raw_path, changes)
 
     return redirect(url_for("report", filename=filename))
 
@@ -159,80 +343,128 @@ def apply_suggestion(filename):
     issue = request.form.get("issue")
     column = request.form.get("column")
 
-    raw_path = os.path.join(app.config["RAW_FOLDER"], filename)
-    cleaned_path = os.path.join(app.config["CLEANED_FOLDER"], filename)
+    # Load latest version; no other save may move it until ours is recorded
+    with dataset_lock(filename, CLEANED_FOLDER):
+        path = current_path(filename)
+        df = load_dataframe(path)
 
-    # Load latest version
-    if os.path.exists(cleaned_path):
-        df = pd.read_csv(cleaned_path)
-    else:
-        df = pd.read_csv(raw_path)
+        # Missing values: median for numeric columns, mode otherwise;
+        # outliers are capped at the IQR bounds (numeric columns only)
+        plan = CleaningPlan.from_suggestions([{"issue": issue, "column": column}])
+        cleaned, changes = plan.run(df)
 
-    # =============================
-    # HANDLE MISSING VALUES SAFELY
-    # =============================
-    if issue == "missing_values":
+        # =============================
+        # SAVE CLEANED VERSION
+        # =============================
+        save_cleaned_version(
+            cleaned,
+            filename,
+            action=f"Applied {issue} fix on {column}",
+            base_dir=CLEANED_FOLDER,
+            source_path=path,
+            changes=changes,
+            source=df
+        )
 
-        # NUMERIC COLUMN → MEDIAN
-        if pd.api.types.is_numeric_dtype(df[column]):
-            df[column].fillna(df[column].median(), inplace=True)
+    return redirect(url_for("report", filename=filename))
 
-        # TEXT / CATEGORY COLUMN → MODE
-        else:
-            mode_val = df[column].mode()
-            if not mode_val.empty:
-                df[column].fillna(mode_val[0], inplace=True)
-
-    # =============================
-    # DUPLICATES
-    # =============================
-    elif issue == "duplicates":
-        df.drop_duplicates(inplace=True)
-
-    # =============================
-    # OUTLIERS (NUMERIC ONLY)
-    # =============================
-    elif issue == "outliers" and pd.api.types.is_numeric_dtype(df[column]):
-        q1 = df[column].quantile(0.25)
-        q3 = df[column].quantile(0.75)
-        iqr = q3 - q1
-        lower = q1 - 1.5 * iqr
-        upper = q3 + 1.5 * iqr
-        df[column] = df[column].clip(lower, upper)
-
-    # =============================
-    # SAVE CLEANED VERSION
-    # =============================
-    save_new_version(
-        df,
-        filename,
-        action=f"Applied {issue} fix on {column}",
-        base_dir=app.config["CLEANED_FOLDER"]
-    )
 
-    return redirect(url_for("report", filename=filename))
 
+def streamed_download(blocks, download_name, mimetype):
+    """
+    Send a generator of bytes as an attachment without buffering it.
+    """
+    response = Response(stream_with_context(blocks), mimetype=mimetype)
+    response.headers.set("Content-Disposition", "attachment", filename=download_name)
+    return response
 
 
 @app.route("/download/<filename>")
 def download(filename):
-    return send_from_directory(CLEANED_FOLDER, filename, as_attachment=True)
+    """
+    Cleaned dataset, optionally compressed on the fly: ?compression=gzip|zstd
+    """
+    compression = request.args.get("compression")
+    if not compression:
+        return send_from_directory(CLEANED_FOLDER, filename, as_attachment=True)
+
+    if compression not in available_compressions():
+        return f"Unsupported compression: {compression}", 400
+
+    path = os.path.join(CLEANED_FOLDER, filename)
+    if not os.path.isfile(path):
+        abort(404)
+
+    extension, mimetype = COMPRESSIONS[compression]
+    return streamed_download(compress_stream(iter_file(path), compression), filename + extension, mimetype)
 
 
 @app.route("/ask/<filename>", methods=["POST"])
 def ask(filename):
-    path = os.path.join(
-        CLEANED_FOLDER if os.path.exists(os.path.join(CLEANED_FOLDER, filename)) else RAW_FOLDER,
-        filename
-    )
-    df = pd.read_csv(path)
-    return process_nl_query(request.form["query"], df)
+    path = current_path(filename)
+    query = normalize_query(request.form["query"])
+
+    def answer():
+        df = load_dataframe(path)
+        index = cached(path, "column_index", lambda: ColumnIndex.for_dataframe(df))
+        return process_nl_query(query, df, index, lambda: get_correlation(path), lambda: get_trends(path))
+
+    # Answers are memoized per dataset version and normalized question
+    return cached(path, f"ask:{query}", answer)
+
+
+@app.route("/ask_batch/<filename>", methods=["POST"])
+def ask_batch(filename):
+    """
+    Answer a list of questions, in order, against one snapshot of the data.
+    Accepts JSON {"queries": [...]} or repeated "query" form fields.
+    """
+    payload = request.get_json(silent=True) or {}
+    queries = payload.get("queries") if payload else request.form.getlist("query")
+    if not isinstance(queries, list) or not all(isinstance(q, str) for q in queries):
+        return jsonify({"error": "Expected a list of questions"}), 400
+
+    path = current_path(filename)
+    queries = [normalize_query(q) for q in queries]
+
+    # Previously answered questions come from the cache; the rest share one pass
+    answers = {q: lookup(path, f"ask:{q}") for q in dict.fromkeys(queries)}
+    pending = [q for q, a in answers.items() if a is None]
+    if pending:
+        df = load_dataframe(path)
+        index = cached(path, "column_index", lambda: ColumnIndex.for_dataframe(df))
+        results = process_nl_batch(
+            pending, df, index, lambda: get_correlation(path), lambda: get_trends(path)
+        )
+        for q, a in zip(pending, results):
+            answers[q] = a
+            if "error" not in a:
+                store(path, f"ask:{q}", a)
+
+    return jsonify({"results": [answers[q] for q in queries]})
+
+
+@app.route("/correlation/<filename>")
+def correlation(filename):
+    """
+    Correlations for the current version: the strongest pairs by default
+    (?top=K&threshold=T), the full matrix with ?full=1.
+    """
+    matrix = get_correlation(current_path(filename))
+
+    if request.args.get("full") == "1":
+        return jsonify({"columns": matrix.columns, "matrix": matrix.to_dict()})
+
+    top = request.args.get("top", CORRELATION_TOP_K, type=int)
+    threshold = request.args.get("threshold", CORRELATION_THRESHOLD, type=float)
+    return jsonify(matrix.summary(top, threshold))
 
 
 @app.route("/export/python/<filename>")
 def export_python(filename):
-    df = pd.read_csv(os.path.join(RAW_FOLDER, filename))
-    name, code = generate_python_cleaning_script(filename, generate_cleaning_suggestions(df))
+    raw_path = os.path.join(RAW_FOLDER, filename)
+    suggestions = generate_cleaning_suggestions(None, get_profile(raw_path))
+    name, code = generate_python_cleaning_script(filename, suggestions)
 
     path = os.path.join(EXPORT_FOLDER, name)
     with open(path, "w") as f:
@@ -243,179 +475,172 @@ def export_python(filename):
 
 @app.route("/export/pdf/<filename>")
 def export_pdf(filename):
-    raw_path = os.path.join(RAW_FOLDER, filename)
-    df = pd.read_csv(raw_path)
-
-    pdf_name = filename.replace(".csv", "_report.pdf")
-    pdf_path = os.path.join(EXPORT_FOLDER, pdf_name)
-
-    generate_pdf_report(
-    filename,
-    generate_diagnosis_report(df),
-    calculate_data_quality_score(df),
-    detect_trends_and_insights(df),
-    pdf_path,
-    df=df   # 🔥 THIS IS THE KEY
-)
+    return submit_job("export_pdf", filename)
 
 
-    return send_from_directory(EXPORT_FOLDER, pdf_name, as_attachment=True)
+def compare_source(filename, ref):
+    """
+    Dataset behind a compare reference: "raw", "latest" or "v<id>".
+    """
+    if ref == "raw":
+        return os.path.join(RAW_FOLDER, filename)
+    if ref == "latest":
+        return current_path(filename)
+    if ref.startswith("v") and ref[1:].isdigit():
+        return load_version(filename, int(ref[1:]), CLEANED_FOLDER)
+    return None
 
 
 @app.route("/compare/<filename>")
 def compare(filename):
+    """
+    Row-level diff between two versions: ?before=raw&after=latest by
+    default; either may be v<id> from the version history. ?key=COLUMN
+    matches rows on that column instead of by content.
+    """
+    before = request.args.get("before", "raw")
+    after = request.args.get("after", "latest")
+    key = request.args.get("key") or None
+
+    def diff():
+        old, new = compare_source(filename, before), compare_source(filename, after)
+        if old is None or new is None:
+            return None
+        return diff_datasets(old, new, key, labels=(before, after)).to_dict()
+
+    # Versions never change once saved, and "latest" moves with this path
+    comparison = cached(current_path(filename), f"diff:{before}:{after}:{key}", diff)
+    if comparison is None:
+        abort(404)
+
     return render_template(
         "compare.html",
-        comparison=compare_datasets(
-            pd.read_csv(os.path.join(RAW_FOLDER, filename)),
-            pd.read_csv(os.path.join(CLEANED_FOLDER, filename))
-        ),
+        comparison=comparison,
+        versions=get_versions(filename, CLEANED_FOLDER),
+        columns=source_columns(current_path(filename)),
+        key=key,
         filename=filename
     )
 
 
 @app.route("/versions/<filename>")
 def versions(filename):
-    return render_template("versions.html", versions=get_versions(filename), filename=filename)
+    return render_template(
+        "versions.html",
+        versions=get_versions(filename, CLEANED_FOLDER),
+        filename=filename
+    )
 
 
 @app.route("/undo/<filename>/<int:version>")
 def undo(filename, version):
-    df = load_version(filename, version, CLEANED_FOLDER)
-    df.to_csv(os.path.join(CLEANED_FOLDER, filename), index=False)
+    restore_version(filename, version, CLEANED_FOLDER)
     return redirect(url_for("report", filename=filename))
 @app.route("/apply_all/<filename>", methods=["POST"])
 def apply_all_suggestions(filename):
-
-    raw_path = os.path.join(app.config["RAW_FOLDER"], filename)
-    cleaned_path = os.path.join(app.config["CLEANED_FOLDER"], filename)
-
-    # Load latest data
-    if os.path.exists(cleaned_path):
-        df = pd.read_csv(cleaned_path)
-    else:
-        df = pd.read_csv(raw_path)
-
-    suggestions = generate_cleaning_suggestions(df)
-
-    for s in suggestions:
-        issue = s["issue"]
-        column = s["column"]
-
-        # =============================
-        # MISSING VALUES
-        # =============================
-        if issue == "missing_values":
-
-            if column != "ALL":
-                if pd.api.types.is_numeric_dtype(df[column]):
-                    df[column].fillna(df[column].median(), inplace=True)
-                else:
-                    mode = df[column].mode()
-                    if not mode.empty:
-                        df[column].fillna(mode[0], inplace=True)
-
-        # =============================
-        # DUPLICATES
-        # =============================
-        elif issue == "duplicates":
-            df.drop_duplicates(inplace=True)
-
-        # =============================
-        # OUTLIERS
-        # =============================
-        elif issue == "outliers" and pd.api.types.is_numeric_dtype(df[column]):
-
-            q1 = df[column].quantile(0.25)
-            q3 = df[column].quantile(0.75)
-            iqr = q3 - q1
-            lower = q1 - 1.5 * iqr
-            upper = q3 + 1.5 * iqr
-
-            df[column] = df[column].clip(lower, upper)
-
-    # =============================
-    # SAVE AS ONE VERSION
-    # =============================
-    save_new_version(
-        df,
-        filename,
-        action="Applied all AI cleaning suggestions",
-        base_dir=app.config["CLEANED_FOLDER"]
-    )
-
-    return redirect(url_for("report", filename=filename))
+    return submit_job("apply_all", filename)
 
 @app.route("/export/analytics", methods=["POST"])
 def export_analytics():
     data = request.json
 
-    mem_zip = io.BytesIO()
-
-    with zipfile.ZipFile(mem_zip, "w", zipfile.ZIP_DEFLATED) as z:
-
+    def entries():
         # Save summary
-        z.writestr("summary.json", json.dumps({
+        yield "summary.json", [json.dumps({
             "scores": data["scores"],
             "analytics": data["analytics"]
-        }, indent=2))
+        }, indent=2).encode()]
 
-        # Save charts
+        # Save charts, decoding one image at a time
         for name, img in data["images"].items():
-            img_data = base64.b64decode(img.split(",")[1])
-            z.writestr(f"charts/{name}.png", img_data)
-
-    mem_zip.seek(0)
-    return send_file(
-        mem_zip,
-        mimetype="application/zip",
-        as_attachment=True,
-        download_name="analytics_report.zip"
-    )
+            yield f"charts/{name}.png", [base64.b64decode(img.split(",")[1])]
+
+    return streamed_download(stream_zip(entries()), "analytics_report.zip", "application/zip")
 
 @app.route("/export/analytics-safe/<filename>")
 def export_analytics_safe(filename):
     """
-    Windows-safe analytics export
-    Creates ZIP on disk first, then sends it
+    Analytics ZIP for the latest version, built by a background job.
     """
+    return submit_job("export_analytics", filename)
 
-    # Decide data source
-    csv_path = (
-        os.path.join(CLEANED_FOLDER, filename)
-        if os.path.exists(os.path.join(CLEANED_FOLDER, filename))
-        else os.path.join(RAW_FOLDER, filename)
-    )
-
-    df = pd.read_csv(csv_path)
-    analytics = analyze_data(df)
-    scores = calculate_data_quality_score(df)
 
-    zip_name = filename.replace(".csv", "_analytics.zip")
-    zip_path = os.path.join(EXPORT_FOLDER, zip_name)
+# ==============================
+# BACKGROUND JOBS
+# ==============================
+@app.route("/jobs/<kind>/<filename>", methods=["POST"])
+def submit_job(kind, filename):
+    if not os.path.exists(os.path.join(RAW_FOLDER, filename)):
+        return jsonify({"error": "File not found"}), 404
+
+    try:
+        job_id = jobs.submit(kind, filename)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    return jsonify({
+        "job_id": job_id,
+        "status_url": url_for("job_status", job_id=job_id)
+    }), 202
+
+
+@app.route("/jobs/<job_id>")
+def job_status(job_id):
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+
+    job.pop("result_path")
+    job["result_url"] = (
+        url_for("job_result", job_id=job_id) if job["status"] == "done" else None
+    )
+    return jsonify(job)
 
-    with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as z:
 
-        # 1️⃣ CSV
-        z.write(csv_path, arcname=filename)
+@app.route("/jobs/<job_id>/result")
+def job_result(job_id):
+    job = jobs.get(job_id)
+    if job is None or job["status"] != "done":
+        return "Job not finished", 404
 
-        # 2️⃣ Analytics JSON
-        analytics_path = os.path.join(EXPORT_FOLDER, "analytics.json")
-        with open(analytics_path, "w") as f:
-            json.dump(analytics, f, indent=2)
-        z.write(analytics_path, arcname="analytics/analytics.json")
+    if job["result_path"]:
+        return send_file(
+            job["result_path"],
+            as_attachment=True,
+            download_name=job["download_name"]
+        )
+    return redirect(url_for("report", filename=job["filename"]))
 
-        # 3️⃣ Scores JSON
-        scores_path = os.path.join(EXPORT_FOLDER, "scores.json")
-        with open(scores_path, "w") as f:
-            json.dump(scores, f, indent=2)
-        z.write(scores_path, arcname="analytics/scores.json")
 
-    return send_file(
-        zip_path,
-        as_attachment=True,
-        download_name=zip_name
-    )
+# ==============================
+# METRICS
+# ==============================
+@app.route("/metrics")
+def prometheus_metrics():
+    """
+    Request and stage timings in the Prometheus text format. Each process
+    reports its own; background job workers are not included.
+    """
+    cache = cache_stats()
+    gauges = {
+        "mdd_cache_entries": cache["entries"],
+        "mdd_cache_bytes": cache["bytes"],
+        "mdd_cache_max_bytes": cache["max_bytes"],
+        "mdd_cache_hits": cache["hits"],
+        "mdd_cache_misses": cache["misses"],
+        **process_gauges()
+    }
+    return Response(metrics.render(gauges), mimetype="text/plain; version=0.0.4")
+
+
+@app.route("/debug/profiles/<name>")
+def profile_trace(name):
+    """
+    Collapsed stacks of a profiled request, for flamegraph.pl or speedscope.
+    """
+    if not PROFILING_ENABLED:
+        abort(404)
+    return send_from_directory(DEFAULT_PROFILE_DIR, name, as_attachment=True)
 
 
 # ==============================
@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+
+CATEGORIES = ["alpha", "bravo", "charlie", "delta", "echo", "foxtrot", "golf", "hotel"]
+
+
+def make_dataset(
+    rows,
+    columns,
+    missing_rate=0.05,
+    duplicate_rate=0.01,
+    outlier_rate=0.01,
+    text_fraction=0.2,
+    seed=0
+):
+    """
+    Synthetic mixed-type dataset: float and integer measurement columns
+    plus low-cardinality text columns, with the requested fraction of
+    missing cells, duplicate rows and numeric outliers.
+    """
+    rng = np.random.default_rng(seed)
+
+    text_cols = int(round(columns * text_fraction))
+    numeric_cols = columns - text_cols
+    data = {}
+
+    for i in range(numeric_cols):
+        name = f"num_{i:03d}"
+        if i % 3 == 2:
+            data[name] = rng.integers(0, 100, rows).astype("float64")
+        else:
+            data[name] = rng.normal(rng.uniform(-50, 50), rng.uniform(1, 20), rows)
+
+        # Outliers far outside the IQR fences
+        hits = rng.random(rows) < outlier_rate
+        spread = np.nanstd(data[name]) or 1.0
+        data[name][hits] += rng.choice([-1, 1], hits.sum()) * 20 * spread
+
+    for i in range(text_cols):
+        values = rng.choice(CATEGORIES, rows).astype(object)
+        data[f"cat_{i:03d}"] = values
+
+    df = pd.DataFrame(data)
+
+    # Missing cells, independently per column
+    for col in df.columns:
+        gaps = rng.random(rows) < missing_rate
+        if gaps.any():
+            df.loc[gaps, col] = np.nan
+
+    # Duplicates: overwrite some rows with copies of earlier rows
+    dup_count = int(rows * duplicate_rate)
+    if dup_count and rows > 1:
+        targets = rng.choice(np.arange(1, rows), dup_count, replace=False)
+        sources = (rng.random(dup_count) * targets).astype(int)
+        df.iloc[targets] = df.iloc[sources].to_numpy()
+
+    return df.infer_objects()
+
+
+def write_dataset(path, **params):
+    df = make_dataset(**params)
+    df.to_csv(path, index=False)
+    return df
@@ -0,0 +1,274 @@
+"""
+Benchmark the report and cleaning hot paths on synthetic datasets.
+
+    python -m benchmarks.run                       # quick preset
+    python -m benchmarks.run --preset full
+    python -m benchmarks.run --rows 100000 --columns 50 --missing 0.1
+    python -m benchmarks.run --compare old.json new.json
+
+Each case records wall time (best and median of --repeat runs) and peak
+traced memory (one extra run under tracemalloc). Results are written as
+JSON to benchmarks/results/ unless --output is given.
+"""
+import argparse
+import datetime
+import gc
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from benchmarks.generators import make_dataset  # noqa: E402
+from services.analytics_service import analyze_data  # noqa: E402
+from services.chart_service import compute_histograms, histogram_chart  # noqa: E402
+from services.cleaning_service import apply_suggestions  # noqa: E402
+from services.diagnosis_service import generate_diagnosis_report  # noqa: E402
+from services.export_service import generate_pdf_report  # noqa: E402
+from services.nlp_service import process_nl_query  # noqa: E402
+from services.profile_service import build_profile  # noqa: E402
+from services.scoring_service import calculate_data_quality_score  # noqa: E402
+from services.suggestion_service import generate_cleaning_suggestions  # noqa: E402
+from services.trend_service import detect_trends_and_insights  # noqa: E402
+from services.versioning_service import save_new_version  # noqa: E402
+
+RESULTS_DIR = os.path.join(BASE_DIR, "benchmarks", "results")
+
+PRESETS = {
+    "quick": [
+        {"rows": 10_000, "columns": 20},
+        {"rows": 100_000, "columns": 20},
+    ],
+    "full": [
+        {"rows": 10_000, "columns": 20},
+        {"rows": 100_000, "columns": 20},
+        {"rows": 1_000_000, "columns": 20},
+        {"rows": 100_000, "columns": 200},
+        {"rows": 100_000, "columns": 20, "missing_rate": 0.3},
+        {"rows": 100_000, "columns": 20, "duplicate_rate": 0.2},
+        {"rows": 100_000, "columns": 20, "outlier_rate": 0.1},
+    ],
+}
+
+NL_QUERIES = [
+    "highest value in num_000",
+    "average num_001",
+    "missing values",
+    "correlation",
+]
+
+
+# ==========================
+# Benchmarked operations
+# ==========================
+def _pdf(df, workdir):
+    profile = build_profile(df)
+    histograms = compute_histograms([df], profile, profile.numeric_columns)
+    generate_pdf_report(
+        "benchmark.csv",
+        generate_diagnosis_report(df, profile),
+        calculate_data_quality_score(df, profile),
+        detect_trends_and_insights(df, profile),
+        os.path.join(workdir, "benchmark_report.pdf"),
+        charts={col: histogram_chart(h) for col, h in histograms.items()}
+    )
+
+
+def _nl_queries(df, workdir):
+    for query in NL_QUERIES:
+        process_nl_query(query, df)
+
+
+def _apply_all(df, workdir):
+    apply_suggestions(df, generate_cleaning_suggestions(df))
+
+
+def _save_version(df, workdir):
+    save_new_version(df, "benchmark.csv", "Benchmark", workdir)
+
+
+BENCHMARKS = {
+    "build_profile": lambda df, workdir: build_profile(df),
+    "generate_diagnosis_report": lambda df, workdir: generate_diagnosis_report(df),
+    "analyze_data": lambda df, workdir: analyze_data(df),
+    "calculate_data_quality_score": lambda df, workdir: calculate_data_quality_score(df),
+    "generate_cleaning_suggestions": lambda df, workdir: generate_cleaning_suggestions(df),
+    "apply_suggestions": _apply_all,
+    "process_nl_query": _nl_queries,
+    "save_new_version": _save_version,
+    "generate_pdf_report": _pdf,
+}
+
+
+# ==========================
+# Measurement
+# ==========================
+def measure(func, df, workdir, repeat):
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        func(df, workdir)
+        times.append(time.perf_counter() - start)
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func(df, workdir)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "best_s": round(min(times), 6),
+        "median_s": round(statistics.median(times), 6),
+        "peak_bytes": peak,
+    }
+
+
+def run_case(params, names, repeat):
+    df = make_dataset(**params)
+    case = {
+        "params": params,
+        "shape": list(df.shape),
+        "memory_bytes": int(df.memory_usage(deep=True).sum()),
+        "results": {},
+    }
+
+    for name in names:
+        with tempfile.TemporaryDirectory() as workdir:
+            try:
+                case["results"][name] = measure(BENCHMARKS[name], df, workdir, repeat)
+            except Exception as e:
+                case["results"][name] = {"error": f"{type(e).__name__}: {e}"}
+
+        print(f"  {name:32s} {_format(case['results'][name])}", flush=True)
+
+    return case
+
+
+def _format(result):
+    if "error" in result:
+        return f"ERROR {result['error']}"
+    return f"{result['best_s'] * 1000:10.1f} ms  {result['peak_bytes'] / 2**20:8.1f} MiB peak"
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=BASE_DIR,
+            stderr=subprocess.DEVNULL,
+            text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# ==========================
+# Comparison
+# ==========================
+def _case_key(case):
+    return json.dumps(case["params"], sort_keys=True)
+
+
+def compare(old_path, new_path, threshold):
+    """
+    Print the per-benchmark change between two result files and return
+    the regressions slower than threshold (a ratio, e.g. 1.1).
+    """
+    with open(old_path) as f:
+        old = {_case_key(c): c for c in json.load(f)["cases"]}
+    with open(new_path) as f:
+        new = json.load(f)["cases"]
+
+    regressions = []
+    for case in new:
+        before = old.get(_case_key(case))
+        if before is None:
+            continue
+
+        print(case["params"])
+        for name, result in case["results"].items():
+            prev = before["results"].get(name)
+            if not prev or "error" in prev or "error" in result:
+                continue
+
+            ratio = result["best_s"] / prev["best_s"] if prev["best_s"] else float("inf")
+            marker = "  REGRESSION" if ratio > threshold else ""
+            print(f"  {name:32s} {prev['best_s'] * 1000:10.1f} -> {result['best_s'] * 1000:10.1f} ms  x{ratio:.2f}{marker}")
+            if ratio > threshold:
+                regressions.append((case["params"], name, ratio))
+
+    return regressions
+
+
+# ==========================
+# CLI
+# ==========================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--preset", choices=sorted(PRESETS), default="quick")
+    parser.add_argument("--rows", type=int, help="single case instead of a preset")
+    parser.add_argument("--columns", type=int, default=20)
+    parser.add_argument("--missing", type=float, default=0.05)
+    parser.add_argument("--duplicates", type=float, default=0.01)
+    parser.add_argument("--outliers", type=float, default=0.01)
+    parser.add_argument("--only", nargs="+", choices=sorted(BENCHMARKS))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="JSON results path")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"))
+    parser.add_argument("--threshold", type=float, default=1.1)
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        regressions = compare(*args.compare, args.threshold)
+        return 1 if regressions else 0
+
+    if args.rows:
+        cases = [{
+            "rows": args.rows,
+            "columns": args.columns,
+            "missing_rate": args.missing,
+            "duplicate_rate": args.duplicates,
+            "outlier_rate": args.outliers,
+        }]
+    else:
+        cases = PRESETS[args.preset]
+
+    names = args.only or list(BENCHMARKS)
+    commit = _git_commit()
+    report = {
+        "commit": commit,
+        "created_at": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": args.repeat,
+        "cases": [],
+    }
+
+    for params in cases:
+        print(params, flush=True)
+        report["cases"].append(run_case(params, names, args.repeat))
+
+    output = args.output
+    if not output:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+        output = os.path.join(RESULTS_DIR, f"{stamp}_{commit or 'nogit'}.json")
+
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,16 +1,45 @@
 from datetime import datetime
 
 class DatasetState:
-    def __init__(self, filename, version, action):
+    """
+    One saved version of a dataset, as recorded in its version manifest.
+    kind/file/depth say how the version is stored (checkpoint, delta or
+    legacy snapshot); rows, columns, size and score describe it without
+    loading it.
+    """
+
+    def __init__(self, filename, version, action, parent=None, kind=None, file=None,
+                 depth=0, rows=None, columns=None, size_bytes=None, score=None,
+                 timestamp=None):
         self.filename = filename
         self.version = version
         self.action = action
-        self.timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self.parent = parent
+        self.kind = kind
+        self.file = file
+        self.depth = depth
+        self.rows = rows
+        self.columns = columns
+        self.size_bytes = size_bytes
+        self.score = score
+        self.timestamp = timestamp or datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**data)
 
     def to_dict(self):
         return {
             "filename": self.filename,
             "version": self.version,
+            "parent": self.parent,
             "action": self.action,
-            "timestamp": self.timestamp
+            "timestamp": self.timestamp,
+            "kind": self.kind,
+            "file": self.file,
+            "depth": self.depth,
+            "rows": self.rows,
+            "columns": self.columns,
+            "size_bytes": self.size_bytes,
+            "score": self.score
         }
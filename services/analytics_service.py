@@ -1,9 +1,16 @@
 import numpy as np
 import pandas as pd
 
-def analyze_data(df):
-    numeric_cols = df.select_dtypes(include="number").columns.tolist()
-    all_cols = df.columns.tolist()
+from services.correlation_service import CorrelationMatrix, correlation_matrix
+from services.metrics_service import instrument
+from services.profile_service import build_profile
+
+
+@instrument("analytics")
+def analyze_data(df, profile=None, correlation=None):
+    profile = profile or build_profile(df)
+    numeric_cols = profile.numeric_columns
+    all_cols = profile.column_names
 
     stats = {}
     variance = {}
@@ -11,31 +18,31 @@ def analyze_data(df):
     outliers = {}
 
     for col in numeric_cols:
-        series = df[col].dropna()
+        c = profile.column(col)
 
         stats[col] = {
-            "min": float(series.min()),
-            "mean": float(series.mean()),
-            "max": float(series.max())
+            "min": c.min,
+            "mean": c.mean,
+            "max": c.max
         }
 
-        variance[col] = float(series.var())
-        missing[col] = int(df[col].isnull().sum())
+        variance[col] = c.var
+        missing[col] = c.null_count
 
         # Outlier detection (IQR)
-        q1 = series.quantile(0.25)
-        q3 = series.quantile(0.75)
-        iqr = q3 - q1
-        lower = q1 - 1.5 * iqr
-        upper = q3 + 1.5 * iqr
-        outliers[col] = int(((series < lower) | (series > upper)).sum())
+        outliers[col] = c.outlier_count
 
     # Missing for NON-numeric columns too
-    for col in df.columns:
+    for col in all_cols:
         if col not in missing:
-            missing[col] = int(df[col].isnull().sum())
+            missing[col] = profile.column(col).null_count
 
-    correlation = df[numeric_cols].corr().round(2).fillna(0).to_dict()
+    # Only the strongest pairs are embedded; the full matrix is served on demand
+    if correlation is None:
+        if profile.correlation is not None:
+            correlation = CorrelationMatrix.from_frame(profile.correlation)
+        else:
+            correlation = correlation_matrix(df, numeric_cols)
 
     return {
         "columns": all_cols,          # ✅ ALL columns (FIX)
@@ -44,5 +51,5 @@ def analyze_data(df):
         "variance": variance,
         "missing": missing,
         "outliers": outliers,
-        "correlation": correlation
+        "correlation": correlation.summary()
     }
@@ -0,0 +1,260 @@
+import os
+import sys
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+from reportlab.graphics.shapes import Drawing
+
+from services.chart_service import compute_histograms, histogram_chart
+from services.correlation_service import CorrelationMatrix, correlation_matrix
+from services.profile_service import DatasetProfile, build_profile
+from services.sampling_service import PreviewReport, build_preview
+from services.storage_service import load_profile, read_dataset, save_profile
+from services.streaming_service import CHUNK_ROWS, count_outliers, is_large, stream_profile
+from services.trend_service import TrendReport, analyze_trends, stream_trends
+
+# Memory budget shared by every cached DataFrame, profile and score
+CACHE_MAX_BYTES = int(os.environ.get("MDD_CACHE_MAX_BYTES", 512 * 1024 * 1024))
+
+
+class LRUCache:
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()       # key -> (value, size)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value, size):
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= self._entries.pop(key)[1]
+
+            # Values larger than the whole budget are never cached
+            if size > self.max_bytes:
+                return
+
+            while self._entries and self._bytes + size > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._bytes -= evicted
+
+            self._entries[key] = (value, size)
+            self._bytes += size
+
+    def discard(self, predicate):
+        with self._lock:
+            for key in [k for k in self._entries if predicate(k)]:
+                self._bytes -= self._entries.pop(key)[1]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses
+            }
+
+
+_cache = LRUCache(CACHE_MAX_BYTES)
+
+
+def file_key(path):
+    """
+    Identify the current contents of a file by path, mtime and size.
+    """
+    st = os.stat(path)
+    return (os.path.abspath(path), st.st_mtime_ns, st.st_size)
+
+
+def _estimate_size(value):
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(deep=True))
+    if isinstance(value, DatasetProfile):
+        return (
+            _estimate_size(value.duplicate_mask)
+            + _estimate_size(value.row_hashes)
+            + 1024 * len(value.columns)
+        )
+    if isinstance(value, CorrelationMatrix):
+        return value.values.nbytes + 64 * len(value.columns)
+    if isinstance(value, Drawing):
+        return 512 * len(value.contents)
+    if isinstance(value, PreviewReport):
+        return (
+            _estimate_size(value.profile)
+            + _estimate_size(value.correlation)
+            + _estimate_size(value.trends)
+        )
+    if isinstance(value, TrendReport):
+        return sum(64 * len(t.rolling) + 1024 for t in value.columns.values())
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(
+            _estimate_size(k) + _estimate_size(v) for k, v in value.items()
+        )
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(_estimate_size(v) for v in value)
+    return sys.getsizeof(value)
+
+
+def cached(path, kind, compute):
+    """
+    Return the cached result of compute() for the current contents of path.
+    """
+    key = file_key(path) + (kind,)
+    value = _cache.get(key)
+
+    if value is None:
+        value = compute()
+        _cache.put(key, value, _estimate_size(value))
+
+    return value
+
+
+def lookup(path, kind):
+    """
+    Cached value for the current contents of path, or None; never computes.
+    """
+    return _cache.get(file_key(path) + (kind,))
+
+
+def store(path, kind, value):
+    """
+    Seed the cache for the current contents of path with a known value.
+    """
+    _cache.put(file_key(path) + (kind,), value, _estimate_size(value))
+
+
+def load_dataframe(path):
+    """
+    Parsed DataFrame for path. Shared between requests: copy before mutating.
+    """
+    return cached(path, "dataframe", lambda: read_dataset(path))
+
+
+def get_profile(path):
+    """
+    Profile for path; files too large to load are profiled in chunks, and
+    their profile is saved next to the file for other processes. A
+    one-pass profile saved at upload only needs its outliers counted.
+    """
+    def stream():
+        profile = load_profile(path)
+        if profile is None:
+            profile = load_profile(path, exact=False)
+            if profile is None:
+                profile = stream_profile(path)
+            else:
+                profile = count_outliers(path, profile)
+            save_profile(path, profile)
+        return profile
+
+    if is_large(path):
+        return cached(path, "profile", stream)
+    return cached(path, "profile", lambda: build_profile(load_dataframe(path)))
+
+
+def profile_ready(path):
+    """
+    True when get_profile(path) returns without a pass over the file:
+    small files, and large ones already profiled by any process.
+    """
+    if not is_large(path) or lookup(path, "profile") is not None:
+        return True
+
+    profile = load_profile(path)
+    if profile is None:
+        return False
+    store(path, "profile", profile)
+    return True
+
+
+def get_preview(path):
+    """
+    PreviewReport estimated from a sample of path, for use while its exact
+    profile is still being computed.
+    """
+    return cached(path, "preview", lambda: build_preview(path))
+
+
+def get_correlation(path):
+    """
+    CorrelationMatrix for path, computed once per version of the file.
+    """
+    def compute():
+        profile = get_profile(path)
+        if profile.correlation is not None:
+            return CorrelationMatrix.from_frame(profile.correlation)
+        return correlation_matrix(load_dataframe(path), profile.numeric_columns)
+
+    return cached(path, "correlation", compute)
+
+
+def get_trends(path):
+    """
+    TrendReport for path, computed once per version of the file; large
+    files are scanned in chunks in file order.
+    """
+    def compute():
+        if is_large(path):
+            return stream_trends(path, get_profile(path))
+        return analyze_trends(load_dataframe(path), get_profile(path))
+
+    return cached(path, "trends", compute)
+
+
+def get_charts(path, columns=None):
+    """
+    {column: histogram Drawing} for path's numeric columns (or the given
+    ones). Charts are cached per file version and column; whichever are
+    missing are binned together in one chunked pass.
+    """
+    profile = get_profile(path)
+    columns = profile.numeric_columns if columns is None else columns
+    charts = {col: lookup(path, f"chart:{col}") for col in columns}
+
+    missing = [col for col, chart in charts.items() if chart is None]
+    if missing:
+        if is_large(path):
+            chunks = pd.read_csv(path, chunksize=CHUNK_ROWS, usecols=missing)
+        else:
+            df = load_dataframe(path)
+            chunks = (df.iloc[start:start + CHUNK_ROWS] for start in range(0, len(df), CHUNK_ROWS))
+
+        for col, histogram in compute_histograms(chunks, profile, missing).items():
+            charts[col] = histogram_chart(histogram)
+            store(path, f"chart:{col}", charts[col])
+
+    return {col: chart for col, chart in charts.items() if chart is not None}
+
+
+def invalidate(path):
+    """
+    Drop every cached entry derived from path.
+    """
+    path = os.path.abspath(path)
+    _cache.discard(lambda key: key[0] == path)
+
+
+def cache_stats():
+    return _cache.stats()
@@ -0,0 +1,136 @@
+import os
+
+import numpy as np
+from reportlab.graphics.shapes import Drawing, Line, Rect, String
+from reportlab.lib import colors
+
+from services.metrics_service import instrument
+
+HISTOGRAM_BINS = int(os.environ.get("MDD_HISTOGRAM_BINS", 20))
+
+# Size of one chart in the PDF, in points (2 across, 4 down on A4)
+CHART_WIDTH = 240
+CHART_HEIGHT = 150
+
+_BAR_COLOR = colors.HexColor("#3b82f6")
+_AXIS_COLOR = colors.HexColor("#64748b")
+
+
+# ==========================
+# Histograms
+# ==========================
+class Histogram:
+    """
+    Counts of a numeric column over HISTOGRAM_BINS equal-width bins
+    between the column's min and max.
+    """
+
+    def __init__(self, column, edges, counts):
+        self.column = column
+        self.edges = edges
+        self.counts = counts
+
+    def to_dict(self):
+        return {
+            "column": self.column,
+            "edges": self.edges.tolist(),
+            "counts": self.counts.tolist()
+        }
+
+
+class HistogramAccumulator:
+    """
+    Histograms of many columns at once. Every value is turned into a
+    global bin number (column offset + bin) so one bincount per chunk
+    counts all columns together.
+    """
+
+    def __init__(self, columns, profile, bins=HISTOGRAM_BINS):
+        self.columns = list(columns)
+        self.bins = bins
+        self.low = np.array([float(profile.column(c).min) for c in self.columns])
+        high = np.array([float(profile.column(c).max) for c in self.columns])
+
+        # Constant columns still get one visible bar
+        self.width = np.where(high > self.low, (high - self.low) / bins, 1.0)
+        self.counts = np.zeros(len(self.columns) * bins, dtype=np.int64)
+
+    def update(self, chunk):
+        values = chunk[self.columns].to_numpy(dtype=np.float64, na_value=np.nan)
+        present = ~np.isnan(values)
+        with np.errstate(invalid="ignore"):
+            index = np.floor((values - self.low) / self.width)
+        index = np.clip(np.nan_to_num(index), 0, self.bins - 1).astype(np.int64)
+        index += np.arange(len(self.columns)) * self.bins
+        self.counts += np.bincount(index[present], minlength=len(self.counts))
+
+    def finish(self):
+        counts = self.counts.reshape(len(self.columns), self.bins)
+        return {
+            col: Histogram(
+                col,
+                self.low[i] + self.width[i] * np.arange(self.bins + 1),
+                counts[i]
+            )
+            for i, col in enumerate(self.columns)
+        }
+
+
+@instrument("charts")
+def compute_histograms(chunks, profile, columns, bins=HISTOGRAM_BINS):
+    """
+    {column: Histogram} for the numeric columns, in one pass over chunks.
+    Bin ranges come from the profile, so no extra pass finds min and max.
+    """
+    columns = [
+        c for c in columns
+        if profile.column(c).min is not None
+        and np.isfinite(float(profile.column(c).min)) and np.isfinite(float(profile.column(c).max))
+    ]
+    acc = HistogramAccumulator(columns, profile, bins)
+    if columns:
+        for chunk in chunks:
+            acc.update(chunk)
+    return acc.finish()
+
+
+# ==========================
+# Charts
+# ==========================
+def _label(value):
+    return f"{value:.4g}"
+
+
+def histogram_chart(histogram, width=CHART_WIDTH, height=CHART_HEIGHT):
+    """
+    Histogram as reportlab vector shapes; drawn straight onto the PDF
+    canvas with no image in between.
+    """
+    drawing = Drawing(width, height)
+    left, bottom, top = 30, 22, 18
+    plot_w, plot_h = width - left - 6, height - bottom - top
+
+    drawing.add(String(width / 2, height - 12, str(histogram.column)[:40],
+                       fontName="Helvetica-Bold", fontSize=9, textAnchor="middle"))
+
+    counts = histogram.counts
+    peak = counts.max() if len(counts) else 0
+    bar_w = plot_w / max(len(counts), 1)
+    for i, count in enumerate(counts):
+        if count:
+            bar_h = plot_h * count / peak
+            drawing.add(Rect(left + i * bar_w, bottom, bar_w * 0.92, bar_h,
+                             fillColor=_BAR_COLOR, strokeColor=None))
+
+    drawing.add(Line(left, bottom, left + plot_w, bottom, strokeColor=_AXIS_COLOR))
+    drawing.add(Line(left, bottom, left, bottom + plot_h, strokeColor=_AXIS_COLOR))
+
+    edges = histogram.edges
+    for x, value in ((left, edges[0]), (left + plot_w / 2, edges[len(edges) // 2]), (left + plot_w, edges[-1])):
+        drawing.add(String(x, bottom - 10, _label(value), fontSize=7,
+                           fillColor=_AXIS_COLOR, textAnchor="middle"))
+    drawing.add(String(left - 3, bottom + plot_h - 3, str(int(peak)), fontSize=7,
+                       fillColor=_AXIS_COLOR, textAnchor="end"))
+    drawing.add(String(left - 3, bottom - 3, "0", fontSize=7,
+                       fillColor=_AXIS_COLOR, textAnchor="end"))
+    return drawing
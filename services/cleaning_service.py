@@ -1,11 +1,238 @@
-def clean_data(df):
-    df = df.copy()
-    df.drop_duplicates(inplace=True)
+import numpy as np
+import pandas as pd
+
+from services.metrics_service import instrument
+
+
+def _integral(value):
+    try:
+        return float(value).is_integer()
+    except (TypeError, ValueError):
+        return False
+
+
+class ChangeSet:
+    """
+    What a cleaning pass changed: columns whose values were modified, and
+    the rows that were dropped (kept is a boolean mask over the input).
+    previous holds the old values of the modified columns, aligned with
+    the output rows.
+    """
+
+    def __init__(self, columns=None, kept=None, dropped=None, deduplicated=False):
+        self.columns = set(columns or ())
+        self.kept = kept
+        self.dropped = dropped
+        self.deduplicated = deduplicated
+        self.previous = {}
+
+    @property
+    def rows_dropped(self):
+        return 0 if self.dropped is None else len(self.dropped)
+
+    def to_dict(self):
+        return {
+            "columns": sorted(self.columns, key=str),
+            "rows_dropped": self.rows_dropped,
+            "deduplicated": self.deduplicated
+        }
+
+
+# ==========================
+# Cleaning plan
+# ==========================
+class CleaningPlan:
+    """
+    Declarative list of cleaning operations. execute() compiles them into
+    one batched fillna, one duplicate/outlier row mask and one clip per
+    column, always in the order: fill, deduplicate, outliers.
+    """
+
+    FILL_STRATEGIES = ("auto", "mean", "median", "mode")
+
+    def __init__(self):
+        self.operations = []
+
+    def fill(self, column, strategy="auto"):
+        """
+        "auto" fills numeric columns with the median and others with the mode.
+        """
+        if strategy not in self.FILL_STRATEGIES:
+            raise ValueError(f"Unknown fill strategy: {strategy}")
+        self.operations.append({"op": "fill", "column": column, "strategy": strategy})
+        return self
+
+    def clip_outliers(self, column):
+        self.operations.append({"op": "clip", "column": column})
+        return self
+
+    def remove_outliers(self, column):
+        self.operations.append({"op": "remove", "column": column})
+        return self
+
+    def drop_duplicates(self):
+        self.operations.append({"op": "drop_duplicates", "column": "ALL"})
+        return self
+
+    @classmethod
+    def from_suggestions(cls, suggestions):
+        plan = cls()
+        for s in suggestions:
+            if s["issue"] == "missing_values" and s["column"] != "ALL":
+                plan.fill(s["column"])
+            elif s["issue"] == "duplicates":
+                plan.drop_duplicates()
+            elif s["issue"] == "outliers":
+                plan.clip_outliers(s["column"])
+        return plan
+
+    def __len__(self):
+        return len(self.operations)
+
+    def to_dict(self):
+        return {"operations": list(self.operations)}
 
+    # ==========================
+    # Executor
+    # ==========================
+    def _columns(self, df, op, numeric_only=False):
+        columns = []
+        for o in self.operations:
+            if o["op"] != op or o["column"] not in df.columns or o["column"] in columns:
+                continue
+            if numeric_only and not pd.api.types.is_numeric_dtype(df[o["column"]]):
+                continue
+            columns.append(o["column"])
+        return columns
+
+    def _fill_values(self, df):
+        strategies = {}
+        for o in self.operations:
+            if o["op"] == "fill" and o["column"] in df.columns:
+                strategy = o["strategy"]
+                if strategy == "auto":
+                    numeric = pd.api.types.is_numeric_dtype(df[o["column"]])
+                    strategy = "median" if numeric else "mode"
+                elif not pd.api.types.is_numeric_dtype(df[o["column"]]):
+                    strategy = "mode"
+                strategies[o["column"]] = strategy
+
+        # Only columns that actually have gaps need a statistic
+        missing = df[list(strategies)].isna().any()
+        strategies = {col: s for col, s in strategies.items() if missing[col]}
+
+        values = {}
+        for strategy in ("mean", "median"):
+            cols = [col for col, s in strategies.items() if s == strategy]
+            if cols:
+                values.update(getattr(df[cols], strategy)().to_dict())
+
+        for col, s in strategies.items():
+            if s == "mode":
+                mode = df[col].mode()
+                if not mode.empty:
+                    values[col] = mode[0]
+
+        return {col: v for col, v in values.items() if not pd.isna(v)}
+
+    def execute(self, df):
+        """
+        Return a cleaned copy of df; df itself is never modified.
+        """
+        return self.run(df)[0]
+
+    def run(self, df):
+        """
+        Like execute(), but also return the ChangeSet describing what changed.
+        """
+        changes = ChangeSet()
+        original = df
+
+        # Fills: one statistic call per strategy, one fillna
+        values = self._fill_values(df)
+        if values:
+            # Nullable integer columns cannot hold a fractional median/mean
+            casts = {
+                col: "float64" for col, value in values.items()
+                if pd.api.types.is_integer_dtype(df[col].dtype) and not _integral(value)
+            }
+            if casts:
+                df = df.astype(casts)
+            df = df.fillna(values)
+            changes.columns.update(values)
+
+        # Rows: duplicates first, then outlier bounds over the kept rows
+        keep = None
+        if any(o["op"] == "drop_duplicates" for o in self.operations):
+            keep = ~df.duplicated()
+            changes.deduplicated = True
+
+        clip_cols = self._columns(df, "clip", numeric_only=True)
+        remove_cols = self._columns(df, "remove", numeric_only=True)
+        outlier_cols = list(dict.fromkeys(clip_cols + remove_cols))
+
+        bounds = {}
+        if outlier_cols:
+            kept = df[outlier_cols] if keep is None else df.loc[keep, outlier_cols]
+            quartiles = kept.quantile([0.25, 0.75])
+            iqr = quartiles.loc[0.75] - quartiles.loc[0.25]
+            lower = quartiles.loc[0.25] - 1.5 * iqr
+            upper = quartiles.loc[0.75] + 1.5 * iqr
+            bounds = {col: (lower[col], upper[col]) for col in outlier_cols}
+
+        if remove_cols:
+            num = df[remove_cols]
+            low = pd.Series({col: bounds[col][0] for col in remove_cols})
+            high = pd.Series({col: bounds[col][1] for col in remove_cols})
+            within = (num.ge(low, axis=1) & num.le(high, axis=1)).all(axis=1)
+            keep = within if keep is None else keep & within
+
+        if keep is not None and not keep.all():
+            changes.kept = keep.to_numpy()
+            changes.dropped = df[~keep]
+            df = df[keep].reset_index(drop=True)
+
+        # Clips: one per column, assigned together
+        clipped = {}
+        for col in clip_cols:
+            low, high = bounds[col]
+            values = df[col].to_numpy(dtype=float, na_value=np.nan)
+            if ((values < low) | (values > high)).any():
+                series = df[col]
+                if pd.api.types.is_integer_dtype(series.dtype) and not (_integral(low) and _integral(high)):
+                    series = series.astype("float64")
+                clipped[col] = series.clip(low, high)
+        if clipped:
+            df = df.assign(**clipped)
+            changes.columns.update(clipped)
+
+        for col in changes.columns:
+            old = original[col]
+            if changes.kept is not None:
+                old = old[changes.kept].reset_index(drop=True)
+            changes.previous[col] = old
+
+        return df, changes
+
+
+# ==========================
+# Entry points
+# ==========================
+def clean_data(df):
+    """
+    Drop duplicate rows, then fill every column. Fills run after the
+    dedup so rows that only match once filled are kept.
+    """
+    df = CleaningPlan().drop_duplicates().execute(df)
+    plan = CleaningPlan()
     for col in df.columns:
-        if df[col].dtype in ["int64", "float64"]:
-            df[col].fillna(df[col].median(), inplace=True)
-        else:
-            df[col].fillna(df[col].mode()[0], inplace=True)
+        plan.fill(col)
+    return plan.execute(df)
+
 
-    return df
+@instrument("apply_suggestions")
+def apply_suggestions(df, suggestions):
+    """
+    Apply every cleaning suggestion to df as one compiled plan.
+    """
+    return CleaningPlan.from_suggestions(suggestions).execute(df)
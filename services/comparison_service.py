@@ -1,6 +1,523 @@
-def compare_datasets(df_old, df_new):
-    return {
-        "rows_before": len(df_old),
-        "rows_after": len(df_new),
-        "insights": ["Comparison completed"]
+import math
+
+import numpy as np
+import pandas as pd
+
+from services.cache_service import load_dataframe
+from services.duplicate_service import column_hashes
+from services.metrics_service import instrument
+from services.streaming_service import CHUNK_ROWS, QuantileSketch, is_large
+
+# Example changed cells kept per column for the audit view
+DIFF_EXAMPLES = 5
+
+# Population stability index bands for "moderate" and "major" shifts
+PSI_MODERATE = 0.1
+PSI_MAJOR = 0.25
+
+# Rows looked ahead on each side when pairing edits inside an uneven gap
+PAIR_WINDOW = 16
+
+_MIX = np.uint64(0x9E3779B97F4A7C15)
+
+
+# ==========================
+# Sources
+# ==========================
+def iter_chunks(source, chunksize=CHUNK_ROWS):
+    """
+    DataFrame chunks of a dataset path (streamed from disk when the file
+    is too large to load) or of an in-memory frame.
+    """
+    if isinstance(source, str) and is_large(source):
+        yield from pd.read_csv(source, chunksize=chunksize)
+        return
+
+    df = source if isinstance(source, pd.DataFrame) else load_dataframe(source)
+    for start in range(0, max(len(df), 1), chunksize):
+        yield df.iloc[start:start + chunksize]
+
+
+def source_columns(source):
+    if isinstance(source, str) and is_large(source):
+        return pd.read_csv(source, nrows=0).columns.tolist()
+    df = source if isinstance(source, pd.DataFrame) else load_dataframe(source)
+    return df.columns.tolist()
+
+
+def _cell_hashes(chunk, columns):
+    """
+    (rows, columns) array of per-cell hashes; numbers hash alike whether
+    they were parsed as int or float.
+    """
+    return np.column_stack([column_hashes(chunk[col], 0) for col in columns]) \
+        if columns else np.zeros((len(chunk), 0), dtype=np.uint64)
+
+
+# ==========================
+# Pass 1: hashes and distributions
+# ==========================
+class SideSummary:
+    """
+    What one pass over a dataset keeps: a 64-bit hash per row over the
+    shared columns, the key column's hashes, and per-column moments,
+    missing counts and quantile sketches. Memory is a few bytes per row.
+    """
+
+    def __init__(self, columns, common, key=None):
+        self.columns = columns
+        self.common = common
+        self.key = key
+        self.rows = 0
+        self.dtypes = {}
+        self.numeric = None
+        self.missing = dict.fromkeys(columns, 0)
+        self._hashes = []
+        self._keys = []
+
+        self.count = {}
+        self.mean = {}
+        self.m2 = {}
+        self.sketches = {}
+
+    def update(self, chunk):
+        if self.numeric is None:
+            self.dtypes = {col: str(chunk[col].dtype) for col in self.columns}
+            self.numeric = [
+                col for col in self.columns
+                if pd.api.types.is_numeric_dtype(chunk[col].dtype)
+                and not pd.api.types.is_bool_dtype(chunk[col].dtype)
+            ]
+            for col in self.numeric:
+                self.count[col], self.mean[col], self.m2[col] = 0, 0.0, 0.0
+                self.sketches[col] = QuantileSketch()
+
+        hashes = np.zeros(len(chunk), dtype=np.uint64)
+        with np.errstate(over="ignore"):
+            for position, col in enumerate(self.common):
+                hashes += column_hashes(chunk[col], position)
+        self._hashes.append(hashes)
+        if self.key is not None:
+            self._keys.append(column_hashes(chunk[self.key], 0))
+
+        for col, n in chunk[self.columns].isna().sum().items():
+            self.missing[col] += int(n)
+
+        for col in self.numeric:
+            values = pd.to_numeric(chunk[col], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+            values = values[~np.isnan(values)]
+            if not len(values):
+                continue
+            # Chan et al. parallel merge of (count, mean, M2)
+            n, mean = len(values), values.mean()
+            m2 = ((values - mean) ** 2).sum()
+            total = self.count[col] + n
+            delta = mean - self.mean[col]
+            self.mean[col] += delta * n / total
+            self.m2[col] += m2 + delta ** 2 * self.count[col] * n / total
+            self.count[col] = total
+            self.sketches[col].update(values)
+
+        self.rows += len(chunk)
+
+    @property
+    def hashes(self):
+        return np.concatenate(self._hashes) if self._hashes else np.zeros(0, dtype=np.uint64)
+
+    @property
+    def keys(self):
+        return np.concatenate(self._keys) if self._keys else np.zeros(0, dtype=np.uint64)
+
+    def std(self, col):
+        n = self.count[col]
+        return math.sqrt(self.m2[col] / (n - 1)) if n > 1 else 0.0
+
+
+def summarize(source, columns, common, key=None, chunksize=CHUNK_ROWS):
+    summary = SideSummary(columns, common, key)
+    for chunk in iter_chunks(source, chunksize):
+        summary.update(chunk)
+    return summary
+
+
+# ==========================
+# Alignment
+# ==========================
+def _match(old, new):
+    """
+    (old positions, new positions) of the values of new found in old;
+    values must be unique on each side.
+    """
+    order = np.argsort(old, kind="stable")
+    ranked = old[order]
+    pos = np.minimum(np.searchsorted(ranked, new), max(len(old) - 1, 0))
+    found = np.flatnonzero(ranked[pos] == new) if len(old) else np.zeros(0, dtype=np.int64)
+    return order[pos[found]], found
+
+
+def _occurrences(hashes):
+    """
+    hashes made unique by mixing in each value's occurrence number, so the
+    k-th copy of a row on one side matches the k-th copy on the other.
+    """
+    order = np.argsort(hashes, kind="stable")
+    ranked = hashes[order]
+    starts = np.r_[True, ranked[1:] != ranked[:-1]] if len(ranked) else np.zeros(0, dtype=bool)
+    first = np.flatnonzero(starts)[np.cumsum(starts) - 1]
+    occurrence = np.empty(len(hashes), dtype=np.uint64)
+    occurrence[order] = (np.arange(len(hashes)) - first).astype(np.uint64)
+    with np.errstate(over="ignore"):
+        return hashes ^ (occurrence * _MIX)
+
+
+def _unmatched(n, matched):
+    mask = np.ones(n, dtype=bool)
+    mask[matched] = False
+    return np.flatnonzero(mask)
+
+
+def _pair_gaps(anchor_old, anchor_new, old_rest, new_rest):
+    """
+    Pair leftover rows that sit between the same two identical rows on
+    both sides. Where a gap holds as many rows before as after, the rows
+    are edits of each other, in order; other gaps are left for _pair_similar.
+    """
+    gap_old = np.searchsorted(anchor_old, old_rest)
+    gap_new = np.searchsorted(anchor_new, new_rest)
+    gaps = max(len(anchor_old) + 1, 1)
+    size_old = np.bincount(gap_old, minlength=gaps)
+    size_new = np.bincount(gap_new, minlength=gaps)
+    even = size_old == size_new
+
+    keep_old = even[gap_old]
+    keep_new = even[gap_new]
+    # Both sides list an even gap's rows in the same order
+    return (
+        old_rest[keep_old], new_rest[keep_new],
+        old_rest[~keep_old], gap_old[~keep_old],
+        new_rest[~keep_new], gap_new[~keep_new]
+    )
+
+
+def _pair_similar(old_gaps, old_cells, new_gaps, new_cells, window=PAIR_WINDOW):
+    """
+    Within uneven gaps (rows were dropped as well as edited), walk both
+    sides in order. Rows directly in line pair up while most of their
+    cells agree; otherwise a row is paired with the most similar of the
+    next `window` rows on the other side, and rows left over count as
+    removed or added. Linear in the gap size. Gap numbers are sorted on
+    both sides. Returns (old index, new index) pairs.
+    """
+    pairs = []
+    gaps = np.intersect1d(old_gaps, new_gaps)
+    bounds = zip(
+        np.searchsorted(old_gaps, gaps).tolist(), np.searchsorted(old_gaps, gaps + 1).tolist(),
+        np.searchsorted(new_gaps, gaps).tolist(), np.searchsorted(new_gaps, gaps + 1).tolist()
+    )
+    for i, old_end, j, new_end in bounds:
+        while i < old_end and j < new_end:
+            # Runs of rows in line are compared a block at a time
+            run = min(old_end - i, new_end - j, window * 4)
+            similar = (old_cells[i:i + run] == new_cells[j:j + run]).mean(axis=1) > 0.5
+            length = run if similar.all() else int(similar.argmin())
+            if length:
+                pairs += zip(range(i, i + length), range(j, j + length))
+                i, j = i + length, j + length
+                continue
+
+            # New row j against the next old rows, and old row i against the next new rows
+            ahead_old = (old_cells[i:min(i + window, old_end)] == new_cells[j]).mean(axis=1)
+            ahead_new = (new_cells[j:min(j + window, new_end)] == old_cells[i]).mean(axis=1)
+            a, b = int(ahead_old.argmax()), int(ahead_new.argmax())
+
+            if max(ahead_old[a], ahead_new[b]) <= 0.5:
+                # No partner nearby: drop a row from the side with more left
+                if old_end - i >= new_end - j:
+                    i += 1
+                else:
+                    j += 1
+            elif ahead_old[a] >= ahead_new[b]:
+                pairs.append((i + a, j))
+                i, j = i + a + 1, j + 1
+            else:
+                pairs.append((i, j + b))
+                i, j = i + 1, j + b + 1
+    return pairs
+
+
+# ==========================
+# Result
+# ==========================
+class DatasetDiff:
+    """
+    Row- and cell-level differences between two versions of a dataset.
+    """
+
+    def __init__(self, before, after, columns_before, columns_after, aligned_by):
+        self.before = before
+        self.after = after
+        self.columns_before = columns_before
+        self.columns_after = columns_after
+        self.aligned_by = aligned_by
+        self.rows_before = 0
+        self.rows_after = 0
+        self.unchanged_rows = 0
+        self.changed_rows = 0
+        self.added_rows = 0
+        self.removed_rows = 0
+        self.reordered = False
+        self.changed_cells = {}
+        self.examples = {}
+        self.dtype_changes = {}
+        self.shifts = {}
+        self.notes = []
+
+    @property
+    def new_columns(self):
+        return [c for c in self.columns_after if c not in self.columns_before]
+
+    @property
+    def removed_columns(self):
+        return [c for c in self.columns_before if c not in self.columns_after]
+
+    def insights(self):
+        lines = list(self.notes)
+        lines.append(
+            f"{self.unchanged_rows} rows unchanged, {self.changed_rows} edited, "
+            f"{self.removed_rows} removed, {self.added_rows} added."
+        )
+        for col, count in sorted(self.changed_cells.items(), key=lambda kv: -kv[1]):
+            if count:
+                lines.append(f"{count} cells changed in '{col}'.")
+        for col, change in self.dtype_changes.items():
+            lines.append(f"'{col}' changed type from {change['before']} to {change['after']}.")
+        for col, shift in self.shifts.items():
+            if shift.get("shift") in ("moderate", "major"):
+                lines.append(
+                    f"'{col}' distribution shifted ({shift['shift']}, PSI {shift['psi']}): "
+                    f"mean {shift['mean_before']} -> {shift['mean_after']}."
+                )
+        for col in self.new_columns:
+            lines.append(f"Column '{col}' was added.")
+        for col in self.removed_columns:
+            lines.append(f"Column '{col}' was removed.")
+        return lines
+
+    def to_dict(self):
+        return {
+            "before": self.before,
+            "after": self.after,
+            "aligned_by": self.aligned_by,
+            "rows_before": self.rows_before,
+            "rows_after": self.rows_after,
+            "columns_before": len(self.columns_before),
+            "columns_after": len(self.columns_after),
+            "new_columns": self.new_columns,
+            "removed_columns": self.removed_columns,
+            "unchanged_rows": self.unchanged_rows,
+            "changed_rows": self.changed_rows,
+            "added_rows": self.added_rows,
+            "removed_rows": self.removed_rows,
+            "reordered": self.reordered,
+            "changed_cells": self.changed_cells,
+            "examples": self.examples,
+            "dtype_changes": self.dtype_changes,
+            "shifts": self.shifts,
+            "insights": self.insights()
+        }
+
+
+def _psi(old, new):
+    """
+    Population stability index of new against old's deciles, read from
+    the two quantile sketches.
+    """
+    edges = np.unique([old.quantile(q) for q in np.linspace(0.1, 0.9, 9)])
+    if not len(edges) or not old.count or not new.count:
+        return 0.0
+    below_old = np.array([old.count_below(e) for e in edges] + [old.count]) / old.count
+    below_new = np.array([new.count_below(e) for e in edges] + [new.count]) / new.count
+    p = np.clip(np.diff(below_old, prepend=0.0), 1e-4, None)
+    q = np.clip(np.diff(below_new, prepend=0.0), 1e-4, None)
+    return float(((q - p) * np.log(q / p)).sum())
+
+
+def _shifts(old, new, columns):
+    shifts = {}
+    for col in columns:
+        shift = {
+            "missing_before": old.missing[col],
+            "missing_after": new.missing[col]
+        }
+        if col in old.sketches and col in new.sketches and old.count[col] and new.count[col]:
+            psi = _psi(old.sketches[col], new.sketches[col])
+            shift.update(
+                mean_before=round(float(old.mean[col]), 4),
+                mean_after=round(float(new.mean[col]), 4),
+                std_before=round(old.std(col), 4),
+                std_after=round(new.std(col), 4),
+                median_before=round(old.sketches[col].quantile(0.5), 4),
+                median_after=round(new.sketches[col].quantile(0.5), 4),
+                psi=round(psi, 4),
+                shift="major" if psi >= PSI_MAJOR else "moderate" if psi >= PSI_MODERATE else "none"
+            )
+        shifts[col] = shift
+    return shifts
+
+
+# ==========================
+# Diff
+# ==========================
+def _plain(value):
+    if pd.isna(value):
+        return None
+    return value.item() if isinstance(value, np.generic) else value
+
+
+@instrument("compare")
+def diff_datasets(before, after, key=None, labels=("before", "after"), chunksize=CHUNK_ROWS):
+    """
+    DatasetDiff between two datasets (paths or DataFrames). Rows are
+    matched on key when it is a column of both with unique values, and
+    otherwise by content: identical rows pair up in order and the rows
+    left between two identical rows are taken as edits of each other.
+
+    Two passes over each side; beyond per-row hashes, only cell hashes of
+    rows that differ are held in memory.
+    """
+    columns_before = source_columns(before)
+    columns_after = source_columns(after)
+    common = [c for c in columns_before if c in columns_after]
+    if key not in common:
+        key = None
+
+    old = summarize(before, columns_before, common, key, chunksize)
+    new = summarize(after, columns_after, common, key, chunksize)
+
+    result = DatasetDiff(labels[0], labels[1], columns_before, columns_after,
+                         f"key column '{key}'" if key else "row content")
+    result.rows_before, result.rows_after = old.rows, new.rows
+    result.dtype_changes = {
+        col: {"before": old.dtypes[col], "after": new.dtypes[col]}
+        for col in common if old.dtypes.get(col) != new.dtypes.get(col)
     }
+    result.shifts = _shifts(old, new, common)
+
+    # ---------- Pair rows ----------
+    old_hashes, new_hashes = old.hashes, new.hashes
+    uneven = None
+
+    if key is not None and len(np.unique(old.keys)) == old.rows and len(np.unique(new.keys)) == new.rows:
+        pair_old, pair_new = _match(old.keys, new.keys)
+        same = old_hashes[pair_old] == new_hashes[pair_new]
+        result.unchanged_rows = int(same.sum())
+        edit_old, edit_new = pair_old[~same], pair_new[~same]
+        removed = _unmatched(old.rows, pair_old)
+        added = _unmatched(new.rows, pair_new)
+    else:
+        if key is not None:
+            result.notes.append(f"Key column '{key}' has repeated values; rows were matched by content.")
+            result.aligned_by = "row content"
+
+        anchor_old, anchor_new = _match(_occurrences(old_hashes), _occurrences(new_hashes))
+        order = np.argsort(anchor_old)
+        anchor_old, anchor_new = anchor_old[order], anchor_new[order]
+        result.unchanged_rows = len(anchor_old)
+        old_rest = _unmatched(old.rows, anchor_old)
+        new_rest = _unmatched(new.rows, anchor_new)
+
+        if np.all(np.diff(anchor_new) > 0):
+            edit_old, edit_new, *uneven = _pair_gaps(anchor_old, anchor_new, old_rest, new_rest)
+            removed, added = uneven[0], uneven[2]
+        else:
+            # Without a shared order there is nothing to pair edits by
+            result.reordered = True
+            result.notes.append("Rows were reordered; edited rows count as removed and added. Pick a key column to pair them.")
+            edit_old = edit_new = np.zeros(0, dtype=np.int64)
+            removed, added = old_rest, new_rest
+
+    # ---------- Pass 2: compare the cells of paired rows ----------
+    # One more pass per side gathers the cell hashes of just the rows that
+    # differ, plus a few of their values for the examples
+    gather_new = np.concatenate([edit_new, uneven[2]]) if uneven else edit_new
+    gather_old = uneven[0] if uneven else np.zeros(0, dtype=np.int64)
+
+    new_cells, new_values = _gather(after, gather_new, common, chunksize, values_for=edit_new[:DIFF_EXAMPLES * 20])
+    old_cells, old_values = _gather(before, np.concatenate([edit_old, gather_old]), common, chunksize,
+                                    values_for=edit_old[:DIFF_EXAMPLES * 20])
+
+    changed = np.zeros(len(common), dtype=np.int64)
+    if len(edit_old):
+        differs = old_cells[:len(edit_old)] != new_cells[:len(edit_new)]
+        changed += differs.sum(axis=0)
+        _examples(result, common, differs, edit_old, edit_new, old_values, new_values)
+
+    if uneven and len(uneven[0]) and len(uneven[2]):
+        pairs = _pair_similar(
+            uneven[1], old_cells[len(edit_old):], uneven[3], new_cells[len(edit_new):]
+        )
+        if pairs:
+            i, j = np.array(pairs).T
+            differs = old_cells[len(edit_old) + i] != new_cells[len(edit_new) + j]
+            changed += differs.sum(axis=0)
+            removed = np.delete(removed, i)
+            added = np.delete(added, j)
+            edit_old = np.concatenate([edit_old, uneven[0][i]])
+
+    result.changed_rows = len(edit_old)
+    result.removed_rows = len(removed)
+    result.added_rows = len(added)
+    result.changed_cells = {col: int(n) for col, n in zip(common, changed)}
+    return result
+
+
+def _gather(source, rows, columns, chunksize, values_for=()):
+    """
+    Cell hashes of the given rows, in the order given, from one streaming
+    pass; plus the raw values of the rows in values_for, for examples.
+    """
+    cells = np.zeros((len(rows), len(columns)), dtype=np.uint64)
+    values = {}
+    if not len(rows):
+        return cells, values
+
+    order = np.argsort(rows, kind="stable")
+    ranked = rows[order]
+    wanted = np.unique(values_for)
+    start = 0
+    for chunk in iter_chunks(source, chunksize):
+        stop = start + len(chunk)
+        lo, hi = np.searchsorted(ranked, [start, stop])
+        if hi > lo:
+            cells[order[lo:hi]] = _cell_hashes(chunk.iloc[ranked[lo:hi] - start], columns)
+        for position in wanted[(wanted >= start) & (wanted < stop)]:
+            values[int(position)] = chunk.iloc[position - start]
+        start = stop
+    return cells, values
+
+
+def _examples(result, columns, differs, edit_old, edit_new, old_values, new_values):
+    for c, col in enumerate(columns):
+        rows = np.flatnonzero(differs[:, c])
+        samples = []
+        for r in rows:
+            i, j = int(edit_old[r]), int(edit_new[r])
+            if i not in old_values or j not in new_values:
+                break
+            samples.append({
+                "row_before": i + 1,
+                "row_after": j + 1,
+                "before": _plain(old_values[i][col]),
+                "after": _plain(new_values[j][col])
+            })
+            if len(samples) == DIFF_EXAMPLES:
+                break
+        if samples:
+            result.examples[col] = samples
+
+
+def compare_datasets(df_old, df_new, key=None):
+    """
+    Differences between two datasets (paths or DataFrames) as a dict.
+    """
+    return diff_datasets(df_old, df_new, key).to_dict()
@@ -0,0 +1,175 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from services.metrics_service import instrument
+
+# Strongest pairs embedded in the report; the full matrix is served on demand
+CORRELATION_TOP_K = int(os.environ.get("MDD_CORRELATION_TOP_K", 50))
+CORRELATION_THRESHOLD = float(os.environ.get("MDD_CORRELATION_THRESHOLD", 0.3))
+
+# Up to this many numeric columns the report still gets the dense heatmap
+HEATMAP_MAX_COLUMNS = 20
+
+# Rows converted to float32 and multiplied at a time
+_BLOCK_ROWS = 65536
+
+
+class CorrelationMatrix:
+    """
+    Pearson correlations between numeric columns (pairwise-complete, like
+    DataFrame.corr), held as a float32 array.
+    """
+
+    def __init__(self, columns, values):
+        self.columns = list(columns)
+        self.values = np.asarray(values, dtype=np.float32)
+        self._positions = {col: i for i, col in enumerate(self.columns)}
+
+    @classmethod
+    def from_frame(cls, frame):
+        return cls(frame.columns, frame.to_numpy(dtype=np.float32, na_value=np.nan))
+
+    def to_frame(self):
+        return pd.DataFrame(self.values, index=self.columns, columns=self.columns)
+
+    def __len__(self):
+        return len(self.columns)
+
+    def value(self, a, b):
+        return float(self.values[self._positions[a], self._positions[b]])
+
+    def column(self, name):
+        """
+        Correlations of name with every other column, strongest first.
+        """
+        row = pd.Series(self.values[self._positions[name]], index=self.columns)
+        row = row.drop(name).dropna()
+        return row.reindex(row.abs().sort_values(ascending=False).index)
+
+    def count(self, threshold=0.0):
+        """
+        Number of distinct column pairs with |r| >= threshold.
+        """
+        r = self.values[np.triu_indices(len(self.columns), k=1)]
+        return int(np.count_nonzero(np.abs(r) >= threshold))
+
+    def pairs(self, k=None, threshold=0.0):
+        """
+        Distinct column pairs with |r| >= threshold, strongest first,
+        at most k of them.
+        """
+        upper = np.triu_indices(len(self.columns), k=1)
+        r = self.values[upper]
+        strength = np.abs(r)
+        keep = np.flatnonzero(~np.isnan(r) & (strength >= threshold))
+
+        if k is not None and len(keep) > k:
+            keep = keep[np.argpartition(-strength[keep], k - 1)[:k]]
+        keep = keep[np.argsort(-strength[keep], kind="stable")]
+
+        return [
+            {
+                "x": self.columns[upper[0][i]],
+                "y": self.columns[upper[1][i]],
+                "r": round(float(r[i]), 2)
+            }
+            for i in keep
+        ]
+
+    def summary(self, k=CORRELATION_TOP_K, threshold=CORRELATION_THRESHOLD):
+        """
+        What the report embeds: the strongest pairs, plus the dense matrix
+        only when the dataset is narrow enough to draw it.
+        """
+        return {
+            "columns": self.columns,
+            "pairs": self.pairs(k, threshold),
+            "pair_count": len(self.columns) * (len(self.columns) - 1) // 2,
+            "top_k": k,
+            "threshold": threshold,
+            "matrix": self.to_dict() if len(self.columns) <= HEATMAP_MAX_COLUMNS else None
+        }
+
+    def to_dict(self):
+        """
+        Full matrix as {column: {column: r}}, rounded, NaN as 0.
+        """
+        return self.to_frame().astype(np.float64).round(2).fillna(0).to_dict()
+
+
+# ==========================
+# Computation
+# ==========================
+def _accumulate(blocks, k):
+    """
+    Pairwise-complete co-moment sums over standardized float32 blocks.
+    Each product is one BLAS call; sums are kept in float64.
+    """
+    prod = np.zeros((k, k))
+    sums = np.zeros((k, k))
+    squares = np.zeros((k, k))
+    counts = np.zeros((k, k))
+
+    for block in blocks:
+        present = ~np.isnan(block)
+        if present.all():
+            # No gaps: every pair sees every row
+            prod += block.T @ block
+            sums += block.sum(axis=0, dtype=np.float64)[:, None]
+            squares += (block * block).sum(axis=0, dtype=np.float64)[:, None]
+            counts += len(block)
+            continue
+
+        mask = present.astype(np.float32)
+        block = np.where(present, block, np.float32(0))
+        prod += block.T @ block
+        sums += block.T @ mask
+        squares += (block * block).T @ mask
+        counts += mask.T @ mask
+
+    return prod, sums, squares, counts
+
+
+@instrument("correlation")
+def correlation_matrix(df, columns=None):
+    """
+    CorrelationMatrix of df's numeric columns (or the given ones). Values
+    are standardized per column and multiplied in float32 blocks, so wide
+    frames cost a few matrix products rather than k^2 pairwise passes.
+    """
+    if columns is None:
+        columns = df.select_dtypes(include="number").columns
+    columns = list(columns)
+    k = len(columns)
+    if not k or df.empty:
+        return CorrelationMatrix(columns, np.full((k, k), np.nan))
+
+    numeric = df[columns]
+    center = numeric.mean().to_numpy(dtype=np.float64, na_value=np.nan)
+    scale = numeric.std().to_numpy(dtype=np.float64, na_value=np.nan)
+    center = np.nan_to_num(center)
+    scale = np.where(np.isfinite(scale) & (scale > 0), scale, 1.0)
+
+    def blocks():
+        for start in range(0, len(numeric), _BLOCK_ROWS):
+            values = numeric.iloc[start:start + _BLOCK_ROWS].to_numpy(
+                dtype=np.float64, na_value=np.nan
+            )
+            yield ((values - center) / scale).astype(np.float32)
+
+    prod, sums, squares, counts = _accumulate(blocks(), k)
+
+    # sums[i, j] is the sum of column i over rows where j is also present
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cov = prod - sums * sums.T / counts
+        var_x = squares - sums ** 2 / counts
+        var_y = var_x.T
+        corr = cov / np.sqrt(var_x * var_y)
+
+    # Standardized columns have unit variance; anything near zero is constant
+    valid = (counts > 1) & (var_x > 1e-6 * counts) & (var_y > 1e-6 * counts)
+    corr = np.where(valid, np.clip(corr, -1.0, 1.0), np.nan)
+    np.fill_diagonal(corr, np.where(np.diag(valid), 1.0, np.nan))
+    return CorrelationMatrix(columns, corr)
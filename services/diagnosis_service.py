@@ -1,11 +1,19 @@
-def generate_diagnosis_report(df):
+from services.metrics_service import instrument
+from services.profile_service import build_profile
+
+
+@instrument("diagnosis")
+def generate_diagnosis_report(df, profile=None):
+    profile = profile or build_profile(df)
     report = {}
 
-    report["rows"] = df.shape[0]
-    report["columns"] = df.shape[1]
-    report["missing_percent"] = (df.isnull().mean() * 100).round(2).to_dict()
-    report["duplicates"] = int(df.duplicated().sum())
-    report["dtypes"] = df.dtypes.astype(str).to_dict()
+    report["rows"] = profile.rows
+    report["columns"] = len(profile.columns)
+    report["missing_percent"] = {
+        col: round(c.missing_percent, 2) for col, c in profile.columns.items()
+    }
+    report["duplicates"] = profile.duplicate_count
+    report["dtypes"] = {col: c.dtype for col, c in profile.columns.items()}
 
     severity = {}
     for col, pct in report["missing_percent"].items():
@@ -0,0 +1,154 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+# "0" reads CSVs with the pandas default dtypes
+OPTIMIZE_DTYPES = os.environ.get("MDD_OPTIMIZE_DTYPES", "1") != "0"
+
+# Text columns with at most this share of distinct values become category
+CATEGORY_MAX_UNIQUE_RATIO = 0.5
+
+SCHEMA_EXT = ".schema.json"
+
+# Bumped when inference changes, so stored schemas are inferred again
+SCHEMA_VERSION = 2
+
+_NULLABLE_INTS = ["Int8", "Int16", "Int32", "Int64"]
+
+
+def schema_path(csv_path):
+    """
+    Inferred dtypes, stored next to the CSV they describe.
+    """
+    return csv_path + SCHEMA_EXT
+
+
+def _stamp(csv_path):
+    st = os.stat(csv_path)
+    return {"mtime_ns": st.st_mtime_ns, "size": st.st_size}
+
+
+# ==========================
+# Inference
+# ==========================
+def _integral(values):
+    return bool(np.all(np.mod(values, 1) == 0))
+
+
+def _smallest_nullable_int(lo, hi):
+    for name in _NULLABLE_INTS:
+        info = np.iinfo(name.lower())
+        if info.min <= lo and hi <= info.max:
+            return name
+    return None
+
+
+def infer_column_dtype(series):
+    """
+    Most compact dtype that holds series without losing information.
+    """
+    dtype = series.dtype
+
+    if pd.api.types.is_bool_dtype(dtype):
+        return str(dtype)
+
+    if isinstance(dtype, np.dtype) and dtype.kind in "iu":
+        return str(pd.to_numeric(series, downcast="integer").dtype)
+
+    if isinstance(dtype, np.dtype) and dtype.kind == "f":
+        values = series.to_numpy()
+        values = values[~np.isnan(values)]
+        if not len(values):
+            return str(dtype)
+
+        # Integers that only became floats because of missing values
+        if len(values) < len(series) and _integral(values):
+            nullable = _smallest_nullable_int(values.min(), values.max())
+            if nullable:
+                return nullable
+
+        # Floats stay float64: means and sums over float32 drift from the
+        # values the profile and scores report
+        return str(dtype)
+
+    if pd.api.types.is_object_dtype(dtype) or pd.api.types.is_string_dtype(dtype):
+        non_null = series.dropna()
+        if len(non_null) and non_null.nunique() <= CATEGORY_MAX_UNIQUE_RATIO * len(non_null):
+            return "category"
+        return str(dtype)
+
+    return str(dtype)
+
+
+def infer_schema(df):
+    return {col: infer_column_dtype(df[col]) for col in df.columns}
+
+
+def apply_schema(df, schema):
+    changes = {
+        col: dtype for col, dtype in schema.items()
+        if col in df.columns and str(df[col].dtype) != dtype
+    }
+    return df.astype(changes) if changes else df
+
+
+def optimize_dtypes(df):
+    """
+    df with integers downcast, integer columns that had missing values as
+    nullable integers and low-cardinality text as category.
+    """
+    return apply_schema(df, infer_schema(df))
+
+
+# ==========================
+# Persistence
+# ==========================
+def save_schema(csv_path, schema):
+    with open(schema_path(csv_path), "w") as f:
+        json.dump({"version": SCHEMA_VERSION, "source": _stamp(csv_path), "dtypes": schema}, f)
+
+
+def load_schema(csv_path):
+    """
+    Stored dtypes for csv_path, or None when missing or out of date.
+    """
+    try:
+        with open(schema_path(csv_path)) as f:
+            saved = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if saved.get("version") != SCHEMA_VERSION or saved.get("source") != _stamp(csv_path):
+        return None
+    return saved["dtypes"]
+
+
+def remove_schema(csv_path):
+    try:
+        os.remove(schema_path(csv_path))
+    except FileNotFoundError:
+        pass
+
+
+def read_csv_optimized(csv_path):
+    """
+    Read a CSV with compact dtypes. The dtypes are inferred on the first
+    read and stored next to the file, so later reads parse straight into
+    them.
+    """
+    if not OPTIMIZE_DTYPES:
+        return pd.read_csv(csv_path)
+
+    schema = load_schema(csv_path)
+    if schema is not None:
+        try:
+            return pd.read_csv(csv_path, dtype=schema)
+        except (ValueError, TypeError):
+            # Header or values no longer match; infer again
+            pass
+
+    df = optimize_dtypes(pd.read_csv(csv_path))
+    save_schema(csv_path, {col: str(dtype) for col, dtype in df.dtypes.items()})
+    return df
@@ -0,0 +1,229 @@
+import math
+import os
+
+import numpy as np
+import pandas as pd
+
+# Above this many bytes of exact hash storage, streaming switches to a
+# Bloom filter with a bounded footprint
+EXACT_DUPLICATE_BUDGET = int(
+    os.environ.get("MDD_EXACT_DUPLICATE_BUDGET", 1024 * 1024 * 1024)
+)
+
+
+_MIX = np.uint64(0x9E3779B97F4A7C15)
+
+
+def column_hashes(series, position):
+    """
+    Contribution of one column (at a given position) to row_hashes.
+    Numbers are hashed as float64 so the same value hashes alike whether
+    a chunk parsed its column as int or float.
+    """
+    if pd.api.types.is_numeric_dtype(series.dtype) and not pd.api.types.is_bool_dtype(series.dtype):
+        series = series.astype("float64")
+    hashes = pd.util.hash_pandas_object(series, index=False).to_numpy()
+
+    # Position-dependent bijection, so swapping two columns' values
+    # changes the row hash
+    with np.errstate(over="ignore"):
+        return (hashes + _MIX * np.uint64(position + 1)) * (_MIX | np.uint64(position * 2 + 1))
+
+
+def row_hashes(df):
+    """
+    64-bit hash per row: the wrapping sum of the column hashes, so a row
+    hash can be updated when single columns change.
+    """
+    hashes = np.zeros(len(df), dtype=np.uint64)
+    with np.errstate(over="ignore"):
+        for position, col in enumerate(df.columns):
+            hashes += column_hashes(df[col], position)
+    return hashes
+
+
+def update_row_hashes(hashes, df, previous):
+    """
+    row_hashes(df) from the hashes of the frame df was derived from.
+    previous maps each changed column to its old values, aligned with df.
+    """
+    hashes = hashes.copy()
+    with np.errstate(over="ignore"):
+        for col, old in previous.items():
+            position = df.columns.get_loc(col)
+            hashes -= column_hashes(old, position)
+            hashes += column_hashes(df[col], position)
+    return hashes
+
+
+def duplicate_mask(df, hashes=None):
+    """
+    Same result as df.duplicated(): rows are first matched by hash, and only
+    rows whose hash repeats are compared value by value.
+    """
+    if hashes is None:
+        hashes = row_hashes(df)
+    candidates = np.flatnonzero(pd.Series(hashes).duplicated(keep=False).to_numpy())
+
+    mask = np.zeros(len(df), dtype=bool)
+    if len(candidates):
+        # Group candidates by hash (stable, so each group starts with its
+        # earliest row) and compare every row with its group's first row
+        order = candidates[np.argsort(hashes[candidates], kind="stable")]
+        sorted_hashes = hashes[order]
+        starts = np.r_[True, sorted_hashes[1:] != sorted_hashes[:-1]]
+        first = order[np.flatnonzero(starts)[np.cumsum(starts) - 1]]
+
+        equal = np.ones(len(order), dtype=bool)
+        rows_a, rows_b = df.iloc[order], df.iloc[first]
+        for i in range(df.shape[1]):
+            a = rows_a.iloc[:, i].to_numpy()
+            b = rows_b.iloc[:, i].to_numpy()
+            differ = np.flatnonzero(a != b)
+            if len(differ):
+                # NaN != NaN, but duplicated() treats missing values as equal
+                equal[differ[~(pd.isna(a[differ]) & pd.isna(b[differ]))]] = False
+
+        if equal.all():
+            mask[order[~starts]] = True
+        else:
+            # Hash collision: settle those groups value by value
+            group = np.cumsum(starts) - 1
+            bad = np.isin(group, group[~equal])
+            mask[order[~starts & ~bad]] = True
+            rows = np.sort(order[bad])
+            mask[rows] = df.iloc[rows].duplicated().to_numpy()
+
+    return pd.Series(mask, index=df.index)
+
+
+# ==========================
+# Seen-hash stores
+# ==========================
+class _SortedRuns:
+    """
+    Exact set of hashes kept as sorted runs that are merged pairwise when
+    they grow to similar sizes, so inserts stay O(n log n) overall.
+    """
+
+    def __init__(self):
+        self.runs = []
+
+    def contains(self, values):
+        found = np.zeros(len(values), dtype=bool)
+        for run in self.runs:
+            idx = np.minimum(np.searchsorted(run, values), len(run) - 1)
+            found |= run[idx] == values
+        return found
+
+    def add(self, values):
+        if not len(values):
+            return
+        self.runs.append(np.sort(values))
+        while len(self.runs) > 1 and len(self.runs[-2]) <= 2 * len(self.runs[-1]):
+            newer = self.runs.pop()
+            older = self.runs.pop()
+            self.runs.append(np.sort(np.concatenate([older, newer]), kind="mergesort"))
+
+    @property
+    def nbytes(self):
+        return sum(run.nbytes for run in self.runs)
+
+
+class _BloomFilter:
+    """
+    Bloom filter over 64-bit hashes using double hashing on the two halves.
+    """
+
+    def __init__(self, expected_items, error_rate):
+        expected_items = max(1, expected_items)
+        self.size = max(64, int(-expected_items * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / expected_items * math.log(2)))
+        self.bits = np.zeros((self.size + 7) // 8, dtype=np.uint8)
+
+    def _positions(self, values):
+        h1 = values & np.uint64(0xFFFFFFFF)
+        h2 = (values >> np.uint64(32)) | np.uint64(1)
+        steps = np.arange(self.hash_count, dtype=np.uint64)
+        return (h1[:, None] + steps * h2[:, None]) % np.uint64(self.size)
+
+    def contains(self, values):
+        positions = self._positions(values)
+        bits = (self.bits[positions >> np.uint64(3)] >> (positions & np.uint64(7)).astype(np.uint8)) & 1
+        return bits.all(axis=1)
+
+    def add(self, values):
+        positions = self._positions(values).ravel()
+        np.bitwise_or.at(
+            self.bits,
+            positions >> np.uint64(3),
+            np.left_shift(1, positions & np.uint64(7)).astype(np.uint8)
+        )
+
+    @property
+    def nbytes(self):
+        return self.bits.nbytes
+
+
+class DuplicateCounter:
+    """
+    Count duplicate rows across chunks. "exact" keeps every distinct hash;
+    "approximate" uses a Bloom filter sized for expected_rows, which may
+    count a few extra duplicates (at most error_rate of the rows).
+    """
+
+    def __init__(self, mode="exact", expected_rows=1_000_000, error_rate=0.001):
+        self.mode = mode
+        self.rows = 0
+        self.duplicates = 0
+
+        if mode == "exact":
+            self._seen = _SortedRuns()
+        else:
+            self._seen = _BloomFilter(expected_rows, error_rate)
+
+    @property
+    def approximate(self):
+        return self.mode != "exact"
+
+    def add(self, hashes):
+        """
+        Register a chunk of row hashes. Returns a mask of the rows already
+        seen (earlier in the chunk or in previous chunks).
+        """
+        unique, first_idx, inverse = np.unique(
+            hashes, return_index=True, return_inverse=True
+        )
+        first = np.zeros(len(hashes), dtype=bool)
+        first[first_idx] = True
+
+        seen = self._seen.contains(unique)
+        self._seen.add(unique[~seen])
+
+        mask = ~first | seen[inverse]
+        self.rows += len(hashes)
+        self.duplicates += int(mask.sum())
+        return mask
+
+    def add_frame(self, df):
+        return self.add(row_hashes(df))
+
+
+def choose_mode(expected_rows):
+    if expected_rows * 8 <= EXACT_DUPLICATE_BUDGET:
+        return "exact"
+    return "approximate"
+
+
+def estimate_rows(path, sample_bytes=1024 * 1024):
+    """
+    Rough row count from the newline density of the first megabyte.
+    """
+    size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        sample = f.read(sample_bytes)
+
+    lines = max(1, sample.count(b"\n"))
+    if len(sample) >= size:
+        return lines
+    return int(size / len(sample) * lines)
@@ -1,7 +1,28 @@
+from reportlab.graphics import renderSVG
 from reportlab.lib.pagesizes import A4
 from reportlab.pdfgen import canvas
 from reportlab.lib.units import cm
+import io
 import os
+import json
+import zipfile
+import zlib
+
+from services.metrics_service import instrument
+
+try:
+    import zstandard
+except ImportError:     # zstd downloads are offered only when it is installed
+    zstandard = None
+
+# Bytes read from disk, compressed and sent at a time
+EXPORT_BLOCK_BYTES = int(os.environ.get("MDD_EXPORT_BLOCK_BYTES", 1024 * 1024))
+
+# compression: (file extension, mimetype)
+COMPRESSIONS = {
+    "gzip": (".gz", "application/gzip"),
+    "zstd": (".zst", "application/zstd")
+}
 
 
 def generate_python_cleaning_script(filename, suggestions):
@@ -29,9 +50,11 @@ def generate_python_cleaning_script(filename, suggestions):
     return script_name, "\n".join(lines)
 
 
-def generate_pdf_report(filename, diagnosis, health, insights, output_path, df=None):
+@instrument("export_pdf")
+def generate_pdf_report(filename, diagnosis, health, insights, output_path, charts=None):
     """
     Generate a PDF data quality report WITH charts.
+    charts maps column names to reportlab Drawings (cache_service.get_charts).
     """
     c = canvas.Canvas(output_path, pagesize=A4)
     width, height = A4
@@ -75,34 +98,28 @@ def generate_pdf_report(filename, diagnosis, health, insights, output_path, df=N
             y = height - 2 * cm
 
     # ======================
-    # CHARTS (NEW PART)
+    # CHARTS
     # ======================
-    if df is not None:
+    # Vector drawings in a grid, two per row; nothing is rasterized
+    if charts:
         c.showPage()
         y = height - 2 * cm
 
         c.setFont("Helvetica-Bold", 12)
         c.drawString(2 * cm, y, "Numeric Column Distributions")
-        y -= 1 * cm
+        y -= 0.6 * cm
 
-        for col in df.select_dtypes(include="number").columns:
-            # create temp image
-            with tempfile.NamedTemporaryFile(suffix=".png", delete=False) as tmp:
-                plt.figure()
-                df[col].dropna().plot(kind="hist", bins=20, title=col)
-                plt.tight_layout()
-                plt.savefig(tmp.name)
-                plt.close()
-
-                # add image to PDF
-                c.drawImage(tmp.name, 2 * cm, y - 7 * cm, width=16 * cm, height=6 * cm)
-                y -= 7.5 * cm
-
-                os.remove(tmp.name)
-
-                if y < 3 * cm:
+        gap = 0.5 * cm
+        for i, drawing in enumerate(charts.values()):
+            column = i % 2
+            if column == 0:
+                if y - drawing.height < 2 * cm:
                     c.showPage()
                     y = height - 2 * cm
+                y -= drawing.height
+            drawing.drawOn(c, 2 * cm + column * (drawing.width + gap), y)
+            if column == 1:
+                y -= gap
 
     # ======================
     # INSIGHTS
@@ -123,3 +140,104 @@ def generate_pdf_report(filename, diagnosis, health, insights, output_path, df=N
             y = height - 2 * cm
 
     c.save()
+
+
+# ======================
+# STREAMING
+# ======================
+def available_compressions():
+    return [name for name in COMPRESSIONS if name != "zstd" or zstandard is not None]
+
+
+def iter_file(path, block=EXPORT_BLOCK_BYTES):
+    with open(path, "rb") as f:
+        while data := f.read(block):
+            yield data
+
+
+def compress_stream(blocks, compression):
+    """
+    Compress an iterable of bytes on the fly, one block at a time.
+    """
+    if compression == "gzip":
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31)     # 31: gzip header
+        for block in blocks:
+            if data := compressor.compress(block):
+                yield data
+        yield compressor.flush()
+    elif compression == "zstd" and zstandard is not None:
+        compressor = zstandard.ZstdCompressor().compressobj()
+        for block in blocks:
+            if data := compressor.compress(block):
+                yield data
+        yield compressor.flush()
+    else:
+        raise ValueError(f"Unsupported compression: {compression}")
+
+
+class _ZipSink(io.RawIOBase):
+    """
+    Write-only, unseekable target for ZipFile. ZipFile then writes data
+    descriptors after each entry instead of seeking back, so every byte
+    can be handed on as soon as it is written.
+    """
+
+    def __init__(self):
+        self._parts = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._parts.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self):
+        data = b"".join(self._parts)
+        self._parts.clear()
+        return data
+
+
+def stream_zip(entries):
+    """
+    Yield a ZIP archive piece by piece. entries yields (name, blocks)
+    pairs, blocks being an iterable of bytes; at most one block of each
+    entry is held in memory.
+    """
+    sink = _ZipSink()
+    with zipfile.ZipFile(sink, "w", zipfile.ZIP_DEFLATED) as z:
+        for name, blocks in entries:
+            with z.open(name, "w", force_zip64=True) as entry:
+                for block in blocks:
+                    entry.write(block)
+                    if data := sink.drain():
+                        yield data
+            yield sink.drain()
+    yield sink.drain()
+
+
+def analytics_zip_entries(csv_path, filename, analytics, scores, charts=None):
+    """
+    Entries of the analytics bundle: the dataset CSV, analytics and scores
+    as JSON, and each column's histogram as SVG.
+    """
+    yield filename, iter_file(csv_path)
+    yield "analytics/analytics.json", [json.dumps(analytics, indent=2).encode()]
+    yield "analytics/scores.json", [json.dumps(scores, indent=2).encode()]
+    for col, drawing in (charts or {}).items():
+        name = "".join(ch if ch.isalnum() or ch in "-_." else "_" for ch in str(col))
+        yield f"charts/{name}.svg", [renderSVG.drawToString(drawing).encode()]
+
+
+def write_analytics_zip(zip_path, csv_path, filename, analytics, scores, charts=None):
+    """
+    Bundle the dataset CSV with its analytics and scores as JSON.
+    """
+    with open(zip_path, "wb") as f:
+        for data in stream_zip(analytics_zip_entries(csv_path, filename, analytics, scores, charts)):
+            f.write(data)
@@ -0,0 +1,214 @@
+import io
+import os
+import queue
+import threading
+import uuid
+
+import pandas as pd
+
+from services.dtype_service import optimize_dtypes
+from services.profile_service import build_profile
+from services.streaming_service import CHUNK_ROWS, STREAMING_THRESHOLD_BYTES, StreamingProfiler
+from services.duplicate_service import choose_mode
+
+MAX_UPLOAD_BYTES = int(os.environ.get("MDD_MAX_UPLOAD_BYTES", 4 * 1024 * 1024 * 1024))
+MAX_UPLOAD_ROWS = int(os.environ.get("MDD_MAX_UPLOAD_ROWS", 100_000_000))
+
+# Bytes buffered between the upload and the parser before the upload waits
+_QUEUE_BLOCKS = 64
+
+
+class UploadRejected(Exception):
+    """
+    The upload is too large or is not a parseable CSV. Deliberately not a
+    ValueError: werkzeug's form parser silently drops those.
+    """
+
+
+class _QueueReader(io.RawIOBase):
+    """
+    Readable end of the tee: yields the blocks the upload writes, in order.
+    """
+
+    def __init__(self, blocks, aborted):
+        self.blocks = blocks
+        self.aborted = aborted
+        self.pending = b""
+        self.eof = False
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while not self.pending and not self.eof:
+            try:
+                block = self.blocks.get(timeout=0.5)
+            except queue.Empty:
+                self.eof = self.aborted.is_set()
+                continue
+            if block is None:
+                self.eof = True
+            else:
+                self.pending = block
+
+        n = min(len(buffer), len(self.pending))
+        buffer[:n] = self.pending[:n]
+        self.pending = self.pending[n:]
+        return n
+
+
+class UploadIngest:
+    """
+    Writable file for an uploaded CSV. Every block is written to a part
+    file on disk and handed to a parser thread, so parsing and profiling
+    happen while the upload is still arriving. Uploads over the size or
+    row limits, or that stop parsing as CSV, are rejected at the block
+    where that becomes known.
+
+    Small uploads are parsed into one DataFrame and profiled exactly at the
+    end; uploads above the streaming threshold are profiled chunk by chunk.
+    """
+
+    def __init__(self, directory, expected_bytes=None,
+                 max_bytes=MAX_UPLOAD_BYTES, max_rows=MAX_UPLOAD_ROWS):
+        self.part_path = os.path.join(directory, f".upload-{uuid.uuid4().hex}.part")
+        self.max_bytes = max_bytes
+        self.max_rows = max_rows
+        self.streaming = bool(expected_bytes) and expected_bytes > STREAMING_THRESHOLD_BYTES
+
+        self.bytes = 0
+        self.lines = 0
+        self.df = None
+        self.profile = None
+        self.finished = False
+        self._error = None
+
+        self._file = open(self.part_path, "wb")
+        self._blocks = queue.Queue(maxsize=_QUEUE_BLOCKS)
+        self._aborted = threading.Event()
+        self._thread = threading.Thread(
+            target=self._parse, args=(expected_bytes,), daemon=True
+        )
+        self._thread.start()
+
+    # ==========================
+    # Parser thread
+    # ==========================
+    def _parse(self, expected_bytes):
+        source = _QueueReader(self._blocks, self._aborted)
+        reader = io.BufferedReader(source, buffer_size=1024 * 1024)
+        try:
+            if self.streaming:
+                expected_rows = max(1, expected_bytes // 100)
+                profiler = StreamingProfiler(choose_mode(expected_rows), expected_rows)
+                rows = 0
+                for chunk in pd.read_csv(reader, chunksize=CHUNK_ROWS):
+                    rows += len(chunk)
+                    if rows > self.max_rows:
+                        raise UploadRejected(f"More than {self.max_rows} rows")
+                    profiler.update(chunk)
+                self.profile = profiler.finish()
+            else:
+                self.df = pd.read_csv(reader)
+        except UploadRejected as e:
+            self._error = e
+        except (pd.errors.ParserError, pd.errors.EmptyDataError, UnicodeDecodeError) as e:
+            self._error = UploadRejected(f"Not a valid CSV file: {e}")
+        except Exception as e:
+            self._error = UploadRejected(f"Could not read CSV: {e}")
+        finally:
+            # Keep consuming so the upload side never blocks on a full queue
+            if self._error is not None and not source.eof:
+                self._drain()
+
+    def _drain(self):
+        while not self._aborted.is_set():
+            try:
+                if self._blocks.get(timeout=0.5) is None:
+                    return
+            except queue.Empty:
+                pass
+
+    # ==========================
+    # File interface used by werkzeug
+    # ==========================
+    def write(self, data):
+        if self._error is not None:
+            self.abort()
+            raise self._error
+
+        self.bytes += len(data)
+        self.lines += bytes(data).count(b"\n")
+        if self.bytes > self.max_bytes:
+            self._error = UploadRejected(f"Upload larger than {self.max_bytes} bytes")
+        elif self.lines > self.max_rows + 1:
+            self._error = UploadRejected(f"More than {self.max_rows} rows")
+        if self._error is not None:
+            self.abort()
+            raise self._error
+
+        self._file.write(data)
+        self._blocks.put(bytes(data))
+        return len(data)
+
+    def seek(self, offset, whence=0):
+        # werkzeug rewinds once the part is complete; nothing to do
+        return 0
+
+    def tell(self):
+        return self.bytes
+
+    def read(self, size=-1):
+        raise io.UnsupportedOperation("Upload ingests are write-only")
+
+    readline = read
+
+    def flush(self):
+        self._file.flush()
+
+    def close(self):
+        pass
+
+    # ==========================
+    # Completion
+    # ==========================
+    def finish(self):
+        """
+        Wait for the parser and return (df, profile). df is None for
+        streamed uploads; profile is exact for in-memory ones.
+        """
+        if self._error is not None:
+            raise self._error
+
+        if not self.finished:
+            self.finished = True
+            self._file.close()
+            self._blocks.put(None)
+            self._thread.join()
+
+            if self._error is not None:
+                self.abort()
+                raise self._error
+
+            if self.df is not None:
+                self.df = optimize_dtypes(self.df)
+                self.profile = build_profile(self.df)
+
+        return self.df, self.profile
+
+    def commit(self, path):
+        """
+        Move the finished upload into place.
+        """
+        self.finish()
+        os.replace(self.part_path, path)
+
+    def abort(self):
+        self._aborted.set()
+        self.finished = True
+        if not self._file.closed:
+            self._file.close()
+        try:
+            os.remove(self.part_path)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,333 @@
+import multiprocessing
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from services.analytics_service import analyze_data
+from services.cache_service import (
+    cached,
+    get_charts,
+    get_correlation,
+    get_profile,
+    get_trends,
+    load_dataframe
+)
+from services.cleaning_service import CleaningPlan
+from services.diagnosis_service import generate_diagnosis_report
+from services.export_service import generate_pdf_report, write_analytics_zip
+from services.scoring_service import calculate_data_quality_score
+from services.streaming_service import is_large
+from services.suggestion_service import generate_cleaning_suggestions
+from services.versioning_service import dataset_lock, save_cleaned_version
+
+JOB_WORKERS = int(os.environ.get("MDD_JOB_WORKERS", 2))
+
+# Kinds that save a new version: one queued or running job per dataset
+SAVING_KINDS = ("apply_all",)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    filename TEXT NOT NULL,
+    status TEXT NOT NULL,
+    progress REAL NOT NULL DEFAULT 0,
+    message TEXT,
+    result_path TEXT,
+    download_name TEXT,
+    error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    owner TEXT
+)
+"""
+
+_BOOT_ID_PATH = "/proc/sys/kernel/random/boot_id"
+
+
+def _connect(db_path):
+    conn = sqlite3.connect(db_path, timeout=30)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    return conn
+
+
+def _update(db_path, job_id, **fields):
+    fields["updated_at"] = time.time()
+    assignments = ", ".join(f"{name} = ?" for name in fields)
+    with _connect(db_path) as conn:
+        conn.execute(
+            f"UPDATE jobs SET {assignments} WHERE id = ?",
+            (*fields.values(), job_id)
+        )
+
+
+# ==========================
+# Job ownership
+# ==========================
+def _boot_id():
+    try:
+        with open(_BOOT_ID_PATH) as f:
+            return f.read().strip()
+    except OSError:
+        return ""
+
+
+def _owner():
+    """
+    The web worker that owns jobs submitted from this process: its pool
+    runs them, so they die with it.
+    """
+    return f"{_boot_id()}:{os.getpid()}"
+
+
+def _owner_alive(owner):
+    boot_id, _, pid = (owner or "").rpartition(":")
+    if not pid.isdigit() or boot_id != _boot_id():
+        return False
+    if int(pid) == os.getpid():
+        return True
+    if os.name == "nt":
+        # os.kill(pid, 0) would send CTRL_C_EVENT; Windows runs one server process
+        return False
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _current_path(filename, folders):
+    cleaned_path = os.path.join(folders["cleaned"], filename)
+    if os.path.exists(cleaned_path):
+        return cleaned_path
+    return os.path.join(folders["raw"], filename)
+
+
+# ==========================
+# Job handlers (run in worker processes)
+# ==========================
+def _apply_all(job_id, filename, folders, progress):
+    # Web saves and other jobs wait until this version is recorded
+    with dataset_lock(filename, folders["cleaned"]):
+        path = _current_path(filename, folders)
+        df = load_dataframe(path)
+        progress(0.2, "Dataset loaded")
+
+        suggestions = generate_cleaning_suggestions(df, get_profile(path))
+        cleaned, changes = CleaningPlan.from_suggestions(suggestions).run(df)
+        progress(0.7, f"Applied {len(suggestions)} suggestions")
+
+        save_cleaned_version(
+            cleaned,
+            filename,
+            action="Applied all AI cleaning suggestions",
+            base_dir=folders["cleaned"],
+            source_path=path,
+            changes=changes,
+            source=df
+        )
+    return None, None
+
+
+def _export_pdf(job_id, filename, folders, progress):
+    raw_path = os.path.join(folders["raw"], filename)
+    df = None if is_large(raw_path) else load_dataframe(raw_path)
+    profile = get_profile(raw_path)
+    progress(0.4, "Dataset profiled")
+
+    pdf_name = filename.replace(".csv", "_report.pdf")
+    pdf_path = os.path.join(folders["jobs"], f"{job_id}_{pdf_name}")
+
+    generate_pdf_report(
+        filename,
+        generate_diagnosis_report(df, profile),
+        cached(raw_path, "score", lambda: calculate_data_quality_score(df, profile)),
+        get_trends(raw_path).insights(),
+        pdf_path,
+        charts=get_charts(raw_path)
+    )
+    return pdf_path, pdf_name
+
+
+def _export_analytics(job_id, filename, folders, progress):
+    csv_path = _current_path(filename, folders)
+    df = None if is_large(csv_path) else load_dataframe(csv_path)
+    profile = get_profile(csv_path)
+    progress(0.3, "Dataset profiled")
+
+    analytics = cached(
+        csv_path, "analytics",
+        lambda: analyze_data(df, profile, get_correlation(csv_path))
+    )
+    scores = cached(csv_path, "score", lambda: calculate_data_quality_score(df, profile))
+    charts = get_charts(csv_path)
+    progress(0.6, "Analytics computed")
+
+    zip_name = filename.replace(".csv", "_analytics.zip")
+    zip_path = os.path.join(folders["jobs"], f"{job_id}_{zip_name}")
+    write_analytics_zip(zip_path, csv_path, filename, analytics, scores, charts)
+    return zip_path, zip_name
+
+
+def _profile(job_id, filename, folders, progress):
+    """
+    Exact profiles of the raw upload and the latest version; get_profile
+    saves them next to the files, where the web workers pick them up.
+    """
+    paths = list(dict.fromkeys([os.path.join(folders["raw"], filename), _current_path(filename, folders)]))
+    for i, path in enumerate(paths):
+        get_profile(path)
+        progress((i + 1) / len(paths), f"Profiled {i + 1} of {len(paths)} files")
+    return None, None
+
+
+JOB_HANDLERS = {
+    "apply_all": _apply_all,
+    "export_pdf": _export_pdf,
+    "export_analytics": _export_analytics,
+    "profile": _profile,
+}
+
+
+def _run_job(db_path, job_id, kind, filename, folders):
+    _update(db_path, job_id, status="running", message="Started")
+
+    def progress(fraction, message):
+        _update(db_path, job_id, progress=fraction, message=message)
+
+    try:
+        result_path, download_name = JOB_HANDLERS[kind](job_id, filename, folders, progress)
+    except Exception as e:
+        _update(db_path, job_id, status="failed", error=f"{type(e).__name__}: {e}")
+        return
+
+    _update(
+        db_path,
+        job_id,
+        status="done",
+        progress=1.0,
+        message="Finished",
+        result_path=result_path,
+        download_name=download_name
+    )
+
+
+# ==========================
+# Queue
+# ==========================
+class JobQueue:
+    """
+    Runs heavy operations in a process pool; job state lives in SQLite so
+    any web worker can report status and serve results.
+    """
+
+    def __init__(self, db_path, folders, max_workers=JOB_WORKERS):
+        self.db_path = db_path
+        self.folders = dict(folders)
+        self.max_workers = max_workers
+        self._executor = None
+        self._lock = threading.Lock()
+
+        os.makedirs(self.folders["jobs"], exist_ok=True)
+        with _connect(db_path) as conn:
+            conn.execute(SCHEMA)
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+            if "owner" not in columns:
+                conn.execute("ALTER TABLE jobs ADD COLUMN owner TEXT")
+        self._fail_orphans()
+
+    def _fail_orphans(self):
+        """
+        Fail queued or running jobs whose owning web worker has exited;
+        other live workers' jobs are left alone.
+        """
+        with _connect(self.db_path) as conn:
+            rows = conn.execute(
+                "SELECT id, owner FROM jobs WHERE status IN ('queued', 'running')"
+            ).fetchall()
+            dead = [(row["id"],) for row in rows if not _owner_alive(row["owner"])]
+            if dead:
+                conn.executemany(
+                    "UPDATE jobs SET status = 'failed', error = 'Server process exited' "
+                    "WHERE id = ? AND status IN ('queued', 'running')",
+                    dead
+                )
+
+    def _pool(self):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    def _dispatch(self, job_id, kind, filename):
+        future = self._pool().submit(_run_job, self.db_path, job_id, kind, filename, self.folders)
+        future.add_done_callback(lambda f: self._check_crashed(job_id, f))
+
+    def _check_crashed(self, job_id, future):
+        # _run_job records handler errors itself; anything raised here
+        # means the worker process died (BrokenProcessPool) before it could
+        error = None if future.cancelled() else future.exception()
+        if error is not None:
+            _update(
+                self.db_path,
+                job_id,
+                status="failed",
+                error=f"Worker process died: {type(error).__name__}: {error}"
+            )
+
+    def submit(self, kind, filename):
+        if kind not in JOB_HANDLERS:
+            raise ValueError(f"Unknown job kind: {kind}")
+
+        # A second save for the same dataset joins the one already queued
+        if kind in SAVING_KINDS:
+            existing = self.active(kind, filename)
+            if existing is not None:
+                return existing
+
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with _connect(self.db_path) as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, kind, filename, status, message, created_at, updated_at, owner) "
+                "VALUES (?, ?, ?, 'queued', 'Waiting for a worker', ?, ?, ?)",
+                (job_id, kind, filename, now, now, _owner())
+            )
+
+        with self._lock:
+            try:
+                self._dispatch(job_id, kind, filename)
+            except BrokenProcessPool:
+                # A worker died and took the pool with it; its jobs were
+                # failed by _check_crashed. Start a fresh pool for this one.
+                self._executor.shutdown(wait=False)
+                self._executor = None
+                self._dispatch(job_id, kind, filename)
+        return job_id
+
+    def active(self, kind, filename):
+        """
+        Id of a queued or running job of this kind for filename, if any.
+        """
+        self._fail_orphans()
+        with _connect(self.db_path) as conn:
+            row = conn.execute(
+                "SELECT id FROM jobs WHERE kind = ? AND filename = ? "
+                "AND status IN ('queued', 'running') ORDER BY created_at DESC LIMIT 1",
+                (kind, filename)
+            ).fetchone()
+        return row["id"] if row else None
+
+    def get(self, job_id):
+        with _connect(self.db_path) as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return dict(row) if row else None
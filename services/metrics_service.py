@@ -0,0 +1,263 @@
+import functools
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:     # Windows: no peak RSS gauge
+    resource = None
+
+# Track allocations inside spans (tracemalloc slows Python down noticeably)
+TRACE_MEMORY = os.environ.get("MDD_TRACE_MEMORY", "0") == "1"
+
+# Per-request profiling is only available when this is set
+PROFILING_ENABLED = os.environ.get("MDD_PROFILING", "0") == "1"
+PROFILE_INTERVAL = float(os.environ.get("MDD_PROFILE_INTERVAL_MS", 5)) / 1000
+DEFAULT_PROFILE_DIR = os.path.join(os.path.dirname(__file__), "..", "storage", "profiles")
+
+# Upper bounds (seconds) of the duration histogram buckets
+SPAN_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+if TRACE_MEMORY and not tracemalloc.is_tracing():
+    tracemalloc.start()
+
+
+# ==========================
+# Registry
+# ==========================
+class Histogram:
+    """
+    Prometheus-style histogram: cumulative bucket counts, sum and count.
+    """
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+        self.total += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    """
+    Counters and histograms keyed by metric name and label values. One
+    per process; background job workers keep their own.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}         # (name, labels) -> float
+        self._histograms = {}       # (name, labels) -> Histogram
+        self._help = {}
+
+    def describe(self, name, help_text):
+        self._help[name] = help_text
+
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, value, buckets=SPAN_BUCKETS, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(buckets)
+            histogram.observe(value)
+
+    def render(self, gauges=None):
+        """
+        Everything recorded so far in the Prometheus text exposition
+        format. gauges adds {name: value} read at scrape time.
+        """
+        lines = []
+        described = set()
+
+        def header(name, kind):
+            if name not in described:
+                described.add(name)
+                if name in self._help:
+                    lines.append(f"# HELP {name} {self._help[name]}")
+                lines.append(f"# TYPE {name} {kind}")
+
+        with self._lock:
+            for (name, labels), value in sorted(self._counters.items()):
+                header(name, "counter")
+                lines.append(f"{name}{_labels(labels)} {_number(value)}")
+
+            for (name, labels), histogram in sorted(self._histograms.items(), key=lambda item: item[0]):
+                header(name, "histogram")
+                for bound, count in zip(histogram.buckets, histogram.counts):
+                    lines.append(f"{name}_bucket{_labels(labels + (('le', _number(bound)),))} {count}")
+                lines.append(f"{name}_bucket{_labels(labels + (('le', '+Inf'),))} {histogram.count}")
+                lines.append(f"{name}_sum{_labels(labels)} {_number(histogram.total)}")
+                lines.append(f"{name}_count{_labels(labels)} {histogram.count}")
+
+        for name, value in (gauges or {}).items():
+            header(name, "gauge")
+            lines.append(f"{name} {_number(value)}")
+
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels) + "}"
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+metrics = MetricsRegistry()
+metrics.describe("mdd_span_seconds", "Time spent in an instrumented stage.")
+metrics.describe("mdd_span_errors_total", "Instrumented stages that raised.")
+metrics.describe("mdd_span_memory_bytes", "Peak Python allocations above the span's starting point (MDD_TRACE_MEMORY=1).")
+metrics.describe("mdd_request_seconds", "Request latency by endpoint.")
+metrics.describe("mdd_requests_total", "Requests by endpoint and status code.")
+
+
+def process_gauges():
+    """
+    Process-wide memory readings for /metrics.
+    """
+    gauges = {}
+    if resource is not None:
+        # ru_maxrss is KiB on Linux, bytes on macOS
+        scale = 1 if sys.platform == "darwin" else 1024
+        gauges["mdd_process_max_rss_bytes"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+    if tracemalloc.is_tracing():
+        current, _ = tracemalloc.get_traced_memory()
+        gauges["mdd_traced_memory_bytes"] = current
+    return gauges
+
+
+# ==========================
+# Spans
+# ==========================
+_local = threading.local()
+
+MEMORY_BUCKETS = tuple(2 ** n for n in range(16, 34, 2))     # 64 KiB .. 8 GiB
+
+
+def _enter_memory():
+    current, peak = tracemalloc.get_traced_memory()
+    stack = getattr(_local, "peaks", None)
+    if stack is None:
+        stack = _local.peaks = []
+    # The enclosing span keeps its peak so far; ours starts fresh
+    if stack:
+        stack[-1] = max(stack[-1], peak)
+    tracemalloc.reset_peak()
+    stack.append(current)
+    return current
+
+
+def _exit_memory(name, start):
+    peak = max(_local.peaks.pop(), tracemalloc.get_traced_memory()[1])
+    if _local.peaks:
+        _local.peaks[-1] = max(_local.peaks[-1], peak)
+    metrics.observe("mdd_span_memory_bytes", max(0, peak - start), buckets=MEMORY_BUCKETS, span=name)
+
+
+@contextmanager
+def span(name):
+    """
+    Time a stage: `with span("diagnosis"):`. Durations go to the
+    mdd_span_seconds histogram; with MDD_TRACE_MEMORY=1 the peak traced
+    allocation during the span goes to mdd_span_memory_bytes. Spans nest.
+    """
+    memory = _enter_memory() if tracemalloc.is_tracing() else None
+    start = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        metrics.inc("mdd_span_errors_total", span=name)
+        raise
+    finally:
+        metrics.observe("mdd_span_seconds", time.perf_counter() - start, span=name)
+        if memory is not None:
+            _exit_memory(name, memory)
+
+
+def instrument(name):
+    """
+    Decorator form of span.
+    """
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+# ==========================
+# Sampling profiler
+# ==========================
+class SamplingProfiler:
+    """
+    Samples one thread's Python stack every PROFILE_INTERVAL seconds from
+    a helper thread and counts identical stacks. collapsed() gives the
+    "frame;frame;frame count" lines flamegraph.pl and speedscope read.
+    """
+
+    def __init__(self, thread_id, interval=PROFILE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            self.samples[";".join(reversed(stack))] += 1
+
+    def collapsed(self):
+        return "".join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
+
+    def save(self, name, directory=DEFAULT_PROFILE_DIR):
+        """
+        Write the collapsed stacks to directory/name.folded; returns the
+        file name.
+        """
+        os.makedirs(directory, exist_ok=True)
+        file = "".join(ch if ch.isalnum() or ch in "-_." else "_" for ch in name) + ".folded"
+        with open(os.path.join(directory, file), "w") as f:
+            f.write(self.collapsed())
+        return file
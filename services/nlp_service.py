@@ -1,124 +1,866 @@
-def process_nl_query(query, df):
-    q = query.lower().strip()
+import difflib
+import re
 
-    numeric_cols = df.select_dtypes(include="number").columns.tolist()
+import numpy as np
+import pandas as pd
 
-    if not numeric_cols:
-        return {"answer": "No numeric columns found in the dataset."}
+from services.correlation_service import CORRELATION_TOP_K, correlation_matrix
+from services.trend_service import analyze_trends
 
-    # ==========================
-    # Detect mentioned column
-    # ==========================
-    selected_col = None
-    for col in numeric_cols:
-        if col.lower() in q:
-            selected_col = col
-            break
-
-    # ==========================
-    # HIGHEST / MAX
-    # ==========================
-    if "highest" in q or "maximum" in q or "max" in q:
-        if not selected_col:
-            return {
-                "answer": (
-                    "Please specify a column. "
-                    f"Available numeric columns: {', '.join(numeric_cols)}"
-                )
+# Rows shown for group-by and row-listing answers
+MAX_TABLE_ROWS = 50
+DEFAULT_TOP_K = 5
+
+# Close enough for a misspelt column name to count as a mention
+FUZZY_CUTOFF = 0.85
+
+_TOKEN_RE = re.compile(
+    r"[<>!=]=?"
+    r"|\d+(?:[-/:]\d+)+"
+    r"|-?\d+(?:\.\d+)?(?:st|nd|rd|th)?%?"
+    r"|[^\W_]+(?:-[^\W_]+)*"
+)
+_NUMBER_RE = re.compile(r"(-?\d+(?:\.\d+)?)(st|nd|rd|th)?%?$")
+_PERCENTILE_RE = re.compile(r"p(\d{1,2})$")
+
+
+class QueryError(Exception):
+    """
+    The question parsed, but cannot be answered on this dataset.
+    """
+
+
+def tokenize(text):
+    return _TOKEN_RE.findall(str(text).lower())
+
+
+def normalize_query(query):
+    """
+    Canonical form of a question, used as its cache key.
+    """
+    return " ".join(tokenize(query))
+
+
+# ==========================
+# Vocabulary
+# ==========================
+AGGREGATIONS = {
+    "sum": "sum", "total": "sum",
+    "average": "mean", "avg": "mean", "mean": "mean",
+    "median": "median",
+    "max": "max", "maximum": "max", "highest": "max", "largest": "max", "biggest": "max",
+    "min": "min", "minimum": "min", "lowest": "min", "smallest": "min",
+    "count": "count",
+    "std": "std", "stdev": "std", "deviation": "std",
+    "variance": "var", "var": "var",
+    "distinct": "nunique", "unique": "nunique"
+}
+
+COMPARISONS = [
+    (("greater", "than", "or", "equal", "to"), ">="),
+    (("less", "than", "or", "equal", "to"), "<="),
+    (("not", "equal", "to"), "!="),
+    (("greater", "than"), ">"), (("more", "than"), ">"), (("higher", "than"), ">"),
+    (("less", "than"), "<"), (("fewer", "than"), "<"), (("lower", "than"), "<"),
+    (("at", "least"), ">="), (("at", "most"), "<="),
+    (("equal", "to"), "=="), (("is", "not"), "!="),
+    (("above",), ">"), (("over",), ">"), (("exceeds",), ">"),
+    (("below",), "<"), (("under",), "<"),
+    (("equals",), "=="), (("is",), "=="), (("contains",), "contains"),
+    (("between",), "between"),
+    ((">",), ">"), ((">=",), ">="), (("<",), "<"), (("<=",), "<="),
+    (("=",), "=="), (("==",), "=="), (("!=",), "!=")
+]
+_MAX_COMPARISON = max(len(words) for words, _ in COMPARISONS)
+_COMPARISONS = {words: op for words, op in COMPARISONS}
+
+TOP_WORDS = {"top": False, "bottom": True}
+RANK_WORDS = {"highest": False, "largest": False, "biggest": False,
+              "lowest": True, "smallest": True}
+GROUP_WORDS = {"by", "per", "each", "every"}
+MISSING_WORDS = {"missing", "null", "nulls", "nan", "empty", "blank"}
+CORRELATION_WORDS = {"correlation", "correlations", "correlated", "correlate", "corr"}
+TREND_WORDS = {"trend", "trends", "trending"}
+DESCRIBE_WORDS = {"describe", "summary", "summarize", "statistics", "stats"}
+QUARTILES = {"first": 25, "lower": 25, "second": 50, "third": 75, "upper": 75}
+
+# Words that end a text filter value
+_BOUNDARY = (
+    {"and", "or", "where", "with", "when", "whose", "for", "in", "of", "the"}
+    | GROUP_WORDS | set(AGGREGATIONS) | set(TOP_WORDS)
+)
+
+# Never treated as a partial or fuzzy column mention
+KEYWORDS = (
+    set(AGGREGATIONS) | set(TOP_WORDS) | set(RANK_WORDS) | GROUP_WORDS
+    | MISSING_WORDS | CORRELATION_WORDS | TREND_WORDS | DESCRIBE_WORDS
+    | {w for words, _ in COMPARISONS for w in words}
+    | {"what", "which", "who", "how", "many", "much", "number", "is", "are", "the",
+       "a", "an", "of", "in", "for", "and", "or", "where", "with", "when", "whose",
+       "value", "values", "rows", "row", "records", "column", "columns", "has",
+       "have", "show", "me", "list", "give", "find", "percentile", "quartile",
+       "between", "to", "all", "data", "dataset", "there"}
+)
+
+_SPELLCHECKED = sorted(
+    w for w in set(AGGREGATIONS) | set(RANK_WORDS) | MISSING_WORDS | CORRELATION_WORDS
+    | TREND_WORDS | DESCRIBE_WORDS | {"percentile", "quartile", "between"}
+    if len(w) >= 4
+)
+
+
+# ==========================
+# Column index
+# ==========================
+class ColumnIndex:
+    """
+    Precomputed lookup from query tokens to column names: exact names
+    (as token phrases), tokens that identify a single column, and a fuzzy
+    fallback for misspellings.
+    """
+
+    def __init__(self, columns, numeric_columns=()):
+        self.columns = list(columns)
+        self.numeric = set(numeric_columns)
+
+        self.phrases = {}
+        self.token_columns = {}
+        for col in self.columns:
+            tokens = tuple(tokenize(col))
+            if not tokens:
+                continue
+            self.phrases.setdefault(tokens, col)
+            for token in tokens:
+                self.token_columns.setdefault(token, []).append(col)
+
+        self.max_phrase = max((len(p) for p in self.phrases), default=1)
+        self._names = {" ".join(p): col for p, col in self.phrases.items()}
+
+    @classmethod
+    def for_dataframe(cls, df):
+        return cls(df.columns, df.select_dtypes(include="number").columns)
+
+    def match(self, tokens, start):
+        """
+        (column, tokens consumed) for the mention starting at tokens[start],
+        or None.
+        """
+        longest = min(self.max_phrase, len(tokens) - start)
+
+        for n in range(longest, 0, -1):
+            col = self.phrases.get(tuple(tokens[start:start + n]))
+            if col is not None:
+                return col, n
+
+        token = tokens[start]
+        if token in KEYWORDS or _NUMBER_RE.match(token):
+            return None
+
+        # A token that appears in exactly one column name
+        owners = self.token_columns.get(token, ())
+        if len(owners) == 1 and len(token) >= 3:
+            return owners[0], 1
+
+        for n in range(longest, 0, -1):
+            words = tokens[start:start + n]
+            if any(w in KEYWORDS for w in words):
+                continue
+            close = difflib.get_close_matches(" ".join(words), self._names, 1, FUZZY_CUTOFF)
+            if close:
+                return self._names[close[0]], n
+
+        return None
+
+
+# ==========================
+# Intent AST
+# ==========================
+class Filter:
+    def __init__(self, column, op, value, text=None):
+        self.column = column
+        self.op = op
+        self.value = value
+        self.text = text if text is not None else str(value)
+
+    def mask(self, df):
+        series = df[self.column]
+        numeric = pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series)
+
+        if self.op == "between":
+            if not numeric:
+                raise QueryError(f"'{self.column}' is not numeric.")
+            lo, hi = sorted(self.value)
+            return series.between(lo, hi).to_numpy(dtype=bool, na_value=False)
+
+        if numeric and isinstance(self.value, float):
+            ops = {
+                ">": series.gt, ">=": series.ge, "<": series.lt, "<=": series.le,
+                "==": series.eq, "!=": series.ne
             }
-        val = df[selected_col].max()
+            if self.op in ops:
+                return ops[self.op](self.value).to_numpy(dtype=bool, na_value=False)
+
+        text = series.astype(str).str.lower()
+        if self.op == "==":
+            return (text == self.text).to_numpy(dtype=bool, na_value=False)
+        if self.op == "!=":
+            return (text != self.text).to_numpy(dtype=bool, na_value=False)
+        if self.op == "contains":
+            return text.str.contains(self.text, regex=False).to_numpy(dtype=bool, na_value=False)
+
+        raise QueryError(f"Cannot compare '{self.column}' with '{self.text}'.")
+
+    def describe(self):
+        if self.op == "between":
+            return f"{self.column} between {self.value[0]:g} and {self.value[1]:g}"
+        return f"{self.column} {'=' if self.op == '==' else self.op} {self.text}"
+
+    def to_dict(self):
+        return {"column": self.column, "op": self.op, "value": self.value}
+
+
+class Intent:
+    """
+    Parsed question. action is one of aggregate, rank, rows, missing,
+    correlation, trend, describe or unknown.
+    """
+
+    def __init__(self, action="unknown", columns=None, agg=None, group_by=None,
+                 filters=None, k=None, ascending=False, percentile=None, label=None):
+        self.action = action
+        self.columns = columns or []
+        self.agg = agg
+        self.group_by = group_by
+        self.filters = filters or []
+        self.k = k
+        self.ascending = ascending
+        self.percentile = percentile
+        self.label = label
+
+    def to_dict(self):
         return {
-            "answer": f"The highest value in '{selected_col}' is {val}."
+            "action": self.action,
+            "columns": self.columns,
+            "agg": self.agg,
+            "group_by": self.group_by,
+            "filters": [f.to_dict() for f in self.filters],
+            "k": self.k,
+            "ascending": self.ascending,
+            "percentile": self.percentile,
+            "label": self.label
         }
 
-    # ==========================
-    # LOWEST / MIN
-    # ==========================
-    if "lowest" in q or "minimum" in q or "min" in q:
-        if not selected_col:
+
+# ==========================
+# Parser
+# ==========================
+def _number(token):
+    m = _NUMBER_RE.match(token)
+    return float(m.group(1)) if m else None
+
+
+def _items(tokens, index):
+    """
+    Token stream with column mentions and comparison phrases collapsed
+    into ("col", name) and ("op", symbol) items.
+    """
+    items = []
+    i = 0
+    while i < len(tokens):
+        found = index.match(tokens, i)
+        if found:
+            items.append(("col", found[0]))
+            i += found[1]
+            continue
+
+        for n in range(min(_MAX_COMPARISON, len(tokens) - i), 0, -1):
+            op = _COMPARISONS.get(tuple(tokens[i:i + n]))
+            if op:
+                items.append(("op", op))
+                i += n
+                break
+        else:
+            number = _number(tokens[i])
+            if number is not None:
+                items.append(("num", tokens[i]))
+            else:
+                items.append(("word", _correct(tokens[i])))
+            i += 1
+    return items
+
+
+def _correct(word):
+    """
+    Misspelt query keywords ("averge", "maximun") map to the keyword.
+    """
+    if word in KEYWORDS or len(word) < 4:
+        return word
+    close = difflib.get_close_matches(word, _SPELLCHECKED, 1, FUZZY_CUTOFF - 0.05)
+    return close[0] if close else word
+
+
+def _filter_value(items, i, column, op):
+    """
+    (Filter, next position) for the value starting at items[i], or None.
+    """
+    if i >= len(items):
+        return None
+
+    kind, token = items[i]
+    if op == "between":
+        if kind != "num":
+            return None
+        j = i + 1
+        if j < len(items) and items[j] == ("word", "and"):
+            j += 1
+        if j >= len(items) or items[j][0] != "num":
+            return None
+        value = (_number(token), _number(items[j][1]))
+        return Filter(column, op, value), j + 1
+
+    if kind == "num":
+        text = token.rstrip("%")
+        return Filter(column, op, _number(token), text), i + 1
+
+    words = []
+    while i < len(items) and items[i][0] == "word" and items[i][1] not in _BOUNDARY:
+        words.append(items[i][1])
+        i += 1
+    if not words:
+        return None
+    text = " ".join(words)
+    return Filter(column, op, text, text), i
+
+
+def parse_query(query, index):
+    """
+    Intent for a question, resolving column mentions through index.
+    """
+    tokens = tokenize(query)
+    words = set(tokens)
+    items = _items(tokens, index)
+    intent = Intent()
+
+    targets = []
+    top = None
+    i = 0
+    while i < len(items):
+        kind, value = items[i]
+        nxt = items[i + 1] if i + 1 < len(items) else (None, None)
+
+        if kind == "col":
+            # COL [is] OP VALUE
+            j = i + 1
+            if nxt == ("op", "==") and i + 2 < len(items) and items[i + 2][0] == "op":
+                j = i + 2
+            if j < len(items) and items[j][0] == "op":
+                parsed = _filter_value(items, j + 1, value, items[j][1])
+                if parsed:
+                    intent.filters.append(parsed[0])
+                    i = parsed[1]
+                    continue
+            if value not in targets:
+                targets.append(value)
+
+        elif kind == "word":
+            if value in GROUP_WORDS and nxt[0] == "col":
+                intent.group_by = nxt[1]
+                i += 2
+                continue
+            if value in ("which", "what", "who") and nxt[0] == "col":
+                intent.label = nxt[1]
+                i += 2
+                continue
+            if value in TOP_WORDS:
+                top = TOP_WORDS[value]
+                if nxt[0] == "num":
+                    intent.k = int(_number(nxt[1]))
+                    i += 2
+                    continue
+            elif value in ("percentile", "quantile") and nxt[0] == "num":
+                intent.percentile = _number(nxt[1])
+                i += 2
+                continue
+            elif value == "quartile" and i and items[i - 1][1] in QUARTILES:
+                intent.percentile = QUARTILES[items[i - 1][1]]
+            elif _PERCENTILE_RE.match(value):
+                intent.percentile = float(_PERCENTILE_RE.match(value).group(1))
+            elif value in AGGREGATIONS:
+                agg = AGGREGATIONS[value]
+                # "distinct" wins over "count", anything wins over "count"
+                if intent.agg in (None, "count") or agg == "nunique":
+                    intent.agg = agg
+
+        elif kind == "num":
+            if nxt[0] == "word" and nxt[1] in RANK_WORDS:
+                top = RANK_WORDS[nxt[1]]
+                intent.k = int(_number(value))
+                i += 2
+                continue
+            if nxt == ("word", "percentile"):
+                intent.percentile = _number(value)
+                i += 2
+                continue
+
+        i += 1
+
+    if "how" in words and "many" in words and intent.agg != "nunique":
+        intent.agg = "count"
+    if "number" in words and "of" in words and intent.agg is None:
+        intent.agg = "count"
+
+    intent.columns = [c for c in targets if c not in (intent.group_by, intent.label)]
+
+    if words & CORRELATION_WORDS:
+        intent.action = "correlation"
+    elif words & MISSING_WORDS:
+        intent.action = "missing"
+    elif words & TREND_WORDS:
+        intent.action = "trend"
+    elif words & DESCRIBE_WORDS:
+        intent.action = "describe"
+    elif intent.percentile is not None:
+        intent.action = "aggregate"
+        intent.agg = "quantile"
+    elif top is not None:
+        intent.action = "rank"
+        intent.ascending = top
+        intent.k = intent.k or DEFAULT_TOP_K
+        if intent.agg in ("max", "min"):
+            intent.agg = None
+        if intent.agg and not intent.group_by and len(intent.columns) >= 2:
+            # "top 3 Model by average Price": rank groups of the first column
+            intent.group_by = intent.columns.pop(0)
+        elif intent.group_by and not intent.agg:
+            # "top 5 rows by Price": by names the sort column
+            intent.columns.insert(0, intent.group_by)
+            intent.group_by = None
+    elif intent.label and intent.agg in ("max", "min"):
+        # "which Model has the highest Price"
+        intent.action = "rank"
+        intent.ascending = intent.agg == "min"
+        intent.agg = None
+        intent.k = 1
+    elif intent.agg:
+        intent.action = "aggregate"
+    elif intent.filters:
+        intent.action = "rows"
+
+    return intent
+
+
+# ==========================
+# Executor
+# ==========================
+def _plain(value):
+    if value is None or value is pd.NA or value is pd.NaT:
+        return None
+    if isinstance(value, (np.bool_, bool)):
+        return bool(value)
+    if isinstance(value, (np.integer, int)):
+        return int(value)
+    if isinstance(value, (np.floating, float)):
+        return None if np.isnan(value) else round(float(value), 2)
+    if isinstance(value, pd.Timestamp):
+        return value.isoformat()
+    return value if isinstance(value, str) else str(value)
+
+
+def _records(df):
+    return [
+        {str(k): _plain(v) for k, v in row.items()}
+        for row in df.head(MAX_TABLE_ROWS).to_dict(orient="records")
+    ]
+
+
+def _count(rows):
+    return f"{rows} row" if rows == 1 else f"{rows} rows"
+
+
+def _is_numeric(df, col):
+    return pd.api.types.is_numeric_dtype(df[col]) and not pd.api.types.is_bool_dtype(df[col])
+
+
+def _numeric_columns(df):
+    return df.select_dtypes(include="number").columns.tolist()
+
+
+def _specify(df, what="a column"):
+    raise QueryError(
+        f"Please specify {what}. "
+        f"Available numeric columns: {', '.join(map(str, _numeric_columns(df)))}"
+    )
+
+
+def _where(intent):
+    if not intent.filters:
+        return ""
+    return " where " + " and ".join(f.describe() for f in intent.filters)
+
+
+def _filtered(df, intent):
+    if not intent.filters:
+        return df
+    mask = np.ones(len(df), dtype=bool)
+    for f in intent.filters:
+        mask &= f.mask(df)
+    return df[mask]
+
+
+AGG_LABELS = {
+    "sum": "total", "mean": "average value", "median": "median", "max": "highest value",
+    "min": "lowest value", "count": "number of values", "std": "standard deviation",
+    "var": "variance", "nunique": "number of distinct values"
+}
+_NUMERIC_AGGS = {"sum", "mean", "median", "std", "var", "quantile"}
+# Also run on dates; text (and unordered categories) has no max or min
+_ORDERED_AGGS = {"max", "min"}
+
+
+def _check_agg(df, col, agg):
+    """
+    QueryError unless agg can run on column col.
+    """
+    if agg in _NUMERIC_AGGS or agg in _ORDERED_AGGS:
+        if _is_numeric(df, col):
+            return
+        if agg in _ORDERED_AGGS and pd.api.types.is_datetime64_any_dtype(df[col]):
+            return
+        raise QueryError(f"Column '{col}' is not numeric.")
+
+
+def _agg_label(intent):
+    if intent.agg == "quantile":
+        return f"{intent.percentile:g}th percentile"
+    return AGG_LABELS[intent.agg]
+
+
+def _aggregate(df, intent, stats=None):
+    data = _filtered(df, intent)
+    where = _where(intent)
+
+    # "how many rows ..." / "count where ..."
+    if intent.agg == "count" and not intent.columns:
+        if intent.group_by:
+            counts = data.groupby(intent.group_by, observed=True, sort=True).size()
+            table = counts.rename("count").reset_index()
             return {
-                "answer": (
-                    "Please specify a column. "
-                    f"Available numeric columns: {', '.join(numeric_cols)}"
-                )
+                "answer": f"Row counts by '{intent.group_by}'{where}:",
+                "table": _records(table)
             }
-        val = df[selected_col].min()
+        return {"answer": f"There are {_count(len(data))}{where}."}
+
+    if not intent.columns:
+        _specify(df, "a column for the " + _agg_label(intent))
+
+    for col in intent.columns:
+        _check_agg(df, col, intent.agg)
+
+    q = None if intent.percentile is None else intent.percentile / 100
+    if not 0 <= (q or 0) <= 1:
+        raise QueryError("Percentiles must be between 0 and 100.")
+
+    def apply(frame):
+        if stats is not None and isinstance(frame, pd.Series):
+            key = (intent.agg, q, frame.name)
+            if key in stats:
+                return stats[key]
+        if intent.agg == "quantile":
+            return frame.quantile(q)
+        return getattr(frame, intent.agg)()
+
+    if intent.group_by:
+        grouped = data.groupby(intent.group_by, observed=True, sort=True)[intent.columns]
+        table = apply(grouped).reset_index()
         return {
-            "answer": f"The lowest value in '{selected_col}' is {val}."
+            "answer": f"{_agg_label(intent).capitalize()} of "
+                      f"{', '.join(repr(c) for c in intent.columns)} by '{intent.group_by}'{where}:",
+            "table": _records(table)
         }
 
-    # ==========================
-    # MEAN / AVERAGE
-    # ==========================
-    if "mean" in q or "average" in q:
-        if not selected_col:
-            return {
-                "answer": (
-                    "Please specify a column for average. "
-                    f"Available numeric columns: {', '.join(numeric_cols)}"
-                )
-            }
-        val = round(df[selected_col].mean(), 2)
+    # "highest value in", as the answers have always read
+    preposition = "in" if intent.agg in ("max", "min") else "of"
+    answer = "; ".join(
+        f"the {_agg_label(intent)} {preposition} '{col}' is {_plain(apply(data[col]))}"
+        for col in intent.columns
+    )
+    return {"answer": answer[0].upper() + answer[1:] + where + "."}
+
+
+def _rank(df, intent):
+    data = _filtered(df, intent)
+    where = _where(intent)
+
+    if intent.group_by:
+        # Top groups by an aggregate: "top 3 Month by average Ozone"
+        if not intent.columns:
+            _specify(df)
+        agg = intent.agg or "sum"
+        col = intent.columns[0]
+        _check_agg(df, col, agg)
+        values = getattr(data.groupby(intent.group_by, observed=True)[col], agg)()
+        values = values.sort_values(ascending=intent.ascending).head(intent.k)
+        side = "Bottom" if intent.ascending else "Top"
         return {
-            "answer": f"The average value of '{selected_col}' is {val}."
+            "answer": f"{side} {len(values)} '{intent.group_by}' by {AGG_LABELS.get(agg, agg)} of '{col}'{where}:",
+            "table": _records(values.reset_index())
         }
 
-    # ==========================
-    # MISSING VALUES
-    # ==========================
-    if "missing" in q or "null" in q:
-        if selected_col:
-            cnt = df[selected_col].isnull().sum()
+    numeric = [c for c in intent.columns if _is_numeric(df, c)]
+    if not numeric:
+        _specify(df, "a numeric column to rank by")
+    key = numeric[0]
+
+    if intent.ascending:
+        rows = data.nsmallest(intent.k, key)
+    else:
+        rows = data.nlargest(intent.k, key)
+
+    if intent.label:
+        shown = [intent.label, key]
+        if intent.k == 1 and len(rows):
+            extreme = "lowest" if intent.ascending else "highest"
             return {
-                "answer": f"Column '{selected_col}' has {cnt} missing values."
+                "answer": f"'{_plain(rows[intent.label].iloc[0])}' has the {extreme} "
+                          f"'{key}' ({_plain(rows[key].iloc[0])}){where}."
             }
+    else:
+        shown = list(dict.fromkeys(intent.columns + list(df.columns)))
+
+    side = "Bottom" if intent.ascending else "Top"
+    return {
+        "answer": f"{side} {len(rows)} rows by '{key}'{where}:",
+        "table": _records(rows[shown])
+    }
 
-        missing = df.isnull().sum()
-        summary = ", ".join(
-            [f"{c}: {v}" for c, v in missing.items() if v > 0]
-        )
-        return {
-            "answer": summary or "No missing values found in the dataset."
-        }
 
-    # ==========================
-    # CORRELATION
-    # ==========================
-    if "correlation" in q:
-        corr = df[numeric_cols].corr().round(2)
+def _rows(df, intent):
+    data = _filtered(df, intent)
+    columns = list(dict.fromkeys(intent.columns + list(df.columns)))
+    return {
+        "answer": f"{_count(len(data)).capitalize()}{_where(intent)}.",
+        "table": _records(data[columns])
+    }
+
+
+def _missing(df, intent):
+    if intent.columns:
+        counts = df[intent.columns].isnull().sum()
         return {
-            "answer": "Correlation matrix between numeric columns:",
-            "table": corr.reset_index().to_dict(orient="records")
+            "answer": "; ".join(
+                f"Column '{c}' has {int(v)} missing values" for c, v in counts.items()
+            ) + "."
         }
 
-    # ==========================
-    # TREND
-    # ==========================
-    if "trend" in q:
-        if not selected_col:
-            return {
-                "answer": (
-                    "Please specify a column to analyze trend. "
-                    f"Available numeric columns: {', '.join(numeric_cols)}"
-                )
-            }
+    missing = df.isnull().sum()
+    summary = ", ".join(f"{c}: {v}" for c, v in missing.items() if v > 0)
+    return {"answer": summary or "No missing values found in the dataset."}
+
+
+def _correlation(df, intent, correlation=None):
+    numeric = [c for c in intent.columns if _is_numeric(df, c)]
+    where = _where(intent)
+
+    if intent.filters or correlation is None:
+        matrix = correlation_matrix(_filtered(df, intent), numeric if len(numeric) >= 2 else None)
+    else:
+        matrix = correlation()
 
-        trend = (
-            "increasing"
-            if df[selected_col].iloc[-1] > df[selected_col].iloc[0]
-            else "decreasing"
-        )
+    if len(numeric) >= 2:
+        a, b = numeric[:2]
+        return {"answer": f"The correlation between '{a}' and '{b}' is {_plain(matrix.value(a, b))}{where}."}
 
+    if numeric:
+        others = matrix.column(numeric[0]).round(2)
         return {
-            "answer": f"The overall trend of '{selected_col}' is {trend}."
+            "answer": f"Correlation of '{numeric[0]}' with other numeric columns{where}:",
+            "table": _records(others.rename("correlation").rename_axis("column").reset_index())
         }
 
-    # ==========================
-    # FALLBACK
-    # ==========================
+    pairs = matrix.pairs(CORRELATION_TOP_K)
     return {
-        "answer": (
-            "I understood the question, but this analysis is not supported yet.\n"
-            "Try: highest value in Ozone, average Wind, correlation, trend of Temp"
-        )
+        "answer": f"Strongest correlations between numeric columns{where}:",
+        "table": [{"column": p["x"], "with": p["y"], "correlation": p["r"]} for p in pairs]
     }
+
+
+def _trend(df, intent, trends=None):
+    numeric = [c for c in intent.columns if _is_numeric(df, c)]
+    if not numeric:
+        _specify(df, "a column to analyze trend")
+
+    col = numeric[0]
+    if trends is not None and not intent.filters:
+        report = trends()
+    else:
+        data = _filtered(df, intent)
+        # Profile only the column and the time column, not the whole frame
+        time_column = trends().time_column if trends is not None else None
+        if time_column is not None:
+            data = data[list(dict.fromkeys([time_column, col]))]
+        report = analyze_trends(data, columns=[col])
+
+    trend = report.columns.get(col)
+    if trend is None:
+        raise QueryError(f"Not enough values in '{col}' to find a trend.")
+
+    return {
+        "answer": (f"For rows{_where(intent)}: " if intent.filters else "") + " ".join(trend.insights()),
+        "table": [{"from": label, "mean": value} for label, value in trend.rolling]
+    }
+
+
+def _describe(df, intent):
+    columns = intent.columns or _numeric_columns(df)
+    if not columns:
+        raise QueryError("No columns to describe.")
+    summary = _filtered(df, intent)[columns].describe().T
+    return {
+        "answer": f"Summary statistics{_where(intent)}:",
+        "table": _records(summary.rename_axis("column").reset_index())
+    }
+
+
+EXECUTORS = {
+    "aggregate": _aggregate,
+    "rank": _rank,
+    "rows": _rows,
+    "missing": _missing,
+    "correlation": _correlation,
+    "trend": _trend,
+    "describe": _describe
+}
+
+
+def _shareable(intent):
+    return (
+        intent.action == "aggregate" and intent.columns
+        and not intent.filters and not intent.group_by
+    )
+
+
+def shared_aggregates(intents, df):
+    """
+    Values of every plain (unfiltered, ungrouped) aggregation in intents,
+    computed with one DataFrame.agg call plus one quantile call, keyed
+    by (agg, quantile, column).
+    """
+    requested = {}
+    quantiles = set()
+    for intent in intents:
+        if not _shareable(intent):
+            continue
+        for col in intent.columns:
+            if col not in df.columns:
+                continue
+            if intent.agg == "quantile":
+                if _is_numeric(df, col) and 0 <= intent.percentile <= 100:
+                    quantiles.add((intent.percentile / 100, col))
+            elif intent.agg in ("count", "nunique") or (
+                _is_numeric(df, col) and intent.agg in _NUMERIC_AGGS | _ORDERED_AGGS
+            ):
+                requested.setdefault(col, set()).add(intent.agg)
+
+    stats = {}
+    if requested:
+        table = df.agg({col: sorted(aggs) for col, aggs in requested.items()})
+        for col, aggs in requested.items():
+            integral = pd.api.types.is_integer_dtype(df[col])
+            for agg in aggs:
+                value = table.at[agg, col]
+                # The combined table is upcast to float; keep integer answers integral
+                if not pd.isna(value) and (
+                    agg in ("count", "nunique") or (integral and agg in ("sum", "max", "min"))
+                ):
+                    value = int(value)
+                stats[(agg, None, col)] = value
+
+    if quantiles:
+        qs = sorted({q for q, _ in quantiles})
+        cols = list(dict.fromkeys(col for _, col in quantiles))
+        table = df[cols].quantile(qs)
+        for q, col in quantiles:
+            stats[("quantile", q, col)] = table.at[q, col]
+
+    return stats
+
+
+def _failed(error):
+    return {
+        "answer": "Sorry, this question could not be answered.",
+        "error": f"{type(error).__name__}: {error}"
+    }
+
+
+def execute_intent(intent, df, stats=None, correlation=None, trends=None):
+    executor = EXECUTORS.get(intent.action)
+    if executor is None:
+        return {
+            "answer": (
+                "I understood the question, but this analysis is not supported yet.\n"
+                "Try: highest value in Ozone, average Wind by Month, "
+                "top 5 rows by Temp, 90th percentile of Ozone where Month = 7, "
+                "how many rows where Wind > 10, correlation"
+            )
+        }
+    try:
+        if executor is _aggregate:
+            return _aggregate(df, intent, stats)
+        if executor is _correlation:
+            return _correlation(df, intent, correlation)
+        if executor is _trend:
+            return _trend(df, intent, trends)
+        return executor(df, intent)
+    except QueryError as e:
+        return {"answer": str(e)}
+
+
+# ==========================
+# Entry point
+# ==========================
+def process_nl_query(query, df, index=None, correlation=None, trends=None):
+    """
+    Answer a question about df. index is a ColumnIndex for df's columns;
+    pass a cached one to skip rebuilding it. correlation and trends, when
+    given, are called for df's CorrelationMatrix and TrendReport instead
+    of computing them.
+    """
+    if not _numeric_columns(df):
+        return {"answer": "No numeric columns found in the dataset."}
+
+    index = index or ColumnIndex.for_dataframe(df)
+    intent = parse_query(query, index)
+    result = execute_intent(intent, df, correlation=correlation, trends=trends)
+    result["intent"] = intent.to_dict()
+    return result
+
+
+def process_nl_batch(queries, df, index=None, correlation=None, trends=None):
+    """
+    Answers for several questions about df, in the order asked. Repeated
+    questions are answered once and plain aggregations across all of
+    them share a single vectorized pass.
+    """
+    if not _numeric_columns(df):
+        return [{"answer": "No numeric columns found in the dataset."} for _ in queries]
+
+    index = index or ColumnIndex.for_dataframe(df)
+    answers = {}
+    intents = {}
+    for query in dict.fromkeys(queries):
+        try:
+            intents[query] = parse_query(query, index)
+        except Exception as e:
+            answers[query] = _failed(e)
+    stats = shared_aggregates(intents.values(), df)
+
+    # One bad question must not cost the others their answers
+    for query, intent in intents.items():
+        try:
+            answers[query] = execute_intent(intent, df, stats, correlation, trends)
+        except Exception as e:
+            answers[query] = _failed(e)
+        answers[query]["intent"] = intent.to_dict()
+
+    return [answers[query] for query in queries]
+
@@ -0,0 +1,128 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+# "thread" shares the column arrays directly; "process" copies the numeric
+# block once into shared memory and workers attach to it by name
+PROFILE_EXECUTOR = os.environ.get("MDD_PROFILE_EXECUTOR", "thread")
+PROFILE_WORKERS = int(os.environ.get("MDD_PROFILE_WORKERS", os.cpu_count() or 1))
+
+# Below this many numeric cells the serial frame-level path is faster
+PARALLEL_MIN_CELLS = int(os.environ.get("MDD_PARALLEL_MIN_CELLS", 2_000_000))
+PARALLEL_MIN_COLUMNS = 8
+
+_executors = {}
+
+
+def _executor(kind):
+    if kind not in _executors:
+        if kind == "process":
+            _executors[kind] = ProcessPoolExecutor(
+                max_workers=PROFILE_WORKERS,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        else:
+            _executors[kind] = ThreadPoolExecutor(max_workers=PROFILE_WORKERS)
+    return _executors[kind]
+
+
+def use_parallel(rows, numeric_columns):
+    return (
+        PROFILE_WORKERS > 1
+        and numeric_columns >= PARALLEL_MIN_COLUMNS
+        and rows * numeric_columns >= PARALLEL_MIN_CELLS
+    )
+
+
+def column_stats(values):
+    """
+    Min/max/mean/var, quartiles and IQR outlier count of one float column,
+    matching the pandas defaults (skipna, ddof=1, linear quantiles).
+    """
+    valid = values[~np.isnan(values)]
+    n = len(valid)
+    if not n:
+        nan = float("nan")
+        return {
+            "min": nan, "max": nan, "mean": nan, "var": nan,
+            "q1": nan, "median": nan, "q3": nan,
+            "lower": nan, "upper": nan, "outlier_count": 0
+        }
+
+    q1, median, q3 = np.quantile(valid, [0.25, 0.5, 0.75])
+    iqr = q3 - q1
+    lower = q1 - 1.5 * iqr
+    upper = q3 + 1.5 * iqr
+
+    return {
+        "min": float(valid.min()),
+        "max": float(valid.max()),
+        "mean": float(valid.mean()),
+        "var": float(valid.var(ddof=1)) if n > 1 else float("nan"),
+        "q1": float(q1),
+        "median": float(median),
+        "q3": float(q3),
+        "lower": float(lower),
+        "upper": float(upper),
+        "outlier_count": int(((valid < lower) | (valid > upper)).sum())
+    }
+
+
+def _shared_worker(shm_name, shape, indices):
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        matrix = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+        return {i: column_stats(matrix[i]) for i in indices}
+    finally:
+        shm.close()
+
+
+def _partition(count, parts):
+    return [list(range(start, count, parts)) for start in range(min(parts, count))]
+
+
+def parallel_column_stats(num):
+    """
+    column_stats for every column of a numeric DataFrame, with the columns
+    spread over the configured pool. Returns {column: stats}.
+    """
+    columns = num.columns.tolist()
+    groups = _partition(len(columns), PROFILE_WORKERS)
+
+    if PROFILE_EXECUTOR == "process":
+        shape = (len(columns), len(num))
+        shm = shared_memory.SharedMemory(create=True, size=max(1, 8 * shape[0] * shape[1]))
+
+        # One row per column so every worker reads contiguous memory
+        matrix = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+        try:
+            for i, col in enumerate(columns):
+                matrix[i] = num[col].to_numpy(dtype=np.float64, na_value=np.nan)
+
+            futures = [
+                _executor("process").submit(_shared_worker, shm.name, shape, group)
+                for group in groups
+            ]
+            results = {}
+            for future in futures:
+                results.update(future.result())
+        finally:
+            del matrix
+            shm.close()
+            shm.unlink()
+    else:
+        arrays = [num[col].to_numpy(dtype=np.float64, na_value=np.nan) for col in columns]
+        futures = [
+            _executor("thread").submit(
+                lambda group: {i: column_stats(arrays[i]) for i in group}, group
+            )
+            for group in groups
+        ]
+        results = {}
+        for future in futures:
+            results.update(future.result())
+
+    return {columns[i]: stats for i, stats in results.items()}
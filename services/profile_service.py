@@ -0,0 +1,281 @@
+import copy
+
+import pandas as pd
+
+from services.duplicate_service import duplicate_mask, row_hashes, update_row_hashes
+from services.metrics_service import instrument
+from services.parallel_service import parallel_column_stats, use_parallel
+from services.type_inference_service import infer_types
+
+
+class ColumnProfile:
+    def __init__(self, name, dtype, rows, null_count):
+        self.name = name
+        self.dtype = dtype
+        self.rows = rows
+        self.null_count = null_count
+
+        # Numeric statistics (filled only for numeric columns)
+        self.is_numeric = False
+        self.min = None
+        self.max = None
+        self.mean = None
+        self.var = None
+        self.q1 = None
+        self.median = None
+        self.q3 = None
+        self.lower = None
+        self.upper = None
+        self.outlier_count = 0
+
+        # Text columns: share of values parseable as each type (ColumnTypes)
+        self.is_text = False
+        self.types = None
+
+    @property
+    def missing_percent(self):
+        if not self.rows:
+            return 0.0
+        return self.null_count / self.rows * 100
+
+    @property
+    def numeric_coercible(self):
+        return self.types is not None and self.types.numeric_coercible
+
+    @property
+    def date_coercible(self):
+        return self.types is not None and self.types.date_coercible
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "dtype": self.dtype,
+            "rows": self.rows,
+            "null_count": self.null_count,
+            "is_numeric": self.is_numeric,
+            "min": self.min,
+            "max": self.max,
+            "mean": self.mean,
+            "var": self.var,
+            "q1": self.q1,
+            "median": self.median,
+            "q3": self.q3,
+            "lower": self.lower,
+            "upper": self.upper,
+            "outlier_count": self.outlier_count,
+            "numeric_coercible": self.numeric_coercible,
+            "types": self.types.to_dict() if self.types is not None else None
+        }
+
+
+class DatasetProfile:
+    def __init__(self, rows, columns, duplicate_mask=None, duplicate_count=None):
+        self.rows = rows
+        self.columns = columns                  # {name: ColumnProfile}
+        self.duplicate_mask = duplicate_mask
+        self._duplicate_count = duplicate_count
+
+        # Set by profilers that already know the correlation matrix
+        self.correlation = None
+
+        # True when statistics come from sketches rather than exact passes
+        self.approximate = False
+
+        # Per-row hashes (duplicate_service.row_hashes), kept so duplicates
+        # can be re-derived after a few columns change
+        self.row_hashes = None
+
+    @property
+    def column_names(self):
+        return list(self.columns)
+
+    @property
+    def numeric_columns(self):
+        return [name for name, c in self.columns.items() if c.is_numeric]
+
+    @property
+    def total_cells(self):
+        return self.rows * len(self.columns)
+
+    @property
+    def missing_cells(self):
+        return sum(c.null_count for c in self.columns.values())
+
+    @property
+    def outlier_cells(self):
+        return sum(c.outlier_count for c in self.columns.values())
+
+    @property
+    def duplicate_count(self):
+        if self._duplicate_count is None:
+            self._duplicate_count = int(self.duplicate_mask.sum())
+        return self._duplicate_count
+
+    def column(self, name):
+        return self.columns[name]
+
+    def to_dict(self):
+        return {
+            "rows": self.rows,
+            "duplicates": self.duplicate_count,
+            "approximate": self.approximate,
+            "columns": {name: c.to_dict() for name, c in self.columns.items()}
+        }
+
+
+def is_text_dtype(dtype):
+    if isinstance(dtype, pd.CategoricalDtype):
+        return is_text_dtype(dtype.categories.dtype)
+    return (
+        pd.api.types.is_object_dtype(dtype)
+        or pd.api.types.is_string_dtype(dtype)
+    )
+
+
+@instrument("profile")
+def build_profile(df):
+    """
+    Compute every per-column statistic the report services need,
+    once, using frame-level vectorized operations.
+    """
+    hashes = row_hashes(df)
+    profile = DatasetProfile(len(df), column_profiles(df), duplicate_mask(df, hashes))
+    profile.row_hashes = hashes
+    return profile
+
+
+def column_profiles(df):
+    """
+    {name: ColumnProfile} for every column of df.
+    """
+    rows = len(df)
+    null_counts = df.isna().sum()
+
+    columns = {}
+    for col in df.columns:
+        columns[col] = ColumnProfile(
+            col, str(df[col].dtype), rows, int(null_counts[col])
+        )
+
+    # ==========================
+    # Numeric block
+    # ==========================
+    numeric_cols = df.select_dtypes(include="number").columns.tolist()
+
+    if numeric_cols and use_parallel(rows, len(numeric_cols)):
+        stats = parallel_column_stats(df[numeric_cols])
+
+        for col in numeric_cols:
+            c = columns[col]
+            c.is_numeric = True
+            for name, value in stats[col].items():
+                setattr(c, name, value)
+
+    elif numeric_cols:
+        num = df[numeric_cols]
+
+        quartiles = num.quantile([0.25, 0.5, 0.75])
+        q1 = quartiles.loc[0.25]
+        q3 = quartiles.loc[0.75]
+        iqr = q3 - q1
+        lower = q1 - 1.5 * iqr
+        upper = q3 + 1.5 * iqr
+
+        outliers = (num.lt(lower, axis=1) | num.gt(upper, axis=1)).sum()
+
+        mins = num.min()
+        maxs = num.max()
+        means = num.mean()
+        variances = num.var()
+
+        for col in numeric_cols:
+            c = columns[col]
+            c.is_numeric = True
+            c.min = float(mins[col])
+            c.max = float(maxs[col])
+            c.mean = float(means[col])
+            c.var = float(variances[col])
+            c.q1 = float(q1[col])
+            c.median = float(quartiles.loc[0.5, col])
+            c.q3 = float(q3[col])
+            c.lower = float(lower[col])
+            c.upper = float(upper[col])
+            c.outlier_count = int(outliers[col])
+
+    # ==========================
+    # Text columns → type inference
+    # ==========================
+    for col in df.columns:
+        c = columns[col]
+        if c.is_numeric or not is_text_dtype(df[col].dtype):
+            continue
+
+        c.is_text = True
+        c.types = infer_types(df[col])
+
+    return columns
+
+
+# ==========================
+# Incremental updates
+# ==========================
+def update_profile(profile, df, changes):
+    """
+    Profile of df, the result of applying a cleaning ChangeSet to the frame
+    profile describes. Only touched columns are recomputed; when rows were
+    dropped, counts are adjusted and numeric statistics (which need the
+    full column for quantiles) are recomputed for the numeric columns.
+    """
+    if profile is None or profile.approximate or changes is None:
+        return build_profile(df)
+
+    dropped = changes.dropped
+    rows_dropped = dropped is not None and len(dropped) > 0
+    recompute = []
+    columns = {}
+
+    for col in df.columns:
+        old = profile.columns.get(col)
+        if (
+            old is None
+            or col in changes.columns
+            or old.dtype != str(df[col].dtype)
+            or (rows_dropped and old.is_numeric)
+        ):
+            recompute.append(col)
+            continue
+
+        c = copy.copy(old)
+        if rows_dropped:
+            c.rows = len(df)
+            c.null_count -= int(dropped[col].isna().sum())
+            if c.types is not None:
+                c.types = c.types.copy().discount(infer_types(dropped[col]))
+        columns[col] = c
+
+    if recompute:
+        columns.update(column_profiles(df[recompute]))
+    columns = {col: columns[col] for col in df.columns}
+
+    hashes = profile.row_hashes
+    if hashes is None:
+        hashes = row_hashes(df)
+    else:
+        if rows_dropped:
+            hashes = hashes[changes.kept]
+        if changes.columns:
+            hashes = update_row_hashes(hashes, df, changes.previous)
+
+    # Fills and clips can make rows equal; dropping rows cannot
+    if changes.columns:
+        mask = duplicate_mask(df, hashes)
+    elif changes.deduplicated:
+        mask = pd.Series(False, index=df.index)
+    elif rows_dropped:
+        mask = pd.Series(profile.duplicate_mask.to_numpy()[changes.kept], index=df.index)
+    else:
+        mask = profile.duplicate_mask
+
+    updated = DatasetProfile(len(df), columns, mask)
+    updated.row_hashes = hashes
+    return updated
@@ -0,0 +1,218 @@
+import math
+import os
+
+import numpy as np
+
+from services.analytics_service import analyze_data
+from services.cache_service import (
+    cached,
+    get_correlation,
+    get_preview,
+    get_profile,
+    get_trends,
+    profile_ready
+)
+from services.correlation_service import CORRELATION_THRESHOLD, HEATMAP_MAX_COLUMNS
+from services.diagnosis_service import generate_diagnosis_report
+from services.scoring_service import calculate_data_quality_score
+from services.suggestion_service import generate_cleaning_suggestions
+
+# Columns (or suggestions, pairs, insights) per page of a report section
+REPORT_PAGE_SIZE = int(os.environ.get("MDD_REPORT_PAGE_SIZE", 50))
+REPORT_MAX_PAGE_SIZE = 500
+
+
+def page_bounds(total, page=1, per_page=REPORT_PAGE_SIZE):
+    """
+    Clamp page/per_page and return (page, per_page, pages, start, stop).
+    """
+    per_page = max(1, min(per_page, REPORT_MAX_PAGE_SIZE))
+    pages = max(1, math.ceil(total / per_page))
+    page = max(1, min(page, pages))
+    start = (page - 1) * per_page
+    return page, per_page, pages, start, min(start + per_page, total)
+
+
+def _meta(section, total, page, per_page, pages):
+    return {
+        "section": section,
+        "page": page,
+        "per_page": per_page,
+        "pages": pages,
+        "total": total
+    }
+
+
+def _paged(section, items, page, per_page):
+    page, per_page, pages, start, stop = page_bounds(len(items), page, per_page)
+    return items[start:stop], _meta(section, len(items), page, per_page, pages)
+
+
+def _pick(mapping, keys):
+    return {k: mapping[k] for k in keys if k in mapping}
+
+
+def json_safe(value):
+    """
+    value with NumPy scalars unwrapped and NaN/inf as None, so the
+    browser's JSON.parse accepts it.
+    """
+    if isinstance(value, dict):
+        return {k: json_safe(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [json_safe(v) for v in value]
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return value
+
+
+# ==========================
+# Sections
+# ==========================
+class _Basis:
+    """
+    Where a section's numbers come from: the exact profile (with the
+    cached correlation matrix and trends), or, while a large file's exact
+    profile is still being computed, its sample preview. Preview results
+    are cached under their own keys so they never stand in for exact ones.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.preview = None if profile_ready(path) else get_preview(path)
+
+    def profile(self):
+        return self.preview.profile if self.preview else get_profile(self.path)
+
+    def correlation(self):
+        return self.preview.correlation if self.preview else get_correlation(self.path)
+
+    def trends(self):
+        return self.preview.trends if self.preview else get_trends(self.path)
+
+    def cached(self, kind, compute):
+        return cached(self.path, f"preview:{kind}" if self.preview else kind, compute)
+
+    def approximate(self):
+        return self.preview.to_dict() if self.preview else None
+
+    def intervals(self, kind, columns):
+        return _pick(getattr(self.preview, kind), columns) if self.preview else None
+
+
+# Every section works from cached profiles (and the cached correlation
+# matrix and trends); none of them needs the DataFrame itself.
+def scores_section(raw_path, path, page=1, per_page=REPORT_PAGE_SIZE, column=None):
+    raw, current = _Basis(raw_path), _Basis(path)
+    before = raw.cached("score", lambda: calculate_data_quality_score(None, raw.profile()))
+    after = current.cached("score", lambda: calculate_data_quality_score(None, current.profile()))
+    return {"section": "scores", "before": before, "after": after, "approximate": current.approximate()}
+
+
+def diagnosis_section(raw_path, path, page=1, per_page=REPORT_PAGE_SIZE, column=None):
+    basis = _Basis(path)
+    diagnosis = basis.cached("diagnosis", lambda: generate_diagnosis_report(None, basis.profile()))
+    columns, meta = _paged("diagnosis", [column] if column else list(diagnosis["dtypes"]), page, per_page)
+    return {
+        **meta,
+        "rows": diagnosis["rows"],
+        "columns": diagnosis["columns"],
+        "duplicates": diagnosis["duplicates"],
+        "page_columns": columns,
+        "missing_percent": _pick(diagnosis["missing_percent"], columns),
+        "dtypes": _pick(diagnosis["dtypes"], columns),
+        "severity": _pick(diagnosis["severity"], columns),
+        "approximate": basis.approximate(),
+        "missing_intervals": basis.intervals("missing", columns)
+    }
+
+
+def analytics_section(raw_path, path, page=1, per_page=REPORT_PAGE_SIZE, column=None):
+    basis = _Basis(path)
+    analytics = basis.cached(
+        "analytics",
+        lambda: analyze_data(None, basis.profile(), basis.correlation())
+    )
+    columns, meta = _paged("analytics", [column] if column else analytics["columns"], page, per_page)
+    numeric = [c for c in columns if c in analytics["stats"]]
+    return {
+        **meta,
+        "column_names": analytics["columns"],
+        "page_columns": columns,
+        "numeric_columns": numeric,
+        "stats": _pick(analytics["stats"], numeric),
+        "variance": _pick(analytics["variance"], numeric),
+        "outliers": _pick(analytics["outliers"], numeric),
+        "missing": _pick(analytics["missing"], columns),
+        "approximate": basis.approximate(),
+        "missing_intervals": basis.intervals("missing", columns),
+        "outlier_intervals": basis.intervals("outliers", numeric)
+    }
+
+
+def suggestions_section(raw_path, path, page=1, per_page=REPORT_PAGE_SIZE, column=None):
+    basis = _Basis(path)
+    suggestions = basis.cached("suggestions", lambda: generate_cleaning_suggestions(None, basis.profile()))
+    if column:
+        suggestions = [s for s in suggestions if s["column"] == column]
+    items, meta = _paged("suggestions", suggestions, page, per_page)
+    return {**meta, "suggestions": items, "approximate": basis.approximate()}
+
+
+def correlations_section(raw_path, path, page=1, per_page=REPORT_PAGE_SIZE,
+                         column=None, threshold=CORRELATION_THRESHOLD):
+    basis = _Basis(path)
+    matrix = basis.correlation()
+
+    if column:
+        pairs = []
+        if column in matrix.columns:
+            related = matrix.column(column)
+            pairs = [
+                {"x": column, "y": other, "r": round(float(r), 2)}
+                for other, r in related[related.abs() >= threshold].items()
+            ]
+        items, meta = _paged("correlations", pairs, page, per_page)
+    else:
+        # Only the pairs up to the end of this page are materialized
+        total = matrix.count(threshold)
+        page, per_page, pages, start, stop = page_bounds(total, page, per_page)
+        items = matrix.pairs(stop, threshold)[start:stop]
+        meta = _meta("correlations", total, page, per_page, pages)
+
+    return {
+        **meta,
+        "threshold": threshold,
+        "pair_count": len(matrix) * (len(matrix) - 1) // 2,
+        "pairs": items,
+        # Narrow datasets still get the dense heatmap with the first page
+        "matrix": matrix.to_dict() if meta["page"] == 1 and len(matrix) <= HEATMAP_MAX_COLUMNS else None,
+        "approximate": basis.approximate()
+    }
+
+
+def trends_section(raw_path, path, page=1, per_page=REPORT_PAGE_SIZE, column=None):
+    basis = _Basis(path)
+    trends = basis.trends()
+    columns, meta = _paged("trends", [column] if column else list(trends.columns), page, per_page)
+    picked = [trends.columns[c] for c in columns if c in trends.columns]
+    return {
+        **meta,
+        "time_column": trends.time_column,
+        "ordering": trends.ordering(),
+        "insights": [line for t in picked for line in t.insights()],
+        "trends": [t.to_dict() for t in picked],
+        "approximate": basis.approximate()
+    }
+
+
+REPORT_SECTIONS = {
+    "scores": scores_section,
+    "diagnosis": diagnosis_section,
+    "analytics": analytics_section,
+    "suggestions": suggestions_section,
+    "correlations": correlations_section,
+    "trends": trends_section
+}
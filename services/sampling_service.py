@@ -0,0 +1,224 @@
+import io
+import math
+import os
+
+import numpy as np
+import pandas as pd
+
+from services.correlation_service import correlation_matrix
+from services.metrics_service import instrument
+from services.profile_service import DatasetProfile, build_profile
+from services.trend_service import analyze_trends
+
+# Rows read for a preview, spread over PREVIEW_BLOCKS byte ranges of the file
+PREVIEW_SAMPLE_ROWS = int(os.environ.get("MDD_PREVIEW_SAMPLE_ROWS", 50_000))
+PREVIEW_BLOCKS = int(os.environ.get("MDD_PREVIEW_BLOCKS", 64))
+
+# Two-sided 95% intervals
+CONFIDENCE = 0.95
+CONFIDENCE_Z = 1.96
+
+_PROBE_BYTES = 64 * 1024
+_BLOCK_COLUMN = "__mdd_block__"
+
+
+# ==========================
+# Sampling
+# ==========================
+def _whole_lines(f, offset, length, data_start, size):
+    """
+    The complete lines inside [offset, offset + length) of the file.
+    """
+    # Read one byte early: if it is a newline, the first line is whole
+    f.seek(offset - 1)
+    data = f.read(length + 1)
+    data = data[data.find(b"\n") + 1:] if offset > data_start else data[1:]
+
+    if offset + length < size:
+        data = data[:data.rfind(b"\n") + 1]
+    elif data and not data.endswith(b"\n"):
+        data += b"\n"
+    return data
+
+
+def sample_csv(path, rows=PREVIEW_SAMPLE_ROWS, blocks=PREVIEW_BLOCKS, seed=0):
+    """
+    Stratified block sample of a CSV: the file is cut into `blocks` equal
+    byte ranges and a run of whole lines is read from a random offset in
+    each, so about `rows` lines are parsed however large the file is.
+    Returns (sample, block number of each sampled row, estimated rows).
+    """
+    size = os.path.getsize(path)
+    rng = np.random.default_rng(seed)
+
+    with open(path, "rb") as f:
+        header = f.readline()
+        data_start = f.tell()
+        probe = f.read(_PROBE_BYTES)
+        line_bytes = len(probe) / max(probe.count(b"\n"), 1)
+
+        stratum = max((size - data_start) // blocks, 1)
+        length = min(int(rows / blocks * line_bytes) + 1, stratum)
+
+        parts = [_BLOCK_COLUMN.encode() + b"," + header]
+        sampled_bytes = sampled_lines = 0
+        for i in range(blocks):
+            start = data_start + i * stratum
+            if start >= size:
+                break
+            offset = start + int(rng.integers(0, stratum - length + 1))
+            data = _whole_lines(f, offset, length, data_start, size)
+            if not data:
+                continue
+
+            sampled_bytes += len(data)
+            sampled_lines += data.count(b"\n")
+            # Tag every line with its block for the interval estimates
+            prefix = f"{i},".encode()
+            parts.append(prefix + data[:-1].replace(b"\n", b"\n" + prefix) + b"\n")
+
+    # A block that starts inside a quoted multi-line value can yield a
+    # malformed line; skip those rather than fail the preview
+    sample = pd.read_csv(io.BytesIO(b"".join(parts)), on_bad_lines="skip")
+    block = sample.pop(_BLOCK_COLUMN).to_numpy()
+
+    estimated = round((size - data_start) * sampled_lines / sampled_bytes) if sampled_bytes else 0
+    return sample, block, max(estimated, len(sample))
+
+
+# ==========================
+# Intervals
+# ==========================
+def wilson_interval(successes, n, z=CONFIDENCE_Z):
+    """
+    Wilson score interval for a proportion; stays inside [0, 1] and is
+    not degenerate when nothing (or everything) was observed.
+    """
+    if n <= 0:
+        return 0.0, 1.0
+    p = successes / n
+    denominator = 1 + z * z / n
+    centre = (p + z * z / (2 * n)) / denominator
+    half = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / denominator
+    return max(0.0, centre - half), min(1.0, centre + half)
+
+
+def _effective_sizes(flags, block):
+    """
+    Sample size per column after the design effect of block sampling:
+    rows within a block are alike, so they count for less than
+    independent rows. flags is a rows x columns boolean frame.
+    """
+    n = len(flags)
+    grouped = flags.groupby(block)
+    counts = grouped.sum().to_numpy(dtype=np.float64)
+    sizes = grouped.size().to_numpy(dtype=np.float64)[:, None]
+    groups = len(sizes)
+
+    p = counts.sum(axis=0) / n
+    if groups < 2:
+        return np.full(len(p), float(n))
+
+    # Ratio-estimator variance of p over blocks vs. the binomial variance
+    cluster_var = groups / (groups - 1) * ((counts - p * sizes) ** 2).sum(axis=0) / n ** 2
+    binomial_var = p * (1 - p) / n
+    with np.errstate(divide="ignore", invalid="ignore"):
+        design_effect = np.where(binomial_var > 0, cluster_var / binomial_var, 1.0)
+    return n / np.maximum(design_effect, 1.0)
+
+
+def _estimates(flags, block, scale_rows):
+    """
+    {column: {"percent", "low", "high", "count"}}: share of flagged rows
+    with its interval, and the flagged count scaled to the whole file.
+    """
+    n = len(flags)
+    successes = flags.sum().to_numpy()
+    effective = _effective_sizes(flags, block)
+
+    result = {}
+    for col, hits, n_eff in zip(flags.columns, successes, effective):
+        p = float(hits / n) if n else 0.0
+        # The interval keeps the observed share, at the effective size
+        low, high = wilson_interval(p * n_eff, float(n_eff))
+        result[col] = {
+            "percent": round(100 * p, 2),
+            "low": round(100 * low, 2),
+            "high": round(100 * high, 2),
+            "count": round(p * scale_rows)
+        }
+    return result
+
+
+# ==========================
+# Preview
+# ==========================
+class PreviewReport:
+    """
+    Profile, correlations and trends estimated from a sample, with 95%
+    intervals on missing % and outlier share. The duplicate share is a
+    lower bound: a duplicate is only seen when both copies were sampled.
+    The profile's counts are scaled to the estimated size of the whole file.
+    """
+
+    def __init__(self, profile, sample_rows, estimated_rows, missing, outliers,
+                 duplicates, correlation=None, trends=None):
+        self.profile = profile
+        self.sample_rows = sample_rows
+        self.estimated_rows = estimated_rows
+        self.missing = missing              # {column: estimate}
+        self.outliers = outliers            # {column: estimate}
+        self.duplicates = duplicates        # lower-bound estimate
+        self.correlation = correlation
+        self.trends = trends
+
+    def to_dict(self):
+        return {
+            "sample_rows": self.sample_rows,
+            "estimated_rows": self.estimated_rows,
+            "confidence": CONFIDENCE,
+            "duplicates": self.duplicates
+        }
+
+
+def _scaled_profile(sample_profile, estimated, duplicates):
+    scale = estimated / max(sample_profile.rows, 1)
+    for c in sample_profile.columns.values():
+        c.rows = estimated
+        c.null_count = round(c.null_count * scale)
+        c.outlier_count = round(c.outlier_count * scale)
+
+    profile = DatasetProfile(estimated, sample_profile.columns, duplicate_count=duplicates)
+    profile.approximate = True
+    return profile
+
+
+@instrument("preview")
+def build_preview(path, rows=PREVIEW_SAMPLE_ROWS, blocks=PREVIEW_BLOCKS):
+    """
+    PreviewReport for a CSV from a stratified block sample. Its cost
+    depends on the sample size, not on the size of the file.
+    """
+    sample, block, estimated = sample_csv(path, rows, blocks)
+    sample_profile = build_profile(sample)
+    numeric = sample_profile.numeric_columns
+
+    # Statistics that need the sample itself, before counts are scaled
+    correlation = correlation_matrix(sample, numeric)
+    trends = analyze_trends(sample, sample_profile)
+
+    missing = _estimates(sample.isna(), block, estimated)
+    values = sample[numeric]
+    lower = pd.Series({c: sample_profile.column(c).lower for c in numeric}, dtype="float64")
+    upper = pd.Series({c: sample_profile.column(c).upper for c in numeric}, dtype="float64")
+    outliers = _estimates(values.lt(lower, axis=1) | values.gt(upper, axis=1), block, estimated)
+
+    # Copies that fall outside the sample go unseen, so the share found
+    # in the sample (and its interval) only bounds the true one from below
+    duplicate_flags = pd.DataFrame({"duplicates": np.asarray(sample_profile.duplicate_mask, dtype=bool)})
+    duplicates = _estimates(duplicate_flags, block, estimated)["duplicates"]
+    del duplicates["high"]
+    duplicates["lower_bound"] = True
+
+    profile = _scaled_profile(sample_profile, estimated, duplicates["count"])
+    return PreviewReport(profile, len(sample), estimated, missing, outliers, duplicates, correlation, trends)
@@ -1,48 +1,38 @@
-import pandas as pd
+from services.metrics_service import instrument
+from services.profile_service import build_profile
 
-def calculate_data_quality_score(df):
-    total_rows = len(df)
-    total_cells = df.shape[0] * df.shape[1]
+
+@instrument("scoring")
+def calculate_data_quality_score(df, profile=None):
+    profile = profile or build_profile(df)
+    total_rows = profile.rows
+    total_cells = profile.total_cells
 
     # ==========================
     # 1️⃣ Completeness (25)
     # ==========================
-    missing_cells = df.isnull().sum().sum()
+    missing_cells = profile.missing_cells
     completeness = max(0, 25 * (1 - missing_cells / total_cells))
 
     # ==========================
     # 2️⃣ Uniqueness (25)
     # ==========================
-    dup_rows = df.duplicated().sum()
+    dup_rows = profile.duplicate_count
     uniqueness = max(0, 25 * (1 - dup_rows / total_rows))
 
     # ==========================
     # 3️⃣ Consistency (25)
     # ==========================
-    inconsistent_cols = 0
-    for col in df.columns:
-        if df[col].dtype == "object":
-            try:
-                pd.to_numeric(df[col])
-                inconsistent_cols += 1
-            except:
-                pass
+    inconsistent_cols = sum(
+        1 for c in profile.columns.values() if c.numeric_coercible
+    )
 
-    consistency = max(0, 25 * (1 - inconsistent_cols / len(df.columns)))
+    consistency = max(0, 25 * (1 - inconsistent_cols / len(profile.columns)))
 
     # ==========================
     # 4️⃣ Validity (25) – Outliers
     # ==========================
-    outlier_cells = 0
-    numeric_cols = df.select_dtypes(include="number").columns
-
-    for col in numeric_cols:
-        q1 = df[col].quantile(0.25)
-        q3 = df[col].quantile(0.75)
-        iqr = q3 - q1
-        lower = q1 - 1.5 * iqr
-        upper = q3 + 1.5 * iqr
-        outlier_cells += ((df[col] < lower) | (df[col] > upper)).sum()
+    outlier_cells = profile.outlier_cells
 
     validity = max(0, 25 * (1 - outlier_cells / total_cells))
 
@@ -0,0 +1,235 @@
+import json
+import os
+import pickle
+import shutil
+import uuid
+
+import numpy as np
+import pandas as pd
+
+from services.dtype_service import read_csv_optimized, save_schema
+from services.metrics_service import instrument
+
+# "columnar" keeps a binary copy of every dataset next to its CSV;
+# "csv" disables it and reads everything with pd.read_csv
+STORAGE_FORMAT = os.environ.get("MDD_STORAGE_FORMAT", "columnar")
+
+COLUMNAR_EXT = ".cols"
+SCHEMA_FILE = "schema.json"
+PROFILE_EXT = ".profile.pkl"
+
+
+def columnar_enabled():
+    return STORAGE_FORMAT == "columnar"
+
+
+def columnar_path(csv_path):
+    """
+    Sidecar directory holding the columnar copy of a CSV.
+    """
+    return csv_path + COLUMNAR_EXT
+
+
+def is_columnar(path):
+    return os.path.isdir(path) and os.path.exists(os.path.join(path, SCHEMA_FILE))
+
+
+def _source_stamp(csv_path):
+    st = os.stat(csv_path)
+    return {"mtime_ns": st.st_mtime_ns, "size": st.st_size}
+
+
+# ==========================
+# Write
+# ==========================
+@instrument("write_columnar")
+def write_columnar(df, path, source=None):
+    """
+    Store df as one file per column: numeric and datetime columns as .npy
+    (memory-mappable), nullable integers as values + mask, categoricals as
+    codes + categories, everything else pickled.
+    """
+    # Unique staging directory: several processes may convert one file
+    tmp_path = f"{path}.tmp-{uuid.uuid4().hex}"
+    os.makedirs(tmp_path)
+
+    columns = []
+    for i, col in enumerate(df.columns):
+        series = df[col]
+        dtype = series.dtype
+        entry = {"name": col, "dtype": str(dtype)}
+
+        if isinstance(dtype, np.dtype) and dtype.kind in "biufc":
+            entry["kind"] = "npy"
+            entry["file"] = f"c{i}.npy"
+            np.save(os.path.join(tmp_path, entry["file"]), series.to_numpy())
+
+        elif isinstance(dtype, np.dtype) and dtype.kind == "M":
+            entry["kind"] = "datetime"
+            entry["file"] = f"c{i}.npy"
+            np.save(
+                os.path.join(tmp_path, entry["file"]),
+                series.to_numpy().view("i8")
+            )
+
+        elif isinstance(dtype, pd.api.extensions.ExtensionDtype) \
+                and pd.api.types.is_integer_dtype(dtype):
+            entry["kind"] = "masked"
+            entry["file"] = f"c{i}.npy"
+            entry["mask"] = f"c{i}.mask.npy"
+            np.save(
+                os.path.join(tmp_path, entry["file"]),
+                series.to_numpy(dtype=dtype.numpy_dtype, na_value=0)
+            )
+            np.save(os.path.join(tmp_path, entry["mask"]), series.isna().to_numpy())
+
+        elif isinstance(dtype, pd.CategoricalDtype):
+            entry["kind"] = "category"
+            entry["file"] = f"c{i}.npy"
+            entry["categories"] = f"c{i}.cats.pkl"
+            np.save(os.path.join(tmp_path, entry["file"]), series.cat.codes.to_numpy())
+            pd.to_pickle(dtype, os.path.join(tmp_path, entry["categories"]))
+
+        else:
+            entry["kind"] = "pickle"
+            entry["file"] = f"c{i}.pkl"
+            pd.to_pickle(
+                series.reset_index(drop=True),
+                os.path.join(tmp_path, entry["file"])
+            )
+
+        columns.append(entry)
+
+    schema = {"rows": len(df), "columns": columns, "source": source}
+    with open(os.path.join(tmp_path, SCHEMA_FILE), "w") as f:
+        json.dump(schema, f)
+
+    shutil.rmtree(path, ignore_errors=True)
+    try:
+        os.replace(tmp_path, path)
+    except OSError:
+        # Another writer got there first with the same contents
+        shutil.rmtree(tmp_path, ignore_errors=True)
+
+
+def convert_to_columnar(csv_path, df=None):
+    """
+    Write the columnar sidecar for a CSV, stamped with the CSV's mtime/size.
+    """
+    if df is None:
+        df = read_csv_optimized(csv_path)
+    else:
+        save_schema(csv_path, {col: str(dtype) for col, dtype in df.dtypes.items()})
+    write_columnar(df, columnar_path(csv_path), source=_source_stamp(csv_path))
+    return df
+
+
+def remove_columnar(csv_path):
+    shutil.rmtree(columnar_path(csv_path), ignore_errors=True)
+
+
+# ==========================
+# Read
+# ==========================
+def read_columnar(path):
+    """
+    Load a columnar dataset. Numeric columns are memory-mapped read-only.
+    """
+    with open(os.path.join(path, SCHEMA_FILE)) as f:
+        schema = json.load(f)
+
+    data = {}
+    for entry in schema["columns"]:
+        file_path = os.path.join(path, entry["file"])
+
+        if entry["kind"] == "npy":
+            data[entry["name"]] = np.asarray(np.load(file_path, mmap_mode="r"))
+        elif entry["kind"] == "datetime":
+            values = np.asarray(np.load(file_path, mmap_mode="r"))
+            data[entry["name"]] = values.view(entry["dtype"])
+        elif entry["kind"] == "masked":
+            values = np.load(file_path)
+            mask = np.load(os.path.join(path, entry["mask"]))
+            data[entry["name"]] = pd.arrays.IntegerArray(values, mask)
+        elif entry["kind"] == "category":
+            codes = np.load(file_path)
+            dtype = pd.read_pickle(os.path.join(path, entry["categories"]))
+            data[entry["name"]] = pd.Categorical.from_codes(codes, dtype=dtype)
+        else:
+            data[entry["name"]] = pd.read_pickle(file_path)
+
+    return pd.DataFrame(data, copy=False)
+
+
+def _sidecar_is_fresh(csv_path):
+    path = columnar_path(csv_path)
+    if not is_columnar(path):
+        return False
+
+    with open(os.path.join(path, SCHEMA_FILE)) as f:
+        source = json.load(f).get("source")
+    return source == _source_stamp(csv_path)
+
+
+@instrument("read_dataset")
+def read_dataset(path):
+    """
+    Read a dataset from a CSV or a columnar directory. CSVs are served from
+    their sidecar when it is up to date, and converted once otherwise.
+    """
+    if is_columnar(path):
+        return read_columnar(path)
+
+    if not columnar_enabled():
+        return read_csv_optimized(path)
+
+    if _sidecar_is_fresh(path):
+        return read_columnar(columnar_path(path))
+
+    convert_to_columnar(path)
+    return read_columnar(columnar_path(path))
+
+
+# ==========================
+# Profiles
+# ==========================
+def profile_path(csv_path):
+    """
+    Sidecar file holding the exact profile of a large CSV.
+    """
+    return csv_path + PROFILE_EXT
+
+
+def save_profile(csv_path, profile, exact=True):
+    """
+    Persist a profile next to its CSV, stamped with the CSV's mtime/size,
+    so other processes (and restarts) never profile the file again.
+    exact=False marks a one-pass profile (estimated outlier counts) that
+    the exact profile still has to replace.
+    """
+    path = profile_path(csv_path)
+    tmp_path = f"{path}.tmp-{uuid.uuid4().hex}"
+    pd.to_pickle({"source": _source_stamp(csv_path), "profile": profile, "exact": exact}, tmp_path)
+    os.replace(tmp_path, path)
+
+
+def load_profile(csv_path, exact=True):
+    """
+    The saved profile of csv_path, or None if there is none for this
+    version of the file. With exact=False a one-pass profile is returned
+    too.
+    """
+    path = profile_path(csv_path)
+    if not os.path.exists(path):
+        return None
+
+    try:
+        saved = pd.read_pickle(path)
+    except (OSError, EOFError, pickle.UnpicklingError):
+        return None
+
+    if saved["source"] != _source_stamp(csv_path):
+        return None
+    if exact and not saved.get("exact", True):
+        return None
+    return saved["profile"]
@@ -0,0 +1,338 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from services.duplicate_service import DuplicateCounter, choose_mode, estimate_rows
+from services.metrics_service import instrument
+from services.profile_service import ColumnProfile, DatasetProfile, is_text_dtype
+from services.type_inference_service import ColumnTypes, infer_types
+
+# Files above this size are profiled chunk by chunk instead of loaded whole
+STREAMING_THRESHOLD_BYTES = int(
+    os.environ.get("MDD_STREAMING_THRESHOLD_BYTES", 512 * 1024 * 1024)
+)
+CHUNK_ROWS = int(os.environ.get("MDD_CHUNK_ROWS", 200_000))
+
+
+def is_large(path):
+    return os.path.isfile(path) and os.path.getsize(path) > STREAMING_THRESHOLD_BYTES
+
+
+# ==========================
+# Quantile sketch
+# ==========================
+class QuantileSketch:
+    """
+    Mergeable KLL-style quantile sketch. Items on level h carry weight 2**h;
+    a full level is sorted and every other item is promoted.
+    """
+
+    def __init__(self, k=1000, seed=0):
+        self.k = k
+        self.levels = [np.empty(0)]
+        self.count = 0
+        self._rng = np.random.default_rng(seed)
+
+    def _capacity(self, level):
+        depth = len(self.levels) - level - 1
+        return max(8, int(self.k * (2 / 3) ** depth))
+
+    def _compress(self):
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) > self._capacity(level):
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+
+                items = np.sort(items)
+                rest, items = items[:len(items) % 2], items[len(items) % 2:]
+                promoted = items[self._rng.integers(2)::2]
+
+                self.levels[level] = rest
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+            level += 1
+
+    def update(self, values):
+        values = np.asarray(values, dtype=float)
+        values = values[~np.isnan(values)]
+        if not len(values):
+            return
+
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self.count += len(values)
+        self._compress()
+
+    def merge(self, other):
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.count += other.count
+        self._compress()
+
+    @property
+    def exact(self):
+        return all(not len(items) for items in self.levels[1:])
+
+    def _weighted(self):
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([
+            np.full(len(level_items), 2.0 ** level)
+            for level, level_items in enumerate(self.levels)
+        ])
+        order = np.argsort(items, kind="stable")
+        return items[order], weights[order]
+
+    def quantile(self, q):
+        if not self.count:
+            return np.nan
+        if self.exact:
+            return float(np.quantile(self.levels[0], q))
+
+        items, weights = self._weighted()
+        cumulative = np.cumsum(weights)
+        idx = np.searchsorted(cumulative, q * cumulative[-1], side="left")
+        return float(items[min(idx, len(items) - 1)])
+
+    def count_below(self, x):
+        items, weights = self._weighted()
+        return float(weights[items < x].sum())
+
+    def count_above(self, x):
+        items, weights = self._weighted()
+        return float(weights[items > x].sum())
+
+
+# ==========================
+# Streaming profiler
+# ==========================
+class StreamingProfiler:
+    """
+    Build a DatasetProfile from DataFrame chunks using only mergeable
+    statistics: counts, Chan/Welford moments, min/max and quantile sketches.
+    """
+
+    def __init__(self, duplicate_mode="exact", expected_rows=1_000_000):
+        self.rows = 0
+        self.columns = None
+        self.kinds = {}             # name -> set of per-chunk kinds
+        self.dtypes = {}            # name -> list of per-chunk dtypes
+        self.null_counts = {}
+        self.types = {}             # name -> merged ColumnTypes of text chunks
+        self.moments = {}           # name -> [n, mean, m2, min, max]
+        self.sketches = {}
+
+        self.duplicates = DuplicateCounter(duplicate_mode, expected_rows)
+
+        # Pairwise co-moment sums for the correlation matrix
+        self.corr_columns = None
+        self.corr_shift = None
+        self.corr_sums = None
+
+    def update(self, chunk):
+        """
+        Fold one chunk into the running statistics. Returns the mask of
+        rows that duplicate an earlier row, so callers can drop them.
+        """
+        if self.columns is None:
+            self.columns = chunk.columns.tolist()
+            for col in self.columns:
+                self.kinds[col] = set()
+                self.dtypes[col] = []
+                self.null_counts[col] = 0
+                self.types[col] = ColumnTypes()
+
+        self.rows += len(chunk)
+        numeric_cols = set(chunk.select_dtypes(include="number").columns)
+        null_counts = chunk.isna().sum()
+
+        for col in self.columns:
+            series = chunk[col]
+            non_null = len(series) - int(null_counts[col])
+            self.null_counts[col] += int(null_counts[col])
+            self.dtypes[col].append(series.dtype)
+
+            if col in numeric_cols:
+                self.kinds[col].add("number")
+                self.types[col].merge(
+                    ColumnTypes(non_null, {"numeric": non_null})
+                )
+                self._update_moments(col, series)
+            elif is_text_dtype(series.dtype):
+                self.kinds[col].add("text")
+                self.types[col].merge(infer_types(series))
+            else:
+                self.kinds[col].add("other")
+
+        self._update_correlation(chunk, numeric_cols)
+        return self.duplicates.add_frame(chunk)
+
+    def _update_moments(self, col, series):
+        values = series.to_numpy(dtype=float, na_value=np.nan)
+        values = values[~np.isnan(values)]
+        if col not in self.moments:
+            self.moments[col] = [0, 0.0, 0.0, np.nan, np.nan]
+            self.sketches[col] = QuantileSketch()
+        if not len(values):
+            return
+
+        n_b = len(values)
+        mean_b = float(values.mean())
+        m2_b = float(((values - mean_b) ** 2).sum())
+
+        state = self.moments[col]
+        n_a, mean_a, m2_a = state[0], state[1], state[2]
+        n = n_a + n_b
+        delta = mean_b - mean_a
+
+        state[0] = n
+        state[1] = mean_a + delta * n_b / n
+        state[2] = m2_a + m2_b + delta ** 2 * n_a * n_b / n
+        state[3] = np.fmin(state[3], values.min())
+        state[4] = np.fmax(state[4], values.max())
+
+        self.sketches[col].update(values)
+
+    def _update_correlation(self, chunk, numeric_cols):
+        if self.corr_columns is None:
+            self.corr_columns = [c for c in self.columns if c in numeric_cols]
+            k = len(self.corr_columns)
+            self.corr_shift = np.nan_to_num(
+                chunk[self.corr_columns].mean().to_numpy(dtype=float)
+            )
+            self.corr_sums = {
+                name: np.zeros((k, k)) for name in ("n", "sx", "sxx", "sxy")
+            }
+
+        if not self.corr_columns:
+            return
+
+        x = np.column_stack([
+            pd.to_numeric(chunk[col], errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+            for col in self.corr_columns
+        ]) - self.corr_shift
+        present = ~np.isnan(x)
+        x0 = np.where(present, x, 0.0)
+        mask = present.astype(float)
+
+        sums = self.corr_sums
+        sums["n"] += mask.T @ mask
+        sums["sx"] += x0.T @ mask
+        sums["sxx"] += (x0 ** 2).T @ mask
+        sums["sxy"] += x0.T @ x0
+
+    def _correlation(self, numeric_cols):
+        keep = [i for i, col in enumerate(self.corr_columns) if col in numeric_cols]
+        names = [self.corr_columns[i] for i in keep]
+        sums = {name: s[np.ix_(keep, keep)] for name, s in self.corr_sums.items()}
+
+        n, sx, sxx, sxy = sums["n"], sums["sx"], sums["sxx"], sums["sxy"]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            cov = sxy - sx * sx.T / n
+            var_x = sxx - sx ** 2 / n
+            var_y = var_x.T
+            corr = cov / np.sqrt(var_x * var_y)
+
+        valid = (n >= 2) & (var_x > 0) & (var_y > 0)
+        corr = np.where(valid, np.clip(corr, -1.0, 1.0), np.nan)
+        np.fill_diagonal(corr, np.where(np.diag(valid), 1.0, np.nan))
+
+        return pd.DataFrame(corr, index=names, columns=names)
+
+    def finish(self):
+        columns = {}
+        numeric_cols = []
+
+        for col in self.columns or []:
+            kinds = self.kinds[col]
+            dtypes = self.dtypes[col]
+
+            if kinds == {"number"}:
+                dtype = str(np.result_type(*dtypes))
+            else:
+                kind = "text" if "text" in kinds else "other"
+                dtype = str(next(
+                    d for d in dtypes
+                    if (kind == "text") == is_text_dtype(d)
+                ))
+
+            c = ColumnProfile(col, dtype, self.rows, self.null_counts[col])
+            columns[col] = c
+
+            if kinds == {"number"}:
+                numeric_cols.append(col)
+                self._finish_numeric(c)
+            elif "text" in kinds:
+                c.is_text = True
+                c.types = self.types[col]
+
+        profile = DatasetProfile(
+            self.rows, columns, duplicate_count=self.duplicates.duplicates
+        )
+        if self.corr_columns is not None:
+            profile.correlation = self._correlation(numeric_cols)
+        profile.approximate = True
+        return profile
+
+    def _finish_numeric(self, c):
+        n, mean, m2, lo, hi = self.moments[c.name]
+        sketch = self.sketches[c.name]
+
+        c.is_numeric = True
+        c.min = float(lo)
+        c.max = float(hi)
+        c.mean = float(mean) if n else float("nan")
+        c.var = float(m2 / (n - 1)) if n > 1 else float("nan")
+        c.q1 = sketch.quantile(0.25)
+        c.median = sketch.quantile(0.5)
+        c.q3 = sketch.quantile(0.75)
+
+        iqr = c.q3 - c.q1
+        c.lower = c.q1 - 1.5 * iqr
+        c.upper = c.q3 + 1.5 * iqr
+
+        # Rank estimates from the sketch; exact when nothing lies outside
+        below = sketch.count_below(c.lower) if c.lower > c.min else 0
+        above = sketch.count_above(c.upper) if c.upper < c.max else 0
+        c.outlier_count = int(round(below + above))
+
+
+@instrument("stream_profile")
+def stream_profile(path, chunksize=CHUNK_ROWS, exact_outliers=True, duplicate_mode=None):
+    """
+    Profile a CSV without loading it whole. With exact_outliers a second
+    pass over the numeric columns counts values outside the IQR bounds.
+    """
+    expected_rows = estimate_rows(path)
+    profiler = StreamingProfiler(
+        duplicate_mode or choose_mode(expected_rows), expected_rows
+    )
+    for chunk in pd.read_csv(path, chunksize=chunksize):
+        profiler.update(chunk)
+    profile = profiler.finish()
+
+    if exact_outliers:
+        count_outliers(path, profile, chunksize)
+    return profile
+
+
+def count_outliers(path, profile, chunksize=CHUNK_ROWS):
+    """
+    Replace a one-pass profile's estimated outlier counts with exact ones,
+    in one pass over the numeric columns of path.
+    """
+    numeric_cols = profile.numeric_columns
+    if not numeric_cols:
+        return profile
+
+    counts = dict.fromkeys(numeric_cols, 0)
+    for chunk in pd.read_csv(path, chunksize=chunksize, usecols=numeric_cols):
+        for col in numeric_cols:
+            c = profile.column(col)
+            series = chunk[col]
+            counts[col] += int(((series < c.lower) | (series > c.upper)).sum())
+    for col, count in counts.items():
+        profile.column(col).outlier_count = count
+    return profile
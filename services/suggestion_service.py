@@ -1,20 +1,21 @@
-import pandas as pd
+from services.metrics_service import instrument
+from services.profile_service import build_profile
 
-def generate_cleaning_suggestions(df):
-    suggestions = []
 
-    total_rows = len(df)
+@instrument("suggestions")
+def generate_cleaning_suggestions(df, profile=None):
+    profile = profile or build_profile(df)
+    suggestions = []
 
     # ==========================
     # 1️⃣ Missing Values
     # ==========================
-    missing_percent = (df.isnull().sum() / total_rows) * 100
-
-    for col, pct in missing_percent.items():
+    for col, c in profile.columns.items():
+        pct = c.missing_percent
         if pct > 0:
             severity = "high" if pct > 20 else "medium"
 
-            strategy = "median" if df[col].dtype != "object" else "mode"
+            strategy = "median" if c.is_numeric else "mode"
 
             suggestions.append({
                 "column": col,
@@ -27,7 +28,7 @@ def generate_cleaning_suggestions(df):
     # ==========================
     # 2️⃣ Duplicate Rows
     # ==========================
-    dup_count = df.duplicated().sum()
+    dup_count = profile.duplicate_count
     if dup_count > 0:
         suggestions.append({
             "column": "ALL",
@@ -40,41 +41,44 @@ def generate_cleaning_suggestions(df):
     # ==========================
     # 3️⃣ Data Type Issues
     # ==========================
-    for col in df.columns:
-        if df[col].dtype == "object":
-            try:
-                pd.to_numeric(df[col])
-                suggestions.append({
-                    "column": col,
-                    "issue": "datatype",
-                    "severity": "medium",
-                    "message": f"Column '{col}' looks numeric but is stored as text.",
-                    "recommendation": "Convert column to numeric type."
-                })
-            except:
-                pass
+    for col, c in profile.columns.items():
+        if c.numeric_coercible:
+            pct = c.types.fraction("numeric") * 100
+            suggestions.append({
+                "column": col,
+                "issue": "datatype",
+                "severity": "medium",
+                "message": (
+                    f"Column '{col}' looks numeric but is stored as text "
+                    f"({pct:.1f}% of values parse as numbers)."
+                ),
+                "recommendation": "Convert column to numeric type."
+            })
+        elif c.date_coercible:
+            pct = c.types.fraction("date") * 100
+            suggestions.append({
+                "column": col,
+                "issue": "datatype",
+                "severity": "low",
+                "message": (
+                    f"Column '{col}' looks like dates stored as text "
+                    f"({pct:.1f}% of values parse as dates)."
+                ),
+                "recommendation": "Convert column to datetime type."
+            })
 
     # ==========================
     # 4️⃣ Outliers (IQR)
     # ==========================
-    numeric_cols = df.select_dtypes(include="number").columns
-
-    for col in numeric_cols:
-        q1 = df[col].quantile(0.25)
-        q3 = df[col].quantile(0.75)
-        iqr = q3 - q1
-
-        lower = q1 - 1.5 * iqr
-        upper = q3 + 1.5 * iqr
-
-        outliers = df[(df[col] < lower) | (df[col] > upper)]
+    for col in profile.numeric_columns:
+        outliers = profile.column(col).outlier_count
 
-        if len(outliers) > 0:
+        if outliers > 0:
             suggestions.append({
                 "column": col,
                 "issue": "outliers",
                 "severity": "medium",
-                "message": f"Column '{col}' contains {len(outliers)} outliers.",
+                "message": f"Column '{col}' contains {outliers} outliers.",
                 "recommendation": "Consider capping or removing outliers using IQR."
             })
 
@@ -1,5 +1,528 @@
-def detect_trends_and_insights(df):
-    insights = []
-    for col in df.select_dtypes(include="number").columns:
-        insights.append(f"{col} analyzed for trends.")
-    return insights
+import os
+import warnings
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+from pandas.tseries.api import guess_datetime_format
+
+from services.metrics_service import instrument
+from services.profile_service import build_profile
+
+# Rows handed to the accumulator at a time
+TREND_CHUNK_ROWS = int(os.environ.get("MDD_CHUNK_ROWS", 200_000))
+
+# Rolling means are tumbling windows over row order; the window doubles as
+# rows arrive so at most 2 * TREND_POINTS means are kept per column
+TREND_POINTS = int(os.environ.get("MDD_TREND_POINTS", 200))
+
+# A column is trending when the fitted change over its span is at least
+# TREND_MIN_EFFECT standard deviations and |r| reaches TREND_MIN_R
+TREND_MIN_EFFECT = 0.25
+TREND_MIN_R = 0.1
+
+# Level shifts (on top of the trend line) smaller than CHANGE_MIN_EFFECT
+# standard deviations, or with a t statistic below CHANGE_MIN_T, are noise
+CHANGE_MIN_EFFECT = 0.5
+CHANGE_MIN_T = 5.0
+MAX_CHANGE_POINTS = 3
+
+# Share of the detrended variance a calendar period must explain
+SEASONAL_MIN_STRENGTH = 0.1
+
+# period: (slots, minimum span in days before it is tested, slot labels)
+SEASONS = {
+    "hour": (24, 2, [f"{h:02d}:00" for h in range(24)]),
+    "weekday": (7, 14, ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]),
+    "month": (12, 730, ["Jan", "Feb", "Mar", "Apr", "May", "Jun",
+                        "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"])
+}
+
+SEASON_NAMES = {"hour": "time-of-day", "weekday": "day-of-week", "month": "month-of-year"}
+
+_DAY_NS = 86_400 * 10**9
+
+
+# ==========================
+# Ordering
+# ==========================
+def find_time_column(profile):
+    """
+    First datetime column, or text column that parses as dates; None when
+    rows can only be ordered by position.
+    """
+    for col, c in profile.columns.items():
+        if c.dtype.startswith("datetime"):
+            return col
+    for col, c in profile.columns.items():
+        if c.date_coercible:
+            return col
+    return None
+
+
+def date_format(values):
+    """
+    strftime format that parses the most of a sample of date strings.
+    The sample is spread over all of values: leading rows often share a
+    day, which leaves day-first and month-first formats indistinguishable.
+    """
+    values = values.dropna()
+    spread = np.unique(np.linspace(0, len(values) - 1, min(len(values), 200)).astype(int))
+    sample = pd.Series(pd.unique(values.iloc[spread].astype(str)))
+    formats = Counter()
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", UserWarning)
+        for value in sample:
+            fmt = guess_datetime_format(value)
+            if fmt:
+                formats[fmt] += 1
+
+    # Day-first and month-first guesses compete; keep whichever parses more
+    best, best_parsed = None, -1
+    for fmt, _ in formats.most_common(3):
+        parsed = pd.to_datetime(sample, format=fmt, errors="coerce").notna().sum()
+        if parsed > best_parsed:
+            best, best_parsed = fmt, parsed
+    return best
+
+
+def parse_times(series, fmt=None):
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        series = series.astype(str)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", UserWarning)
+        return pd.to_datetime(series, format=fmt, errors="coerce")
+
+
+def _ordering(chunk, time_column, fmt, position):
+    """
+    (x, times, keep) for a chunk: days since the epoch when there is a time
+    column, row position otherwise. keep masks out rows with no timestamp.
+    """
+    if time_column is None:
+        return position + np.arange(len(chunk), dtype=np.float64), None, None
+
+    times = parse_times(chunk[time_column], fmt)
+    keep = times.notna().to_numpy()
+    times = pd.DatetimeIndex(times[keep]).as_unit("ns")
+    return times.asi8.astype(np.float64) / _DAY_NS, times, keep
+
+
+# ==========================
+# Accumulator
+# ==========================
+class TrendAccumulator:
+    """
+    One pass over numeric columns in row order, chunk by chunk. Keeps the
+    regression sums, tumbling-window sums and calendar-slot sums for every
+    column at once; each update is a few array operations over the chunk,
+    so memory stays flat and time stays linear in the number of rows.
+    """
+
+    def __init__(self, columns, timed=False):
+        self.columns = list(columns)
+        self.timed = timed
+        k = len(self.columns)
+
+        self.rows = 0
+        self.ordered = True
+        self.origin = None      # first x seen; x is kept relative to it
+        self.shift = None       # per-column offset so sums stay well conditioned
+        self.x_min = np.inf
+        self.x_max = -np.inf
+        self._last_x = -np.inf
+
+        self.n = np.zeros(k)
+        self.sx = np.zeros(k)
+        self.sy = np.zeros(k)
+        self.sxx = np.zeros(k)
+        self.sxy = np.zeros(k)
+        self.syy = np.zeros(k)
+
+        self.window = 1
+        self.bucket_sums = np.zeros((0, k))
+        self.bucket_counts = np.zeros((0, k))
+        self.bucket_xsums = np.zeros((0, k))
+        self.bucket_x = np.zeros(0)
+
+        self.season_sums = {p: np.zeros((s, k)) for p, (s, _, _) in SEASONS.items()}
+        self.season_counts = {p: np.zeros((s, k)) for p, (s, _, _) in SEASONS.items()}
+        self.season_xsums = {p: np.zeros((s, k)) for p, (s, _, _) in SEASONS.items()}
+
+    def _grow(self, buckets):
+        pad = np.zeros((buckets, len(self.columns)))
+        self.bucket_sums = np.vstack([self.bucket_sums, pad])
+        self.bucket_counts = np.vstack([self.bucket_counts, pad])
+        self.bucket_xsums = np.vstack([self.bucket_xsums, pad])
+        self.bucket_x = np.append(self.bucket_x, np.full(buckets, np.nan))
+
+    def _coarsen(self):
+        """
+        Merge neighbouring windows, doubling the window size.
+        """
+        if len(self.bucket_x) % 2:
+            self._grow(1)
+        self.bucket_sums = self.bucket_sums[0::2] + self.bucket_sums[1::2]
+        self.bucket_counts = self.bucket_counts[0::2] + self.bucket_counts[1::2]
+        self.bucket_xsums = self.bucket_xsums[0::2] + self.bucket_xsums[1::2]
+        self.bucket_x = self.bucket_x[0::2]
+        self.window *= 2
+
+    def update(self, values, x, times=None):
+        """
+        values: (rows, columns) floats with NaN for missing; x: each row's
+        position on the ordering axis; times: the rows' DatetimeIndex, when
+        timed, for calendar seasonality.
+        """
+        n = len(values)
+        if not n:
+            return
+
+        if self.origin is None:
+            self.origin = float(x[0])
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore", RuntimeWarning)
+                self.shift = np.nan_to_num(np.nanmean(values, axis=0))
+        x = x - self.origin
+
+        if x[0] < self._last_x or np.any(np.diff(x) < 0):
+            self.ordered = False
+        self._last_x = x[-1]
+        self.x_min = min(self.x_min, float(x.min()))
+        self.x_max = max(self.x_max, float(x.max()))
+
+        present = ~np.isnan(values)
+        mask = present.astype(np.float64)
+        y = np.where(present, values - self.shift, 0.0)
+        xm = x[:, None] * mask
+
+        # Regression sums
+        self.n += mask.sum(axis=0)
+        self.sx += xm.sum(axis=0)
+        self.sxx += x @ xm
+        self.sy += y.sum(axis=0)
+        self.sxy += x @ y
+        self.syy += (y * y).sum(axis=0)
+
+        # Tumbling windows over row position
+        positions = self.rows + np.arange(n)
+        while positions[-1] // self.window >= 2 * TREND_POINTS:
+            self._coarsen()
+
+        first = self.rows // self.window
+        last = positions[-1] // self.window
+        starts = np.flatnonzero(positions % self.window == 0)
+        if not len(starts) or starts[0] != 0:
+            starts = np.concatenate([[0], starts])
+        if last + 1 > len(self.bucket_x):
+            self._grow(last + 1 - len(self.bucket_x))
+
+        self.bucket_sums[first:last + 1] += np.add.reduceat(y, starts, axis=0)
+        self.bucket_counts[first:last + 1] += np.add.reduceat(mask, starts, axis=0)
+        self.bucket_xsums[first:last + 1] += np.add.reduceat(xm, starts, axis=0)
+        opened = positions[starts] % self.window == 0
+        self.bucket_x[positions[starts][opened] // self.window] = x[starts][opened]
+
+        # Calendar slots: weighted bincounts per column
+        if times is not None:
+            codes = {
+                "hour": times.hour,
+                "weekday": times.dayofweek,
+                "month": times.month - 1
+            }
+            for period, code in codes.items():
+                code = np.asarray(code)
+                slots = SEASONS[period][0]
+                for j in range(len(self.columns)):
+                    self.season_sums[period][:, j] += np.bincount(code, y[:, j], slots)
+                    self.season_counts[period][:, j] += np.bincount(code, mask[:, j], slots)
+                    self.season_xsums[period][:, j] += np.bincount(code, xm[:, j], slots)
+
+        self.rows += n
+
+    # ==========================
+    # Results
+    # ==========================
+    def _label(self, x):
+        if not self.timed:
+            return int(round(x + self.origin))
+        stamp = pd.Timestamp(int(round((x + self.origin) * _DAY_NS)))
+        return stamp.strftime("%Y-%m-%d %H:%M").removesuffix(" 00:00")
+
+    @staticmethod
+    def _change_points(resid, counts, sigma):
+        """
+        Binary segmentation over window means of the detrended series:
+        split where the two sides differ most, while the shift is
+        significant and is a step at the split rather than a slow bend
+        (the few windows either side of it must differ too). Returns
+        (start, split, stop) triples.
+        """
+        found = []
+        segments = [(0, len(resid))]
+        near = max(3, len(resid) // 20)
+        while segments and len(found) < MAX_CHANGE_POINTS:
+            a, b = segments.pop(0)
+            if b - a < 4:
+                continue
+            w = counts[a:b]
+            s = np.cumsum(resid[a:b] * w)
+            c = np.cumsum(w)
+            n_left, n_right = c[:-1], c[-1] - c[:-1]
+            diff = np.abs(s[:-1] / n_left - (s[-1] - s[:-1]) / n_right)
+            t = diff / (sigma * np.sqrt(1 / n_left + 1 / n_right))
+            split = int(np.argmax(t))
+            if t[split] < CHANGE_MIN_T:
+                continue
+
+            at = a + split + 1
+            lo, hi = max(a, at - near), min(b, at + near)
+            step = np.average(resid[at:hi], weights=counts[at:hi]) \
+                - np.average(resid[lo:at], weights=counts[lo:at])
+            if abs(step) < CHANGE_MIN_EFFECT * sigma:
+                continue
+            found.append((a, at, b))
+            segments += [(a, at), (at, b)]
+        return sorted(found, key=lambda f: f[1])
+
+    def _seasonality(self, j, intercept, slope, resid_ss):
+        """
+        Calendar period whose slot means explain the largest share of the
+        detrended variance, if any explains enough.
+        """
+        best = None
+        span = self.x_max - self.x_min
+        for period, (_, min_days, labels) in SEASONS.items():
+            if not self.timed or span < min_days or resid_ss <= 0:
+                continue
+            counts = self.season_counts[period][:, j]
+            used = counts > 0
+            if used.sum() < 2:
+                continue
+            resid = self.season_sums[period][used, j] - intercept * counts[used] \
+                - slope * self.season_xsums[period][used, j]
+            strength = float((resid ** 2 / counts[used]).sum()) / resid_ss
+            if strength >= SEASONAL_MIN_STRENGTH and (best is None or strength > best["strength"]):
+                peak = np.flatnonzero(used)[int(np.argmax(resid / counts[used]))]
+                best = {"period": period, "strength": round(strength, 3), "peak": labels[peak]}
+        return best
+
+    def finish(self, time_column=None):
+        report = TrendReport(time_column, self.ordered, self.rows)
+        if self.origin is None:
+            return report
+
+        for j, col in enumerate(self.columns):
+            n = self.n[j]
+            if n < 3:
+                continue
+
+            sxx = self.sxx[j] - self.sx[j] ** 2 / n
+            sxy = self.sxy[j] - self.sx[j] * self.sy[j] / n
+            syy = self.syy[j] - self.sy[j] ** 2 / n
+            if sxx <= 0 or syy <= 1e-12 * n:
+                continue
+
+            slope = sxy / sxx
+            intercept = (self.sy[j] - slope * self.sx[j]) / n
+            r = sxy / np.sqrt(sxx * syy)
+            sigma = np.sqrt(syy / (n - 1))
+            resid_ss = max(syy - slope * sxy, 0.0)
+            resid_sigma = np.sqrt(resid_ss / max(n - 2, 1))
+
+            effect = abs(slope) * (self.x_max - self.x_min) / sigma
+            if effect >= TREND_MIN_EFFECT and abs(r) >= TREND_MIN_R:
+                direction = "increasing" if slope > 0 else "decreasing"
+            else:
+                direction = "flat"
+
+            # Window means only describe the series when rows are in order
+            rolling, changes = [], []
+            if self.ordered:
+                used = self.bucket_counts[:, j] > 0
+                counts = self.bucket_counts[used, j]
+                means = self.bucket_sums[used, j] / counts
+                labels = [self._label(x) for x in self.bucket_x[used]]
+                rolling = [[label, round(float(m + self.shift[j]), 4)] for label, m in zip(labels, means)]
+
+                fitted = intercept + slope * self.bucket_xsums[used, j] / counts
+                if resid_sigma > 0:
+                    for a, split, b in self._change_points(means - fitted, counts, resid_sigma):
+                        before = np.average(means[a:split], weights=counts[a:split])
+                        after = np.average(means[split:b], weights=counts[split:b])
+                        changes.append({
+                            "at": labels[split],
+                            "before": round(float(before + self.shift[j]), 4),
+                            "after": round(float(after + self.shift[j]), 4)
+                        })
+
+            report.columns[col] = ColumnTrend(
+                column=col,
+                count=int(n),
+                mean=float(self.sy[j] / n + self.shift[j]),
+                slope=float(slope),
+                unit="per day" if self.timed else "per row",
+                r=float(r),
+                direction=direction,
+                window=self.window,
+                rolling=rolling,
+                change_points=changes,
+                seasonality=self._seasonality(j, intercept, slope, resid_ss),
+                start=self._label(self.x_min),
+                end=self._label(self.x_max)
+            )
+        return report
+
+
+class ColumnTrend:
+    def __init__(self, column, count, mean, slope, unit, r, direction, window,
+                 rolling, change_points, seasonality, start, end):
+        self.column = column
+        self.count = count
+        self.mean = mean
+        self.slope = slope
+        self.unit = unit
+        self.r = r
+        self.direction = direction
+        self.window = window
+        self.rolling = rolling
+        self.change_points = change_points
+        self.seasonality = seasonality
+        self.start = start
+        self.end = end
+
+    def insights(self):
+        if self.direction == "flat":
+            lines = [f"{self.column} shows no clear trend (mean {self.mean:.4g})."]
+        else:
+            lines = [
+                f"{self.column} is {self.direction} ({self.slope:+.4g} {self.unit}, "
+                f"r = {self.r:.2f}) from {self.start} to {self.end}."
+            ]
+        for change in self.change_points:
+            lines.append(
+                f"{self.column} shifts level around {change['at']}: "
+                f"{change['before']:.4g} -> {change['after']:.4g}."
+            )
+        if self.seasonality:
+            s = self.seasonality
+            lines.append(
+                f"{self.column} follows a {SEASON_NAMES[s['period']]} pattern, peaking at {s['peak']} "
+                f"({s['strength']:.0%} of the variance around the trend)."
+            )
+        return lines
+
+    def to_dict(self):
+        return {
+            "column": self.column,
+            "count": self.count,
+            "mean": round(self.mean, 4),
+            "slope": self.slope,
+            "unit": self.unit,
+            "r": round(self.r, 4),
+            "direction": self.direction,
+            "window": self.window,
+            "rolling": self.rolling,
+            "change_points": self.change_points,
+            "seasonality": self.seasonality,
+            "start": self.start,
+            "end": self.end
+        }
+
+
+class TrendReport:
+    """
+    Per-column trends of a dataset, ordered by time_column (or by row
+    position when it is None).
+    """
+
+    def __init__(self, time_column=None, ordered=True, rows=0):
+        self.time_column = time_column
+        self.ordered = ordered
+        self.rows = rows
+        self.columns = {}
+
+    def ordering(self):
+        if self.time_column is None:
+            return "No date column found; trends follow row order."
+        if self.ordered:
+            return f"Rows ordered by '{self.time_column}'."
+        return f"Rows are not sorted by '{self.time_column}'; rolling means and change points were skipped."
+
+    def insights(self):
+        lines = [self.ordering()]
+        for trend in self.columns.values():
+            lines += trend.insights()
+        return lines
+
+    def to_dict(self):
+        return {
+            "time_column": self.time_column,
+            "ordered": self.ordered,
+            "rows": self.rows,
+            "columns": {col: t.to_dict() for col, t in self.columns.items()}
+        }
+
+
+# ==========================
+# Entry points
+# ==========================
+@instrument("trends")
+def analyze_trends(df, profile=None, columns=None, chunksize=TREND_CHUNK_ROWS):
+    """
+    TrendReport for df's numeric columns (or the given ones). Rows are put
+    in time order first when there is a date column.
+    """
+    profile = profile or build_profile(df)
+    columns = [c for c in (columns or profile.numeric_columns) if c in df.columns]
+    time_column = find_time_column(profile)
+
+    if time_column is not None:
+        fmt = None if pd.api.types.is_datetime64_any_dtype(df[time_column]) else date_format(df[time_column])
+        times = parse_times(df[time_column], fmt)
+        if times.notna().sum() < 3:
+            time_column = None
+        else:
+            df = df.assign(**{time_column: times})
+            if not times.is_monotonic_increasing:
+                df = df.sort_values(time_column, kind="stable", na_position="last")
+
+    acc = TrendAccumulator(columns, timed=time_column is not None)
+    for start in range(0, len(df), chunksize):
+        chunk = df.iloc[start:start + chunksize]
+        x, times, keep = _ordering(chunk, time_column, None, start)
+        values = chunk[columns].to_numpy(dtype=np.float64, na_value=np.nan)
+        acc.update(values if keep is None else values[keep], x, times)
+    return acc.finish(time_column)
+
+
+@instrument("trends")
+def stream_trends(path, profile, chunksize=TREND_CHUNK_ROWS):
+    """
+    TrendReport for a CSV too large to load: one chunked pass in file
+    order, reading only the numeric and date columns.
+    """
+    columns = profile.numeric_columns
+    time_column = find_time_column(profile)
+    usecols = columns + [time_column] if time_column and time_column not in columns else columns
+
+    acc = TrendAccumulator(columns, timed=time_column is not None)
+    fmt = None
+    position = 0
+    for chunk in pd.read_csv(path, chunksize=chunksize, usecols=usecols):
+        if position == 0 and time_column is not None:
+            fmt = date_format(chunk[time_column])
+        x, times, keep = _ordering(chunk, time_column, fmt, position)
+        values = chunk[columns].to_numpy(dtype=np.float64, na_value=np.nan)
+        acc.update(values if keep is None else values[keep], x, times)
+        position += len(chunk)
+    return acc.finish(time_column)
+
+
+def detect_trends_and_insights(df, profile=None):
+    """
+    Trend insights as sentences, for the report and the PDF.
+    """
+    return analyze_trends(df, profile).insights()
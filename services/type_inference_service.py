@@ -0,0 +1,211 @@
+import os
+import warnings
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+from dateutil import parser as date_parser
+from pandas.tseries.api import guess_datetime_format
+
+# Distinct values checked before the full column is considered
+TYPE_SAMPLE_SIZE = int(os.environ.get("MDD_TYPE_SAMPLE_SIZE", 2000))
+
+# A type is confirmed on the full column only when at least this share
+# of the sample has it; rarer types keep their sample estimate
+SAMPLE_GATE = 0.5
+
+# Text columns where this share of values parses as numbers are flagged
+# as numeric data stored as text
+NUMERIC_COERCIBLE_FRACTION = 0.95
+DATE_COERCIBLE_FRACTION = 0.95
+
+BOOL_TOKENS = {"true", "false", "yes", "no", "y", "n", "t", "f"}
+
+TYPES = ("numeric", "date", "bool", "categorical")
+
+
+class ColumnTypes:
+    """
+    How many non-null values of a text column parse as each type. Counts
+    are additive, so chunks can be inferred separately and merged.
+    """
+
+    def __init__(self, total=0, counts=None, exact=True):
+        self.total = total
+        self.counts = dict.fromkeys(TYPES, 0)
+        self.counts.update(counts or {})
+        self.exact = exact
+
+    def fraction(self, kind):
+        if not self.total:
+            return 0.0
+        return self.counts[kind] / self.total
+
+    @property
+    def fractions(self):
+        return {kind: self.fraction(kind) for kind in TYPES}
+
+    @property
+    def numeric_coercible(self):
+        return self.fraction("numeric") >= NUMERIC_COERCIBLE_FRACTION
+
+    @property
+    def date_coercible(self):
+        return (
+            not self.numeric_coercible
+            and self.fraction("date") >= DATE_COERCIBLE_FRACTION
+        )
+
+    def merge(self, other):
+        self.total += other.total
+        for kind in TYPES:
+            self.counts[kind] += other.counts[kind]
+        self.exact = self.exact and other.exact
+        return self
+
+    def discount(self, other):
+        """
+        Remove the values counted in other (e.g. rows that were dropped).
+        """
+        self.total = max(0, self.total - other.total)
+        for kind in TYPES:
+            self.counts[kind] = min(self.total, max(0, self.counts[kind] - other.counts[kind]))
+        self.exact = self.exact and other.exact
+        return self
+
+    def copy(self):
+        return ColumnTypes(self.total, self.counts, self.exact)
+
+    def to_dict(self):
+        return {
+            "total": self.total,
+            "fractions": {k: round(v, 4) for k, v in self.fractions.items()},
+            "exact": self.exact
+        }
+
+
+# ==========================
+# Vectorized checks
+# ==========================
+def _numeric_mask(values):
+    return pd.to_numeric(values, errors="coerce").notna().to_numpy()
+
+
+def _bool_mask(values):
+    return values.str.strip().str.lower().isin(BOOL_TOKENS).to_numpy()
+
+
+def _date_format(values):
+    """
+    Most common strftime format among the values, or None.
+    """
+    formats = Counter()
+    with warnings.catch_warnings():
+        # Day-first guesses warn; the format is what we are after
+        warnings.simplefilter("ignore", UserWarning)
+        for value in values[:50]:
+            fmt = guess_datetime_format(value)
+            if fmt:
+                formats[fmt] += 1
+    return formats.most_common(1)[0][0] if formats else None
+
+
+def _date_mask(values, fmt):
+    if fmt:
+        parsed = pd.to_datetime(values, format=fmt, errors="coerce")
+        return parsed.notna().to_numpy()
+
+    # No single format: fall back to dateutil value by value
+    def parses(value):
+        try:
+            date_parser.parse(value)
+            return True
+        except (ValueError, OverflowError):
+            return False
+
+    return np.fromiter((parses(v) for v in values), dtype=bool, count=len(values))
+
+
+def _classify(values, weights, kinds, fmt=None):
+    """
+    Weighted count of values per type over distinct values. Numbers are
+    never counted as dates or booleans (when "numeric" is checked).
+    """
+    counts = dict.fromkeys(TYPES, 0)
+    other = np.ones(len(values), dtype=bool)
+
+    if "numeric" in kinds:
+        numeric = _numeric_mask(values)
+        counts["numeric"] = int(weights[numeric].sum())
+        other &= ~numeric
+    if "bool" in kinds:
+        boolean = other & _bool_mask(values)
+        counts["bool"] = int(weights[boolean].sum())
+        other &= ~boolean
+    if "date" in kinds:
+        dates = np.zeros(len(values), dtype=bool)
+        if other.any():
+            dates[other] = _date_mask(values[other], fmt)
+        counts["date"] = int(weights[dates].sum())
+        other &= ~dates
+    if "categorical" in kinds:
+        # Labels that repeat, rather than free text
+        counts["categorical"] = int(weights[other & (weights > 1)].sum())
+
+    return counts
+
+
+# ==========================
+# Public API
+# ==========================
+def infer_types(series, sample_size=TYPE_SAMPLE_SIZE, seed=0):
+    """
+    Share of non-null values parseable as numeric, date, boolean or
+    categorical. Works over distinct values; high-cardinality columns are
+    checked on a sample first and only plausible types are confirmed on
+    the full column.
+    """
+    counts = series.value_counts(dropna=True)
+    values = pd.Series(counts.index.astype(str), dtype=object)
+    weights = counts.to_numpy()
+    total = int(weights.sum())
+
+    if not total:
+        return ColumnTypes()
+
+    if len(values) <= sample_size:
+        fmt = _date_format(values[~_numeric_mask(values)])
+        return ColumnTypes(total, _classify(values, weights, TYPES, fmt))
+
+    rng = np.random.default_rng(seed)
+    picked = rng.choice(len(values), sample_size, replace=False)
+    sample = values.iloc[picked].reset_index(drop=True)
+    sample_weights = weights[picked]
+
+    fmt = _date_format(sample[~_numeric_mask(sample)])
+    sample_total = sample_weights.sum()
+    sample_counts = _classify(sample, sample_weights, TYPES, fmt)
+
+    confirm = {kind for kind in TYPES if sample_counts[kind] / sample_total >= SAMPLE_GATE}
+    if "categorical" in confirm:
+        # Categorical is whatever is left after the other checks
+        confirm = set(TYPES)
+    elif sample_counts["numeric"]:
+        # Keep numbers out of the date and boolean counts
+        confirm.add("numeric")
+    result = _classify(values, weights, confirm, fmt) if confirm else {}
+
+    exact = True
+    for kind in TYPES:
+        if kind not in confirm:
+            result[kind] = int(round(sample_counts[kind] / sample_total * total))
+            exact = False
+
+    return ColumnTypes(total, result, exact=exact)
+
+
+def infer_column_types(df, columns=None):
+    """
+    infer_types for each given column (all columns by default).
+    """
+    return {col: infer_types(df[col]) for col in (columns or df.columns)}
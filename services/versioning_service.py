@@ -1,55 +1,561 @@
+import json
 import os
-import pandas as pd
+import re
+import threading
+from contextlib import contextmanager
 from datetime import datetime
 
-def save_new_version(df, filename, action, base_dir):
+try:
+    import fcntl
+except ImportError:     # Windows: one server process, thread locks only
+    fcntl = None
+
+import numpy as np
+import pandas as pd
+
+from models.dataset_state import DatasetState
+from services.cache_service import get_profile, invalidate, store
+from services.metrics_service import instrument
+from services.profile_service import update_profile
+from services.scoring_service import calculate_data_quality_score
+from services.storage_service import (
+    columnar_enabled,
+    convert_to_columnar,
+    read_columnar,
+    read_dataset,
+    save_profile,
+    write_columnar
+)
+from services.streaming_service import is_large
+
+DEFAULT_VERSIONS_DIR = os.path.join(os.path.dirname(__file__), "..", "storage", "versions")
+
+# A full checkpoint is written after this many chained deltas, so any
+# version is rebuilt from one checkpoint plus at most this many deltas
+CHECKPOINT_INTERVAL = 10
+
+# Fall back to a checkpoint when a delta would touch more cells than this
+MAX_DELTA_FRACTION = 0.5
+
+STORE_EXT = ".store"
+MANIFEST_FILE = "manifest.jsonl"
+LOCK_FILE = "manifest.lock"
+LEGACY_MANIFEST_FILE = "manifest.json"
+
+# Full snapshots written before version stores existed: <name>_<stamp>.csv
+LEGACY_INDEX_FILE = "legacy_snapshots.json"
+LEGACY_SNAPSHOT = re.compile(r"^(?P<name>.+)_(?P<stamp>\d{8}_\d{6})\.csv$")
+
+
+# ==========================
+# Store layout
+# ==========================
+class VersionManifest:
     """
-    Save cleaned dataset as a new version.
+    Version index of one dataset: an append-only JSON-lines file with a
+    DatasetState per saved version and a {"head": id} line whenever the
+    head moves. Reads replay it; writes only ever append one line.
     """
 
+    def __init__(self, path, filename):
+        self.path = path
+        self.filename = filename
+        self.versions = []
+        self.states = {}        # version id -> DatasetState
+        self.head = None
+
+    def register(self, state):
+        """
+        Add a version in memory only (when importing legacy versions).
+        """
+        self.versions.append(state)
+        self.states[state.version] = state
+
+    def state(self, version):
+        return self.states.get(version)
+
+    def next_version(self):
+        return max(self.states, default=-1) + 1
+
+    def _apply(self, record):
+        if "head" in record and len(record) == 1:
+            self.head = record["head"]
+        else:
+            self.register(DatasetState.from_dict(record))
+            self.head = record["version"]
+
+    def load(self):
+        with open(self.path) as f:
+            for line in f:
+                if line.strip():
+                    self._apply(json.loads(line))
+        return self
+
+    def _append(self, record):
+        with open(self.path, "a") as f:
+            f.write(json.dumps(record) + "\n")
+        self._apply(record)
+
+    def add(self, state):
+        self._append(state.to_dict())
+
+    def move_head(self, version):
+        self._append({"head": version})
+
+    def write_all(self):
+        """
+        Write the whole index at once (only when migrating).
+        """
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            for state in self.versions:
+                f.write(json.dumps(state.to_dict()) + "\n")
+            if self.versions and self.head != self.versions[-1].version:
+                f.write(json.dumps({"head": self.head}) + "\n")
+        os.replace(tmp_path, self.path)
+
+
+def _stored_bytes(path):
+    """
+    Size on disk of a version file, or of a columnar checkpoint directory.
+    """
+    if not os.path.isdir(path):
+        return os.path.getsize(path) if os.path.exists(path) else None
+    with os.scandir(path) as entries:
+        return sum(entry.stat().st_size for entry in entries if entry.is_file())
+
+
+# Parsed manifests by path, reused until the file's size or mtime changes
+_manifests = {}
+
+
+def _store_dir(filename, base_dir):
+    name, _ = os.path.splitext(filename)
+    return os.path.join(base_dir, name + STORE_EXT)
+
+
+def _legacy_index(base_dir, save=True):
+    """
+    {dataset name: [snapshot files]} for the whole versions directory.
+    Built with one directory scan the first time any store is created and
+    kept on disk; no new legacy snapshots are ever written.
+    """
+    path = os.path.join(base_dir, LEGACY_INDEX_FILE)
+    if os.path.exists(path):
+        with open(path) as f:
+            return json.load(f)
+
+    index = {}
+    if not os.path.isdir(base_dir):
+        return index
+    with os.scandir(base_dir) as entries:
+        for entry in entries:
+            match = LEGACY_SNAPSHOT.match(entry.name)
+            if match and entry.is_file():
+                index.setdefault(match["name"], []).append(entry.name)
+
+    if not save:
+        return index
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(index, f)
+    os.replace(tmp_path, path)
+    return index
+
+
+def _import_legacy_snapshots(filename, base_dir, manifest, save_index=True):
+    """
+    Register full snapshots written before the store existed. Only files
+    named exactly <name>_<stamp>.csv belong to the dataset, so
+    "Data (1)_..." is never taken for a version of "Data".
+    """
+    name, _ = os.path.splitext(filename)
+
+    for f in sorted(_legacy_index(base_dir, save_index).get(name, [])):
+        stamp = LEGACY_SNAPSHOT.match(f)["stamp"]
+        try:
+            timestamp = datetime.strptime(stamp, "%Y%m%d_%H%M%S").strftime("%Y-%m-%d %H:%M:%S")
+        except ValueError:
+            continue
+
+        manifest.register(DatasetState(
+            filename,
+            manifest.next_version(),
+            "Saved snapshot",
+            parent=manifest.head,
+            kind="snapshot",
+            file=f,
+            size_bytes=_stored_bytes(os.path.join(base_dir, f)),
+            timestamp=timestamp
+        ))
+        manifest.head = manifest.versions[-1].version
+
+
+def _import_legacy_manifest(filename, store_dir, manifest):
+    """
+    Convert a whole-file manifest.json from before the append-only index.
+    """
+    path = os.path.join(store_dir, LEGACY_MANIFEST_FILE)
+    with open(path) as f:
+        legacy = json.load(f)
+
+    for v in legacy["versions"]:
+        manifest.register(DatasetState(
+            filename,
+            v["version"],
+            v["action"],
+            parent=v["parent"],
+            kind=v["kind"],
+            file=v["file"],
+            depth=v["depth"],
+            size_bytes=_stored_bytes(os.path.join(store_dir, v["file"])),
+            timestamp=v["timestamp"]
+        ))
+    manifest.head = legacy["head"]
+
+
+# In-process side of the store locks: one RLock per lock file, and how
+# deeply its owning thread holds it
+_store_locks = {}
+_store_locks_guard = threading.Lock()
+_lock_depth = {}
+
+
+@contextmanager
+def dataset_lock(filename, base_dir):
+    """
+    Exclusive lock on a dataset's version store, shared by every thread
+    and process. Hold it from loading the latest version until the new
+    one is recorded, so the head cannot move in between. Re-entrant
+    within a thread.
+    """
+    store_dir = _store_dir(filename, base_dir)
+    os.makedirs(store_dir, exist_ok=True)
+    path = os.path.join(store_dir, LOCK_FILE)
+
+    with _store_locks_guard:
+        lock = _store_locks.setdefault(path, threading.RLock())
+
+    with lock:
+        if _lock_depth.get(path):
+            _lock_depth[path] += 1
+            try:
+                yield
+            finally:
+                _lock_depth[path] -= 1
+            return
+
+        # Closing the file releases the flock
+        with open(path, "a") as f:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            _lock_depth[path] = 1
+            try:
+                yield
+            finally:
+                _lock_depth[path] = 0
+
+
+def _open_store(filename, base_dir, create=True):
+    """
+    (store directory, VersionManifest) of a dataset. Without create, a
+    dataset that has no store yet gets an in-memory manifest of its
+    legacy versions and nothing is written.
+    """
+    store_dir = _store_dir(filename, base_dir)
+    path = os.path.join(store_dir, MANIFEST_FILE)
+
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        manifest = VersionManifest(path, filename)
+        if os.path.exists(os.path.join(store_dir, LEGACY_MANIFEST_FILE)):
+            _import_legacy_manifest(filename, store_dir, manifest)
+        else:
+            _import_legacy_snapshots(filename, base_dir, manifest, save_index=create)
+        if not create:
+            return store_dir, manifest
+
+        os.makedirs(store_dir, exist_ok=True)
+        manifest.write_all()
+        stat = os.stat(path)
+    else:
+        signature = (stat.st_size, stat.st_mtime_ns)
+        hit = _manifests.get(path)
+        if hit is not None and hit[0] == signature:
+            return store_dir, hit[1]
+        manifest = VersionManifest(path, filename).load()
+
+    _manifests[path] = ((stat.st_size, stat.st_mtime_ns), manifest)
+    return store_dir, manifest
+
+
+# ==========================
+# Deltas
+# ==========================
+def _compute_delta(parent, df, kept=None):
+    """
+    Describe df relative to parent as dropped row positions (kept ones
+    if rows were reordered) plus changed cells per column. kept, a boolean
+    mask over parent's rows, gives the surviving rows when df's index no
+    longer says which they were. Returns None when a checkpoint is cheaper.
+    """
+    if kept is not None and len(kept) == len(parent) and kept.sum() == len(df):
+        kept = np.flatnonzero(kept)
+    else:
+        index = df.index
+        if not index.is_unique or not index.isin(parent.index).all():
+            return None
+        kept = parent.index.get_indexer(index)
+
+    if len(kept) == len(parent) and (kept == np.arange(len(parent))).all():
+        kept = None
+
+    changed = {}
+    replaced = {}
+    casts = {}
+    changed_cells = 0
+
+    for col in df.columns:
+        new = df[col].reset_index(drop=True)
+
+        if col not in parent.columns:
+            replaced[col] = new
+            changed_cells += len(new)
+            continue
+
+        old = parent[col]
+
+        # A CSV round trip can turn float64 into int64; diff the values
+        # and record the cast rather than storing the whole column
+        if old.dtype != new.dtype:
+            if not (
+                pd.api.types.is_numeric_dtype(old.dtype)
+                and pd.api.types.is_numeric_dtype(new.dtype)
+            ):
+                replaced[col] = new
+                changed_cells += len(new)
+                continue
+            casts[col] = new.dtype
+
+        if kept is not None:
+            old = old.take(kept)
+        old = old.reset_index(drop=True)
+
+        same = old.eq(new) | (old.isna() & new.isna())
+        positions = np.flatnonzero(~same.fillna(False).to_numpy(dtype=bool))
+
+        if len(positions) > MAX_DELTA_FRACTION * len(new):
+            replaced[col] = new
+        elif len(positions):
+            changed[col] = (positions, new.iloc[positions].to_numpy())
+        changed_cells += len(positions)
+
+    if changed_cells > MAX_DELTA_FRACTION * df.size:
+        return None
+
+    # Rows that only went away: store the (few) dropped positions
+    dropped = None
+    if kept is not None and (np.diff(kept) > 0).all():
+        survived = np.zeros(len(parent), dtype=bool)
+        survived[kept] = True
+        dropped, kept = np.flatnonzero(~survived), None
+
+    return {
+        "rows": len(df),
+        "kept": kept,
+        "dropped": dropped,
+        "columns": df.columns.tolist(),
+        "changed": changed,
+        "replaced": replaced,
+        "casts": casts
+    }
+
+
+def _apply_delta(parent, delta):
+    # Deltas written before "dropped" existed only have "kept"
+    if delta.get("dropped") is not None:
+        survived = np.ones(len(parent), dtype=bool)
+        survived[delta["dropped"]] = False
+        parent = parent[survived]
+    elif delta["kept"] is not None:
+        parent = parent.take(delta["kept"])
+    parent = parent.reset_index(drop=True)
+
+    data = {}
+    for col in delta["columns"]:
+        if col in delta["replaced"]:
+            data[col] = delta["replaced"][col]
+            continue
+
+        series = parent[col].copy()
+        if col in delta["casts"]:
+            series = series.astype(delta["casts"][col])
+        if col in delta["changed"]:
+            positions, values = delta["changed"][col]
+            series.iloc[positions] = values
+        data[col] = series
+
+    return pd.DataFrame(data)
+
+
+def _rebuild(store_dir, manifest, version, base_dir):
+    """
+    Replay deltas from the nearest checkpoint or snapshot up to version.
+    """
+    chain = []
+    state = manifest.state(version)
+    while state.kind == "delta":
+        chain.append(state)
+        state = manifest.state(state.parent)
+
+    if state.kind == "checkpoint":
+        df = read_columnar(os.path.join(store_dir, state.file))
+    else:
+        df = read_dataset(os.path.join(base_dir, state.file))
+
+    for state in reversed(chain):
+        df = _apply_delta(df, pd.read_pickle(os.path.join(store_dir, state.file)))
+
+    return df
+
+
+# ==========================
+# Public API
+# ==========================
+@instrument("save_version")
+def save_new_version(df, filename, action, base_dir, score=None, kept=None, parent=None):
+    """
+    Save cleaned dataset as a new version. score, when the caller already
+    has it, is kept in the version index; kept is the cleaning pass's
+    boolean mask of surviving rows, so dropped rows go into a delta.
+    parent is the current head version's data if the caller loaded it
+    under dataset_lock (the cleaning pass's input); otherwise it is
+    rebuilt from disk.
+    """
     os.makedirs(base_dir, exist_ok=True)
+    with dataset_lock(filename, base_dir):
+        _save_locked(df, filename, action, base_dir, score, kept, parent)
 
+
+def _save_locked(df, filename, action, base_dir, score, kept, parent):
     # Save latest cleaned version (used for compare)
     latest_path = os.path.join(base_dir, filename)
     df.to_csv(latest_path, index=False)
+    invalidate(latest_path)
+
+    if columnar_enabled():
+        convert_to_columnar(latest_path, df)
+
+    # Record the version as a delta on its parent (for history)
+    store_dir, manifest = _open_store(filename, base_dir)
+    parent_id = manifest.head
+    version = manifest.next_version()
 
-    # Also save timestamped version (for history)
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    name, ext = os.path.splitext(filename)
-    versioned_name = f"{name}_{timestamp}{ext}"
+    delta = None
+    depth = 0
+    if parent_id is not None:
+        parent_state = manifest.state(parent_id)
+        depth = parent_state.depth + 1
+        if depth < CHECKPOINT_INTERVAL:
+            if parent is None or (parent_state.rows, parent_state.columns) != parent.shape:
+                parent = _rebuild(store_dir, manifest, parent_id, base_dir)
+            delta = _compute_delta(parent, df, kept)
 
-    versioned_path = os.path.join(base_dir, versioned_name)
-    df.to_csv(versioned_path, index=False)
+    if delta is None:
+        kind, file, depth = "checkpoint", f"v{version}.cols", 0
+        write_columnar(df, os.path.join(store_dir, file))
+    else:
+        kind, file = "delta", f"v{version}.delta.pkl"
+        pd.to_pickle(delta, os.path.join(store_dir, file))
 
+    manifest.add(DatasetState(
+        filename,
+        version,
+        action,
+        parent=parent_id,
+        kind=kind,
+        file=file,
+        depth=depth,
+        rows=len(df),
+        columns=len(df.columns),
+        size_bytes=_stored_bytes(os.path.join(store_dir, file)),
+        score=score
+    ))
 
-def get_versions(filename):
+
+def save_cleaned_version(df, filename, action, base_dir, source_path, changes, source=None):
     """
-    List all saved versions for a dataset.
+    Save the result of a cleaning pass as the next version and seed the
+    cache for it. Its profile is derived from the source profile and the
+    ChangeSet, so only what changed is recomputed. source is the frame the
+    cleaning ran on; when it is the latest version, loaded under
+    dataset_lock, the delta is taken against it.
     """
-    name, _ = os.path.splitext(filename)
+    profile = update_profile(get_profile(source_path), df, changes)
+    score = calculate_data_quality_score(df, profile)
+
+    path = os.path.join(base_dir, filename)
+    with dataset_lock(filename, base_dir):
+        save_new_version(
+            df, filename, action, base_dir,
+            score=score,
+            kept=changes.kept if changes else None,
+            parent=source if source_path == path else None
+        )
+
+        store(path, "dataframe", df)
+        store(path, "profile", profile)
+        store(path, "score", score)
+        if is_large(path):
+            save_profile(path, profile)
 
-    versions = []
-    base_dir = os.path.join(os.path.dirname(__file__), "..", "storage", "versions")
 
+def get_versions(filename, base_dir=DEFAULT_VERSIONS_DIR):
+    """
+    List all saved versions for a dataset, newest first.
+    """
     if not os.path.exists(base_dir):
-        return versions
+        return []
 
-    for f in os.listdir(base_dir):
-        if f.startswith(name + "_"):
-            versions.append(f)
+    _, manifest = _open_store(filename, base_dir, create=False)
 
-    versions.sort(reverse=True)
-    return versions
+    return [
+        {**v.to_dict(), "head": v.version == manifest.head}
+        for v in reversed(manifest.versions)
+    ]
 
 
+@instrument("load_version")
 def load_version(filename, version, base_dir):
     """
-    Load a specific version by index.
+    Load a specific version by id.
     """
-    versions = get_versions(filename)
+    store_dir, manifest = _open_store(filename, base_dir, create=False)
 
-    if version < 0 or version >= len(versions):
+    if manifest.state(version) is None:
         return None
 
-    path = os.path.join(base_dir, versions[version])
-    return pd.read_csv(path)
+    return _rebuild(store_dir, manifest, version, base_dir)
+
+
+def restore_version(filename, version, base_dir):
+    """
+    Make an earlier version the latest one; later saves branch from it.
+    """
+    with dataset_lock(filename, base_dir):
+        df = load_version(filename, version, base_dir)
+        if df is None:
+            return None
+
+        latest_path = os.path.join(base_dir, filename)
+        df.to_csv(latest_path, index=False)
+        invalidate(latest_path)
+
+        if columnar_enabled():
+            convert_to_columnar(latest_path, df)
+
+        store_dir, manifest = _open_store(filename, base_dir)
+        manifest.move_head(version)
+
+    return df
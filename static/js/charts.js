@@ -73,14 +73,23 @@ new Chart(outlierChart, {
   options: { responsive:true, maintainAspectRatio:false }
 });
 
-/* 6️⃣ HEATMAP */
-const heatLabels = Object.keys(corr);
+/* 6️⃣ HEATMAP (dense for narrow datasets, strongest pairs otherwise) */
 const heatData = [];
-heatLabels.forEach((x,i) => {
-  heatLabels.forEach((y,j) => {
-    heatData.push({x:i,y:j,v:corr[x][y]});
+let heatLabels = [];
+if (corr.matrix) {
+  heatLabels = Object.keys(corr.matrix);
+  heatLabels.forEach((x,i) => {
+    heatLabels.forEach((y,j) => {
+      heatData.push({x:i,y:j,v:corr.matrix[x][y]});
+    });
   });
-});
+} else {
+  corr.pairs.forEach(p => {
+    [p.x, p.y].forEach(c => { if (!heatLabels.includes(c)) heatLabels.push(c); });
+    const i = heatLabels.indexOf(p.x), j = heatLabels.indexOf(p.y);
+    heatData.push({x:i,y:j,v:p.r}, {x:j,y:i,v:p.r});
+  });
+}
 
 new Chart(heatmap, {
   type:"scatter",
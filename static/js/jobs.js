@@ -0,0 +1,40 @@
+function runJob(kind, filename, statusId) {
+  const statusBox = document.getElementById(statusId);
+  statusBox.innerHTML = "⏳ Queued...";
+
+  fetch(`/jobs/${kind}/${encodeURIComponent(filename)}`, { method: "POST" })
+    .then((res) => res.json())
+    .then((data) => {
+      if (data.error) {
+        statusBox.innerHTML = "⚠️ " + data.error;
+        return;
+      }
+      pollJob(data.status_url, statusBox);
+    })
+    .catch(() => {
+      statusBox.innerHTML = "❌ Could not start job.";
+    });
+}
+
+function pollJob(statusUrl, statusBox) {
+  fetch(statusUrl)
+    .then((res) => res.json())
+    .then((job) => {
+      if (job.status === "done") {
+        statusBox.innerHTML = "✅ Done";
+        window.location = job.result_url;
+        return;
+      }
+
+      if (job.status === "failed") {
+        statusBox.innerHTML = "❌ " + job.error;
+        return;
+      }
+
+      statusBox.innerHTML = `⏳ ${job.message} (${Math.round(job.progress * 100)}%)`;
+      setTimeout(() => pollJob(statusUrl, statusBox), 1000);
+    })
+    .catch(() => {
+      statusBox.innerHTML = "❌ Lost track of job.";
+    });
+}
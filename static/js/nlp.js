@@ -1,3 +1,27 @@
+function escapeHtml(value) {
+  return String(value ?? "")
+    .replace(/&/g, "&amp;")
+    .replace(/</g, "&lt;")
+    .replace(/>/g, "&gt;");
+}
+
+function renderTable(rows) {
+  if (!rows.length) return "";
+
+  const columns = Object.keys(rows[0]);
+  const head = columns.map((c) => `<th>${escapeHtml(c)}</th>`).join("");
+  const body = rows
+    .map(
+      (row) =>
+        "<tr>" +
+        columns.map((c) => `<td>${escapeHtml(row[c])}</td>`).join("") +
+        "</tr>"
+    )
+    .join("");
+
+  return `<table class="ask-table"><thead><tr>${head}</tr></thead><tbody>${body}</tbody></table>`;
+}
+
 function askData() {
   const query = document.getElementById("nlQuery").value;
   const resultBox = document.getElementById("nlResult");
@@ -27,7 +51,8 @@ function askData() {
       resultBox.innerHTML = `
         <div class="card">
           <h4>📢 Answer</h4>
-          <p>${data.answer}</p>
+          <p>${escapeHtml(data.answer)}</p>
+          ${data.table ? renderTable(data.table) : ""}
         </div>
       `;
     })
@@ -0,0 +1,406 @@
+/* =============================
+   REPORT PAGE
+   Every section is fetched from /api/report/<filename>/<section> and
+   drawn as soon as it arrives, so a slow section never holds up the
+   others. Column-heavy sections are paged.
+============================= */
+
+const report = {
+  filename: null,
+  pageSize: 50,
+  topK: 50,
+  scores: null,
+  analytics: null,
+  suggestionsPage: 0,
+  trends: {},
+  trendsPage: 0,
+  charts: {},
+  heatmap: null
+};
+
+function sectionUrl(section, params = {}) {
+  const query = new URLSearchParams(params).toString();
+  return `/api/report/${encodeURIComponent(report.filename)}/${section}` + (query ? `?${query}` : "");
+}
+
+function fetchSection(section, params) {
+  return fetch(sectionUrl(section, params)).then((res) => {
+    if (!res.ok) throw new Error(`${section}: ${res.status}`);
+    return res.json();
+  });
+}
+
+function setText(id, value) {
+  const el = document.getElementById(id);
+  if (el) el.textContent = value;
+}
+
+function reportEscape(value) {
+  return String(value ?? "")
+    .replace(/&/g, "&amp;")
+    .replace(/</g, "&lt;")
+    .replace(/>/g, "&gt;")
+    .replace(/"/g, "&quot;");
+}
+
+/* ---------- Preview estimates ---------- */
+function intervalText(label, estimate) {
+  if (!estimate) return "";
+  return `${label} ≈ ${estimate.percent}% (95% CI ${estimate.low}–${estimate.high}%)`;
+}
+
+/* ---------- Scores ---------- */
+function loadScores() {
+  fetchSection("scores")
+    .then((data) => {
+      report.scores = data;
+      // Sample-based scores are marked as estimates
+      const mark = data.approximate ? "≈ " : "";
+      if (data.approximate) {
+        const a = data.approximate;
+        setText("previewRows", `${a.sample_rows.toLocaleString()} of ~${a.estimated_rows.toLocaleString()}`);
+        // Duplicates whose copies were not both sampled go unseen
+        setText("previewDuplicates", `Duplicate rows: at least ~${a.duplicates.count.toLocaleString()} (${a.duplicates.percent}% of the sample).`);
+      }
+      setText("beforeScore", `${mark}${data.before.total}/100`);
+      setText("afterScore", `${mark}${data.after.total}/100`);
+      setText("completeness", `${data.after.completeness}/25`);
+      setText("uniqueness", `${data.after.uniqueness}/25`);
+      setText("consistency", `${data.after.consistency}/25`);
+      setText("validity", `${data.after.validity}/25`);
+    })
+    .catch(() => setText("scoreStatus", "❌ Could not load scores."));
+}
+
+/* ---------- Analytics ---------- */
+function emptyChart(id, type) {
+  return new Chart(document.getElementById(id), { type, data: { labels: [], datasets: [] } });
+}
+
+function initCharts() {
+  report.charts.bar = emptyChart("barChart", "bar");
+  report.charts.trend = emptyChart("trendChart", "line");
+  report.charts.variance = emptyChart("varianceChart", "bar");
+  report.charts.missing = emptyChart("missingChart", "bar");
+  report.charts.outlier = emptyChart("outlierChart", "bar");
+  report.charts.rolling = emptyChart("rollingChart", "line");
+}
+
+function drawAnalytics(data) {
+  const { stats, variance, missing, outliers } = data;
+  const numericCols = data.numeric_columns;
+  const columns = data.page_columns;
+  const c = report.charts;
+
+  c.bar.data.labels = numericCols;
+  c.bar.data.datasets = [
+    { label: "Min", data: numericCols.map((col) => stats[col].min) },
+    { label: "Mean", data: numericCols.map((col) => stats[col].mean) },
+    { label: "Max", data: numericCols.map((col) => stats[col].max) }
+  ];
+
+  c.trend.data.labels = numericCols;
+  c.trend.data.datasets = [{ label: "Mean Trend", data: numericCols.map((col) => stats[col].mean) }];
+
+  c.variance.data.labels = numericCols;
+  c.variance.data.datasets = [{ label: "Variance", data: numericCols.map((col) => variance[col]) }];
+
+  c.missing.data.labels = columns;
+  c.missing.data.datasets = [{ label: "Missing", data: columns.map((col) => missing[col] || 0) }];
+
+  c.outlier.data.labels = numericCols;
+  c.outlier.data.datasets = [{ label: "Outliers", data: numericCols.map((col) => outliers[col]) }];
+
+  Object.values(c).forEach((chart) => chart.update());
+}
+
+function fillColumnSelect(names) {
+  const select = document.getElementById("columnSelect");
+  if (select.options.length) return;
+  names.forEach((name) => select.add(new Option(name, name)));
+}
+
+function drawPager(data) {
+  const pager = document.getElementById("analyticsPager");
+  if (data.pages <= 1) {
+    pager.style.display = "none";
+    return;
+  }
+  pager.style.display = "flex";
+  setText("analyticsPage", `Columns ${(data.page - 1) * data.per_page + 1}–` +
+    `${(data.page - 1) * data.per_page + data.page_columns.length} of ${data.total}`);
+  document.getElementById("prevPage").disabled = data.page <= 1;
+  document.getElementById("nextPage").disabled = data.page >= data.pages;
+}
+
+function loadAnalytics(page = 1) {
+  setText("analyticsStatus", "⏳ Loading analytics…");
+  fetchSection("analytics", { page, per_page: report.pageSize })
+    .then((data) => {
+      report.analytics = data;
+      setText("analyticsStatus", "");
+      fillColumnSelect(data.column_names);
+      drawPager(data);
+      drawAnalytics(data);
+    })
+    .catch(() => setText("analyticsStatus", "❌ Could not load analytics."));
+}
+
+function loadColumn(col) {
+  fetchSection("analytics", { column: col }).then((data) => {
+    setText("columnEstimate", data.approximate ? [
+      intervalText("Missing", data.missing_intervals[col]),
+      intervalText("Outliers", (data.outlier_intervals || {})[col])
+    ].filter(Boolean).join(" · ") : "");
+    if (!data.numeric_columns.length) return;
+    const s = data.stats[col];
+    const c = report.charts;
+
+    c.bar.data.labels = ["Min", "Mean", "Max"];
+    c.bar.data.datasets = [{ label: col, data: [s.min, s.mean, s.max] }];
+    c.trend.data.labels = ["Mean"];
+    c.trend.data.datasets = [{ label: col, data: [s.mean] }];
+    c.variance.data.labels = [col];
+    c.variance.data.datasets = [{ label: "Variance", data: [data.variance[col]] }];
+    c.missing.data.labels = [col];
+    c.missing.data.datasets = [{ label: "Missing", data: [data.missing[col] || 0] }];
+    c.outlier.data.labels = [col];
+    c.outlier.data.datasets = [{ label: "Outliers", data: [data.outliers[col]] }];
+
+    Object.values(c).forEach((chart) => chart.update());
+  });
+}
+
+function initAnalyticsControls() {
+  const datasetBtn = document.getElementById("datasetBtn");
+  const columnBtn = document.getElementById("columnBtn");
+  const columnCard = document.getElementById("columnCard");
+  const columnSelect = document.getElementById("columnSelect");
+
+  datasetBtn.onclick = () => {
+    datasetBtn.classList.add("active");
+    columnBtn.classList.remove("active");
+    columnCard.style.display = "none";
+    loadAnalytics(report.analytics ? report.analytics.page : 1);
+  };
+
+  columnBtn.onclick = () => {
+    columnBtn.classList.add("active");
+    datasetBtn.classList.remove("active");
+    columnCard.style.display = "block";
+    if (columnSelect.value) loadColumn(columnSelect.value);
+  };
+
+  columnSelect.onchange = () => loadColumn(columnSelect.value);
+  document.getElementById("prevPage").onclick = () => loadAnalytics(report.analytics.page - 1);
+  document.getElementById("nextPage").onclick = () => loadAnalytics(report.analytics.page + 1);
+}
+
+/* ---------- Correlation heatmap ---------- */
+function heatColor(value) {
+  if (value > 0.7) return "#22c55e";   // strong +
+  if (value > 0.3) return "#86efac";   // weak +
+  if (value < -0.7) return "#ef4444";  // strong -
+  if (value < -0.3) return "#fca5a5";  // weak -
+  return "#94a3b8";                    // near zero
+}
+
+function drawHeatmap(labels, heatData) {
+  if (report.heatmap) report.heatmap.destroy();
+
+  report.heatmap = new Chart(document.getElementById("heatmap"), {
+    type: "scatter",
+    data: {
+      datasets: [{
+        label: "Correlation",
+        data: heatData,
+        pointRadius: labels.length > 30 ? 4 : 10,
+        backgroundColor: (ctx) => heatColor(ctx.raw.v)
+      }]
+    },
+    options: {
+      responsive: true,
+      maintainAspectRatio: false,
+      scales: {
+        x: { ticks: { callback: (v) => labels[v] } },
+        y: { ticks: { callback: (v) => labels[v] } }
+      },
+      plugins: {
+        tooltip: {
+          callbacks: {
+            label: (ctx) => `${labels[ctx.raw.x]} vs ${labels[ctx.raw.y]} : ${ctx.raw.v}`
+          }
+        }
+      }
+    }
+  });
+}
+
+function drawDenseHeatmap(matrix) {
+  const labels = Object.keys(matrix);
+  const heatData = [];
+
+  labels.forEach((x, i) => {
+    labels.forEach((y, j) => {
+      heatData.push({ x: i, y: j, v: matrix[x][y] });
+    });
+  });
+
+  drawHeatmap(labels, heatData);
+}
+
+function drawSparseHeatmap(pairs) {
+  const labels = [];
+  const position = {};
+  pairs.forEach((p) => {
+    [p.x, p.y].forEach((c) => {
+      if (!(c in position)) position[c] = labels.push(c) - 1;
+    });
+  });
+
+  const heatData = [];
+  pairs.forEach((p) => {
+    heatData.push({ x: position[p.x], y: position[p.y], v: p.r });
+    heatData.push({ x: position[p.y], y: position[p.x], v: p.r });
+  });
+
+  drawHeatmap(labels, heatData);
+}
+
+const FULL_MATRIX_LINK =
+  '<a href="#" onclick="loadFullCorrelation(); return false;">Load full matrix</a>';
+
+function loadCorrelations() {
+  const note = document.getElementById("heatmapNote");
+
+  fetchSection("correlations", { per_page: report.topK })
+    .then((data) => {
+      if (data.matrix && Object.keys(data.matrix).length > 1) {
+        drawDenseHeatmap(data.matrix);
+        note.textContent = "";
+      } else if (data.pairs.length) {
+        drawSparseHeatmap(data.pairs);
+        note.innerHTML =
+          `Showing the ${data.pairs.length} strongest of ${data.pair_count} column pairs ` +
+          `(|r| ≥ ${data.threshold}). ${FULL_MATRIX_LINK}`;
+      } else if (data.pair_count) {
+        note.innerHTML = `No column pairs with |r| ≥ ${data.threshold}. ${FULL_MATRIX_LINK}`;
+      } else {
+        note.textContent = "";
+      }
+    })
+    .catch(() => {
+      note.textContent = "❌ Could not load correlations.";
+    });
+}
+
+function loadFullCorrelation() {
+  const note = document.getElementById("heatmapNote");
+  note.textContent = "Loading full matrix…";
+
+  fetch(`/correlation/${encodeURIComponent(report.filename)}?full=1`)
+    .then((res) => res.json())
+    .then((data) => {
+      drawDenseHeatmap(data.matrix);
+      note.textContent = `Full matrix: ${data.columns.length} columns.`;
+    })
+    .catch(() => {
+      note.textContent = "❌ Could not load the full matrix.";
+    });
+}
+
+/* ---------- Trends ---------- */
+function drawTrend(col) {
+  const t = report.trends[col];
+  if (!t) return;
+  const chart = report.charts.rolling;
+
+  chart.data.labels = t.rolling.map((p) => p[0]);
+  chart.data.datasets = [{
+    label: t.window > 1 ? `${col} (mean of every ${t.window} rows)` : col,
+    data: t.rolling.map((p) => p[1]),
+    pointRadius: 0
+  }];
+  chart.update();
+}
+
+function loadTrends() {
+  const select = document.getElementById("trendColumn");
+  const more = document.getElementById("moreTrends");
+
+  fetchSection("trends", { page: report.trendsPage + 1, per_page: report.pageSize })
+    .then((data) => {
+      report.trendsPage = data.page;
+      setText("trendOrdering", data.ordering);
+
+      data.trends.forEach((t) => {
+        report.trends[t.column] = t;
+        select.add(new Option(t.column, t.column));
+      });
+      document.getElementById("trendInsights").insertAdjacentHTML(
+        "beforeend",
+        data.insights.map((line) => `<li>${reportEscape(line)}</li>`).join("")
+      );
+      more.style.display = data.page < data.pages ? "inline-block" : "none";
+
+      if (!select.value && data.trends.length) select.value = data.trends[0].column;
+      if (data.page === 1) drawTrend(select.value);
+    })
+    .catch(() => setText("trendOrdering", "❌ Could not load trends."));
+}
+
+/* ---------- Suggestions ---------- */
+function suggestionHtml(s) {
+  return `
+    <div style="border-bottom:1px solid rgba(255,255,255,0.08); padding:12px 0;">
+      <p>${reportEscape(s.message)}</p>
+      <b style="color:var(--line-glow);">${reportEscape(s.recommendation)}</b>
+
+      <form action="/apply_suggestion/${encodeURIComponent(report.filename)}" method="POST" style="margin-top:8px;">
+        <input type="hidden" name="issue" value="${reportEscape(s.issue)}">
+        <input type="hidden" name="column" value="${reportEscape(s.column)}">
+        <button class="btn">Apply</button>
+      </form>
+    </div>`;
+}
+
+function loadSuggestions() {
+  const list = document.getElementById("suggestionList");
+  const more = document.getElementById("moreSuggestions");
+
+  fetchSection("suggestions", { page: report.suggestionsPage + 1, per_page: report.pageSize })
+    .then((data) => {
+      report.suggestionsPage = data.page;
+      setText("suggestionStatus", "");
+
+      if (!data.total) {
+        document.getElementById("noSuggestions").style.display = "block";
+        return;
+      }
+
+      document.getElementById("applyAllBox").style.display = "block";
+      list.insertAdjacentHTML("beforeend", data.suggestions.map(suggestionHtml).join(""));
+      more.style.display = data.page < data.pages ? "inline-block" : "none";
+    })
+    .catch(() => setText("suggestionStatus", "❌ Could not load suggestions."));
+}
+
+/* ---------- INIT ---------- */
+function initReport(filename, pageSize, topK) {
+  report.filename = filename;
+  report.pageSize = pageSize;
+  report.topK = topK;
+
+  initCharts();
+  initAnalyticsControls();
+  document.getElementById("moreSuggestions").onclick = loadSuggestions;
+  document.getElementById("moreTrends").onclick = loadTrends;
+  document.getElementById("trendColumn").onchange = (e) => drawTrend(e.target.value);
+
+  // Independent requests: each section renders when its own data arrives
+  loadScores();
+  loadAnalytics();
+  loadCorrelations();
+  loadTrends();
+  loadSuggestions();
+}
@@ -0,0 +1,12 @@
+import numpy as np
+import pandas as pd
+
+from services.cleaning_service import clean_data
+
+
+def test_clean_data_drops_duplicates_before_filling():
+    df = pd.DataFrame({"a": [1, 1, 1], "b": [np.nan, 5.0, 5.0]})
+    cleaned = clean_data(df)
+
+    assert len(cleaned) == 2
+    assert cleaned["b"].tolist() == [5.0, 5.0]
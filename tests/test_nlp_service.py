@@ -0,0 +1,36 @@
+import pandas as pd
+
+from services import nlp_service
+from services.nlp_service import process_nl_batch, process_nl_query
+
+
+def _car_sales():
+    return pd.DataFrame({
+        "Make": pd.Categorical(["Toyota", "BMW", "Honda", "Toyota"]),
+        "Colour": pd.Categorical(["White", "Blue", "Red", "White"]),
+        "Price": [4000.0, 9000.0, 5000.0, 7000.0]
+    })
+
+
+def test_max_min_on_categorical_column_is_rejected():
+    df = _car_sales()
+    for query in ["max of colour", "min make", "max of make by colour"]:
+        assert "is not numeric" in process_nl_query(query, df)["answer"]
+
+
+def test_batch_rejects_categorical_max_and_answers_the_rest():
+    answers = process_nl_batch(["max of colour", "max price"], _car_sales())
+    assert "is not numeric" in answers[0]["answer"]
+    assert answers[1]["answer"] == "The highest value in 'Price' is 9000.0."
+
+
+def test_batch_keeps_other_answers_when_one_question_fails(monkeypatch):
+    def broken(df, intent):
+        raise RuntimeError("boom")
+
+    monkeypatch.setitem(nlp_service.EXECUTORS, "correlation", broken)
+    answers = process_nl_batch(["max price", "correlation", "mean price"], _car_sales())
+
+    assert answers[0]["answer"] == "The highest value in 'Price' is 9000.0."
+    assert answers[1]["error"] == "RuntimeError: boom"
+    assert answers[2]["answer"] == "The average value of 'Price' is 6250.0."